@@ -134,4 +134,64 @@ STATICFILES_DIRS = [
 
 MEDIA_URL = '/images/'
 
-MEDIA_ROOT = os.path.join(BASE_DIR, 'static/images')
\ No newline at end of file
+MEDIA_ROOT = os.path.join(BASE_DIR, 'static/images')
+
+# Maintenix scraping
+MAINTENIX_TODO_LIST_URL = 'http://etmxi.ethiopianairlines.com/maintenix/common/ToDoList.jsp'
+# Cookie jar written by the login script and reused by every scraper
+MAINTENIX_COOKIE_FILE = os.path.join(BASE_DIR, 'cookies.pkl')
+# How long a successful cookie probe (or page load) is trusted before probing again
+MAINTENIX_COOKIE_TTL_SECONDS = 300
+# Number of headless browsers the fleet sweep runs side by side
+SCRAPER_POOL_SIZE = 4
+
+# Scrape scheduler
+# Minutes between refreshes of hot (task or departure coming up), normal and parked aircraft
+SCRAPE_REFRESH_MINUTES = {'hot': 5, 'normal': 60, 'parked': 12 * 60}
+# A task due or a departure within this many hours makes an aircraft hot
+SCRAPE_HOT_WINDOW_HOURS = 6
+# Most scrapes the scheduler keeps in flight against Maintenix at once
+SCRAPE_MAX_IN_FLIGHT = 2
+
+# Raw page cache
+# Fetched Maintenix pages, gzipped and keyed by content hash, for skip-if-unchanged and replay
+SCRAPE_PAGE_CACHE_DIR = os.path.join(BASE_DIR, 'page_cache')
+# Least recently used pages are evicted above this size, and any page older than the age limit
+SCRAPE_PAGE_CACHE_MAX_BYTES = 2 * 1024 ** 3
+SCRAPE_PAGE_CACHE_MAX_AGE_DAYS = 30
+
+# Scrape traces
+# One JSONL timing trace per session (see store/tracing.py)
+SCRAPE_TRACE_DIR = os.path.join(BASE_DIR, 'logs', 'scrape_traces')
+
+# Line maintenance planning
+# Station the flight schedule reports are for; ground windows are at this station
+LINE_STATION = 'ADD'
+# Ground windows shorter than this are too short to plan work into
+PLANNER_MIN_GROUND_MINUTES = 30
+# Most tasks the line crew can take per station per day, e.g. {'ADD': 120}; stations not listed are unlimited
+PLANNER_STATION_CAPACITY = {}
+
+# Snapshot archive
+# Daily date-partitioned Parquet copies of the open task and work package state (see store/snapshots.py)
+SNAPSHOT_DIR = os.path.join(BASE_DIR, 'snapshots')
+SNAPSHOT_COMPRESSION = 'zstd'
+
+# Query cache
+# Dashboard and planning payloads, namespaced by a data version bumped when a scraping session
+# completes or the schedule changes (see store/query_cache.py). The cache lives on disk so the
+# version bumped by a scraper or import process reaches the web server; any backend that every
+# process shares (e.g. Redis or Memcached) works too, but not local memory. The timeout bounds how
+# far "overdue"/"due within" counts drift with the clock between scrapes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'queries': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'query_cache'),
+        'TIMEOUT': 300,
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+}
+QUERY_CACHE_ALIAS = 'queries'
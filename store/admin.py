@@ -9,10 +9,12 @@ admin.site.register(CourseTemplate)
 admin.site.register(AircraftManufacturer)
 admin.site.register(AircraftModelGroup)
 admin.site.register(AircraftScrapingSession)
+admin.site.register(ScrapedPage)
 admin.site.register(Aircraft)
 admin.site.register(OpenTask)
 admin.site.register(OpenWorkPackage)
 admin.site.register(AircraftAlert)
+admin.site.register(AircraftDashboardStats)
 admin.site.register(AircraftFlightSchedule)
-
-
+admin.site.register(GroundWindow)
+admin.site.register(StatusChangeLog)
@@ -0,0 +1,111 @@
+"""
+Set-based generation of AircraftAlert rows.
+
+Each rule is one query for the objects that should currently have an
+alert. The engine compares them with the active alerts by (aircraft,
+alert type, related task/work package), bulk-inserts the missing ones and
+resolves the ones whose condition has cleared. Re-running it without
+changes in the data writes nothing, so it is safe to run after every
+ingestion (see signals.py) and on a timer for alerts that only depend on
+the clock.
+"""
+from collections import namedtuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AircraftAlert
+from .queries import open_tasks, open_work_packages
+from .stats import ACTIVE_WORK_PACKAGE_STATUSES
+
+BATCH_SIZE = 500
+
+# ``candidates(now)`` is a queryset of the objects that should have an alert,
+# ``related`` the AircraftAlert foreign key pointing at them and ``build`` the
+# alert's priority, title and message for one of them
+AlertRule = namedtuple('AlertRule', 'alert_type related candidates build')
+
+
+def _raised_priority(priority):
+    return 'HIGH' if priority in ('CRITICAL', 'HIGH') else 'MEDIUM'
+
+
+ALERT_RULES = [
+    AlertRule(
+        'OVERDUE_TASK', 'related_task',
+        lambda now: open_tasks().filter(due_date__lt=now),
+        lambda task: (_raised_priority(task.task_priority), f"Overdue Task: {task.task_name}",
+                      f"Task {task.task_id} is overdue since {task.due_date}"),
+    ),
+    AlertRule(
+        'CRITICAL_TASK', 'related_task',
+        lambda now: open_tasks().filter(task_priority='CRITICAL'),
+        lambda task: ('HIGH', f"Critical Task: {task.task_name}",
+                      f"Critical task {task.task_id} requires immediate attention"),
+    ),
+    AlertRule(
+        'OVERDUE_WORK_PACKAGE', 'related_work_package',
+        lambda now: open_work_packages().filter(end_date__lt=now, work_package_status__in=ACTIVE_WORK_PACKAGE_STATUSES),
+        lambda work_package: (
+            _raised_priority(work_package.schedule_priority),
+            f"Overdue Work Package: {work_package.work_package_name}",
+            f"Work package {work_package.work_package_number} is overdue since {work_package.end_date}",
+        ),
+    ),
+]
+
+
+def generate_alerts(aircraft_ids=None, now=None, rules=ALERT_RULES):
+    """
+    Bring the active alerts of ``aircraft_ids`` (default: the whole fleet)
+    in line with ``rules``. Returns {'created', 'resolved'}.
+    """
+    now = now or timezone.now()
+    alerts = AircraftAlert.objects.filter(is_active=True, alert_type__in=[rule.alert_type for rule in rules])
+    if aircraft_ids is not None:
+        alerts = alerts.filter(aircraft_id__in=aircraft_ids)
+
+    # (aircraft, type, related object) -> active alert ids; more than one
+    # means duplicates left by the old per-save receivers
+    active = {}
+    for pk, aircraft_id, alert_type, task_id, work_package_id in alerts.order_by().values_list(
+        'pk', 'aircraft_id', 'alert_type', 'related_task_id', 'related_work_package_id',
+    ):
+        related_id = work_package_id if alert_type == 'OVERDUE_WORK_PACKAGE' else task_id
+        active.setdefault((aircraft_id, alert_type, related_id), []).append(pk)
+
+    new, wanted = [], set()
+    for rule in rules:
+        candidates = rule.candidates(now).order_by()
+        if aircraft_ids is not None:
+            candidates = candidates.filter(aircraft_id__in=aircraft_ids)
+        # Only ids at first: full rows are loaded just for the alerts to create
+        missing = []
+        for pk, aircraft_id in candidates.values_list('pk', 'aircraft_id').iterator(chunk_size=BATCH_SIZE):
+            key = (aircraft_id, rule.alert_type, pk)
+            wanted.add(key)
+            if key not in active:
+                missing.append(pk)
+        for start in range(0, len(missing), BATCH_SIZE):
+            for candidate in candidates.filter(pk__in=missing[start:start + BATCH_SIZE]):
+                priority, title, message = rule.build(candidate)
+                new.append(AircraftAlert(
+                    aircraft_id=candidate.aircraft_id, alert_type=rule.alert_type, priority=priority,
+                    title=title[:200], message=message, **{rule.related: candidate},
+                ))
+
+    # Cleared conditions, plus every duplicate beyond the oldest alert per key
+    resolved = []
+    for key, pks in active.items():
+        pks.sort()
+        resolved.extend(pks if key not in wanted else pks[1:])
+
+    if not new and not resolved:
+        return {'created': 0, 'resolved': 0}
+    with transaction.atomic():
+        AircraftAlert.objects.bulk_create(new, batch_size=BATCH_SIZE)
+        for start in range(0, len(resolved), BATCH_SIZE):
+            AircraftAlert.objects.filter(pk__in=resolved[start:start + BATCH_SIZE]).update(
+                is_active=False, resolved_at=now,
+            )
+    return {'created': len(new), 'resolved': len(resolved)}
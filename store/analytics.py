@@ -0,0 +1,155 @@
+"""
+Fleet-wide due-date analytics over open tasks, computed with NumPy.
+
+Instead of loading every OpenTask as a model instance and asking each one
+is_overdue/days_until_due, the due dates (as Julian days, computed by the
+database), priorities and aircraft ids of all open tasks are read as plain
+columns into arrays, and the overdue flags, horizon buckets and
+per-aircraft/per-model-group histograms are computed on whole arrays.
+
+Reading the columns is the expensive part (it is bound by the database
+driver building one tuple per row), so they are cached per session
+version like the work package task index; reports in between scrapes only
+redo the array arithmetic.
+"""
+import threading
+
+import numpy as np
+from django.db import connection
+from django.db.models import Case, FloatField, Func, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import Aircraft, OpenTask
+from .queries import open_tasks, session_version
+
+# Upper bounds (in days from now) of the "due within" horizons
+HORIZON_DAYS = (1, 3, 7, 30)
+# One bucket per horizon, plus overdue, later and undated
+BUCKETS = ['overdue'] + [
+    f"{low}-{high}d" for low, high in zip((0,) + HORIZON_DAYS, HORIZON_DAYS)
+] + [f"{HORIZON_DAYS[-1]}d+", 'undated']
+PRIORITIES = [value for value, _ in OpenTask.TASK_PRIORITY_CHOICES]
+
+_columns = {}
+_columns_lock = threading.Lock()
+
+
+class JulianDay(Func):
+    """Date-time as a fractional Julian day number, so differences are in days"""
+    function = 'julianday'
+    output_field = FloatField()
+
+    def as_postgresql(self, compiler, connection, **extra_context):
+        return self.as_sql(compiler, connection, template="(EXTRACT(EPOCH FROM %(expressions)s) / 86400.0 + 2440587.5)",
+                           **extra_context)
+
+
+def julian_day(moment):
+    """Julian day number of an aware datetime, matching JulianDay in the database"""
+    return moment.timestamp() / 86400.0 + 2440587.5
+
+
+def load_due_columns(tasks=None):
+    """
+    {'due', 'priority', 'aircraft'} arrays over ``tasks`` (default: every
+    open task). Due dates are Julian days (NaN when undated); priorities
+    are indexes into PRIORITIES.
+    """
+    tasks = tasks if tasks is not None else open_tasks()
+    columns = tasks.order_by().annotate(
+        due_day=JulianDay('due_date'),
+        priority_code=Case(
+            *[When(task_priority=priority, then=Value(code)) for code, priority in enumerate(PRIORITIES)],
+            default=Value(PRIORITIES.index('MEDIUM')), output_field=IntegerField(),
+        ),
+    ).values_list('due_day', 'priority_code', 'aircraft_id')
+
+    # Run the SQL directly: the rows are plain numbers, so values_list()
+    # iteration would only add per-row Python overhead
+    sql, params = columns.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    due, priority, aircraft = zip(*rows) if rows else ((), (), ())
+    return {
+        'due': np.array(due, dtype=np.float64),
+        'priority': np.array(priority, dtype=np.int64),
+        'aircraft': np.array(aircraft, dtype=np.int64),
+    }
+
+
+def due_columns(version=None):
+    """load_due_columns() for all open tasks, cached per session version"""
+    version = version if version is not None else session_version()
+    with _columns_lock:
+        if version in _columns:
+            return _columns[version]
+    columns = load_due_columns()
+    with _columns_lock:
+        _columns.clear()
+        _columns[version] = columns
+    return columns
+
+
+def clear_due_columns_cache():
+    with _columns_lock:
+        _columns.clear()
+
+
+def due_buckets(due, now):
+    """Index into BUCKETS of every due date (Julian days, NaN when undated)"""
+    days = due - julian_day(now)
+    # 0 for overdue, 1.. for each horizon, len(HORIZON_DAYS) + 1 for later
+    buckets = np.searchsorted(np.array((0,) + HORIZON_DAYS, dtype=np.float64), days, side='right')
+    buckets[np.isnan(days)] = len(BUCKETS) - 1
+    return buckets
+
+
+def histogram(keys, buckets):
+    """(distinct keys, [keys x BUCKETS] counts) for parallel arrays of group keys and bucket indexes"""
+    groups, group_index = np.unique(keys, return_inverse=True)
+    counts = np.bincount(group_index * len(BUCKETS) + buckets, minlength=len(groups) * len(BUCKETS))
+    return groups, counts.reshape(len(groups), len(BUCKETS))
+
+
+def due_horizon(aircraft_ids=None, now=None, columns=None):
+    """
+    JSON-ready due-date horizon report over the open tasks of
+    ``aircraft_ids`` (default: the whole fleet): bucket totals, cumulative
+    "due within N days" counts, and per-priority, per-aircraft and
+    per-model-group histograms.
+    """
+    now = now or timezone.now()
+    columns = columns if columns is not None else due_columns()
+    if aircraft_ids is not None:
+        selected = np.isin(columns['aircraft'], np.array(list(aircraft_ids), dtype=np.int64))
+        columns = {name: values[selected] for name, values in columns.items()}
+
+    buckets = due_buckets(columns['due'], now)
+    totals = np.bincount(buckets, minlength=len(BUCKETS))
+    # Horizons count everything due from now until N days out, so they are cumulative
+    within = np.cumsum(totals[1:len(HORIZON_DAYS) + 1]).tolist()
+
+    priorities, by_priority = histogram(columns['priority'], buckets)
+    aircraft, by_aircraft = histogram(columns['aircraft'], buckets)
+    # Model group histograms are the per-aircraft rows summed per model group
+    fleet = {pk: (tail, group) for pk, tail, group in Aircraft.objects.filter(pk__in=aircraft.tolist()).values_list(
+        'pk', 'tail_number', 'model_group__name')}
+    by_model_group = {}
+    for pk, counts in zip(aircraft.tolist(), by_aircraft):
+        group = fleet[pk][1]
+        by_model_group[group] = by_model_group[group] + counts if group in by_model_group else counts
+
+    return {
+        'generated_at': now.isoformat(),
+        'buckets': BUCKETS,
+        'total': int(len(buckets)),
+        'overdue': int(totals[0]),
+        'undated': int(totals[-1]),
+        'totals': totals.tolist(),
+        'due_within': {str(days): count for days, count in zip(HORIZON_DAYS, within)},
+        'by_priority': {PRIORITIES[code]: counts for code, counts in zip(priorities.tolist(), by_priority.tolist())},
+        'by_aircraft': {fleet[pk][0]: counts for pk, counts in zip(aircraft.tolist(), by_aircraft.tolist())},
+        'by_model_group': {group: counts.tolist() for group, counts in by_model_group.items()},
+    }
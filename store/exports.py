@@ -0,0 +1,248 @@
+"""
+Fleet-wide exports of open tasks, work packages and the flight schedule.
+
+Rows are read as values_list() tuples with iterator(chunk_size=...), so
+no model instances are built and at most one chunk is in memory at a
+time. Each chunk is written out as soon as it is read: as CSV or JSON
+Lines text, or as one Parquet row group (pyarrow is only needed for
+Parquet). Memory stays the same whether the export is a thousand rows or
+a million, and the HTTP endpoint starts sending before the query ends.
+"""
+import csv
+import io
+import json
+from datetime import datetime, time, timedelta
+
+from django.db import models
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import AircraftFlightSchedule, OpenTask, OpenWorkPackage
+from .queries import parse_moment
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'parquet')
+EXPORT_CHUNK_SIZE = 10000
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+_AIRCRAFT_COLUMNS = [('tail_number', 'aircraft__tail_number'), ('model_group', 'aircraft__model_group__name')]
+
+
+class Dataset:
+    """One exportable model: its columns as (name, field path) and the field the date range applies to"""
+
+    def __init__(self, model, fields, date_field):
+        self.model = model
+        self.columns = [('id', 'id')] + _AIRCRAFT_COLUMNS + [(field, field) for field in fields]
+        self.date_field = date_field
+
+    @property
+    def names(self):
+        return [name for name, _ in self.columns]
+
+    def field(self, path):
+        """Model field at the end of a field path such as aircraft__model_group__name"""
+        model, field = self.model, None
+        for part in path.split('__'):
+            field = model._meta.get_field(part)
+            model = field.related_model
+        return field
+
+
+DATASETS = {
+    'tasks': Dataset(OpenTask, [
+        'task_id', 'task_name', 'config_position', 'must_be_removed', 'due_date', 'soft_deadline', 'inventory',
+        'task_status', 'work_type', 'originator', 'task_priority', 'schedule_priority', 'driving_task_name',
+        'driving_task_id', 'etops_significant', 'work_package_name', 'work_package_id', 'work_package_number',
+        'scraped_at',
+    ], 'due_date'),
+    'work_packages': Dataset(OpenWorkPackage, [
+        'work_package_id', 'work_package_name', 'work_package_number', 'inventory', 'work_package_status',
+        'request_parts', 'work_location', 'start_date', 'end_date', 'schedule_priority', 'driving_task_name',
+        'driving_task_id', 'scraped_at',
+    ], 'start_date'),
+    'flights': Dataset(AircraftFlightSchedule, [
+        'flight_date', 'previous_flight_number', 'previous_flight_location', 'scheduled_arrival_time',
+        'equipment_type', 'previous_tail_scheduled', 'current_tail_scheduled', 'current_flight_number',
+        'flight_destination', 'scheduled_departure_time', 'rotation_sequence', 'is_tail_swap',
+    ], 'flight_date'),
+}
+
+
+def dataset(name):
+    if name not in DATASETS:
+        raise ValueError(f"Unknown dataset {name!r}, expected one of {', '.join(DATASETS)}")
+    return DATASETS[name]
+
+
+def parse_bound(value, name):
+    """A date for a date-only ``value`` (meaning the whole day), else an aware datetime"""
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    return day if day is not None else parse_moment(value, name)
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def export_rows(name, aircraft=None, model_groups=None, date_from=None, date_to=None, exclude=None,
+                chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Lists of up to ``chunk_size`` row tuples (in Dataset.columns order) of
+    dataset ``name``, filtered by tail number, model group and an
+    inclusive date range on the dataset's date field. The bounds are
+    datetimes or dates; a date ``date_to`` includes the whole of that day.
+    Rows matching the ``exclude`` lookups (e.g. {'task_status__in': [...]})
+    are left out.
+    """
+    spec = dataset(name)
+    rows = spec.model.objects.all()
+    if exclude:
+        rows = rows.exclude(**exclude)
+    if aircraft:
+        rows = rows.filter(aircraft__tail_number__in=aircraft)
+    if model_groups:
+        rows = rows.filter(aircraft__model_group__name__in=model_groups)
+    date_field = spec.field(spec.date_field)
+    for lookup, moment in (('gte', date_from), ('lte', date_to)):
+        if moment is None:
+            continue
+        if not isinstance(date_field, models.DateTimeField):
+            if isinstance(moment, datetime):
+                moment = timezone.localdate(moment) if timezone.is_aware(moment) else moment.date()
+        elif not isinstance(moment, datetime):
+            # Up to the start of the next day, so the last day's timestamps are kept
+            if lookup == 'lte':
+                lookup, moment = 'lt', moment + timedelta(days=1)
+            moment = _start_of(moment)
+        rows = rows.filter(**{f"{spec.date_field}__{lookup}": moment})
+
+    chunk = []
+    for row in rows.order_by('pk').values_list(*(path for _, path in spec.columns)).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def csv_chunks(name, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(dataset(name).names)
+    for chunk in chunks:
+        writer.writerows([_text(value) for value in row] for row in chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def jsonl_chunks(name, chunks):
+    names = dataset(name).names
+    for chunk in chunks:
+        yield ''.join(json.dumps(dict(zip(names, row)), default=_text) + '\n' for row in chunk).encode('utf-8')
+
+
+def load_pyarrow():
+    """(pyarrow, pyarrow.parquet), or ValueError when pyarrow is not installed"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet exports need pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def parquet_schema(name):
+    """pyarrow schema matching the model fields of dataset ``name``"""
+    pa, _ = load_pyarrow()
+    spec = dataset(name)
+    types = []
+    for column, path in spec.columns:
+        field = spec.field(path)
+        if isinstance(field, models.DateTimeField):
+            arrow_type = pa.timestamp('us', tz='UTC')
+        elif isinstance(field, models.DateField):
+            arrow_type = pa.date32()
+        elif isinstance(field, models.TimeField):
+            arrow_type = pa.time64('us')
+        elif isinstance(field, models.BooleanField):
+            arrow_type = pa.bool_()
+        elif isinstance(field, (models.AutoField, models.IntegerField)):
+            arrow_type = pa.int64()
+        else:
+            arrow_type = pa.string()
+        types.append(pa.field(column, arrow_type))
+    return pa.schema(types)
+
+
+class _Chunks(io.RawIOBase):
+    """Write-only file that hands back what was written since the last take()"""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def take(self):
+        data, self._parts = b''.join(self._parts), []
+        return data
+
+
+def parquet_chunks(name, chunks, compression='snappy'):
+    """One Parquet row group per chunk; the file footer comes with the last yield"""
+    pa, pq = load_pyarrow()
+    schema = parquet_schema(name)
+    sink = _Chunks()
+    writer = pq.ParquetWriter(sink, schema, compression=compression)
+    try:
+        for chunk in chunks:
+            columns = zip(*chunk)
+            writer.write_batch(pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema,
+            ))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+WRITERS = {'csv': csv_chunks, 'jsonl': jsonl_chunks, 'parquet': parquet_chunks}
+
+
+def export(name, output, **filters):
+    """Bytes of dataset ``name`` in format ``output``, one chunk at a time (see export_rows for the filters)"""
+    if output not in WRITERS:
+        raise ValueError(f"Unknown format {output!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+    dataset(name)
+    if output == 'parquet':
+        # Fail before a response has started rather than halfway through it
+        load_pyarrow()
+    return WRITERS[output](name, export_rows(name, **filters))
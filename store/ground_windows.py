@@ -0,0 +1,156 @@
+"""
+Ground-window interval index over the flight schedule.
+
+Every schedule row is a turnaround at the line station: PTAIL arrives at
+STA on flight PFLT and TAIL leaves at STD on flight FLT. Pairing each
+tail's arrivals with its next departure gives the windows it spends on
+the ground, stored as GroundWindow rows so "who is on the ground at X
+between 22:00 and 05:00" is an indexed range query rather than a pass
+over the schedule.
+
+A window belongs to the schedule date of the arrival that opens it. Its
+departure can be up to LOOKAHEAD_DAYS later, so when the rows of a date
+change, the windows of that date and the LOOKAHEAD_DAYS before it are
+rebuilt and nothing else.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AircraftFlightSchedule, GroundWindow
+from .schedule_import import fleet_map
+
+# How far after its arrival a window's departure is looked for
+LOOKAHEAD_DAYS = 2
+BATCH_SIZE = 1000
+
+
+def _moment(flight_date, value):
+    return timezone.make_aware(datetime.combine(flight_date, value))
+
+
+def schedule_events(start_date, end_date, fleet=None):
+    """
+    tail -> sorted [(moment, is_departure, flight number, flight date)]
+    from the schedule rows dated start_date..end_date. Tails are the
+    aircraft id when the tail is in the fleet, else the tail as written.
+    A departure earlier than the arrival of its row is taken to be the
+    next morning.
+    """
+    fleet = fleet if fleet is not None else fleet_map()
+    rows = AircraftFlightSchedule.objects.filter(flight_date__range=(start_date, end_date)).values_list(
+        'flight_date', 'previous_tail_scheduled', 'previous_flight_number', 'scheduled_arrival_time',
+        'current_tail_scheduled', 'current_flight_number', 'scheduled_departure_time',
+    )
+    events = {}
+    # A schedule repeats the same clock times, so each is made aware once
+    moments = {}
+
+    def moment(flight_date, value):
+        if (flight_date, value) not in moments:
+            moments[flight_date, value] = _moment(flight_date, value)
+        return moments[flight_date, value]
+
+    for flight_date, previous_tail, previous_flight, arrival, tail, flight, departure in rows.iterator():
+        arrives = moment(flight_date, arrival) if arrival else None
+        arriving = (previous_tail or tail).upper()
+        if arrives and arriving:
+            events.setdefault(fleet.get(arriving, arriving), []).append((arrives, False, previous_flight, flight_date))
+        if departure and tail:
+            departs = moment(flight_date, departure)
+            if arrives and departs < arrives:
+                departs += timedelta(days=1)
+            events.setdefault(fleet.get(tail.upper(), tail.upper()), []).append((departs, True, flight, flight_date))
+    for tail_events in events.values():
+        tail_events.sort()
+    return events
+
+
+def build_ground_windows(flight_dates, station=None):
+    """Unsaved GroundWindow rows for the arrivals dated ``flight_dates``"""
+    station = station or settings.LINE_STATION
+    flight_dates = set(flight_dates)
+    if not flight_dates:
+        return []
+    fleet = fleet_map()
+    # aircraft id -> its full tail (fleet_map also holds the bare suffixes)
+    tails = {}
+    for tail, aircraft_id in fleet.items():
+        if len(tail) > len(tails.get(aircraft_id, '')):
+            tails[aircraft_id] = tail
+    events = schedule_events(min(flight_dates), max(flight_dates) + timedelta(days=LOOKAHEAD_DAYS), fleet)
+    # Windows with no departure yet end with the last day of the imported schedule
+    imported_until = max((event[3] for tail_events in events.values() for event in tail_events), default=None)
+    schedule_end = timezone.make_aware(datetime.combine(imported_until + timedelta(days=1), time.min)) \
+        if imported_until else None
+
+    windows = []
+
+    def add(tail, arrival, end_at, departure_flight='', open_ended=False):
+        start_at, arrival_flight, flight_date = arrival
+        if end_at is None or end_at < start_at:
+            return
+        windows.append(GroundWindow(
+            flight_date=flight_date,
+            tail_number=tails.get(tail, tail),
+            aircraft_id=tail if tail in tails else None,
+            station=station,
+            start_at=start_at,
+            end_at=end_at,
+            duration_minutes=int((end_at - start_at).total_seconds() // 60),
+            arrival_flight=arrival_flight,
+            departure_flight=departure_flight,
+            open_ended=open_ended,
+        ))
+
+    for tail, tail_events in events.items():
+        arrival = None
+        for moment, is_departure, flight, flight_date in tail_events:
+            if not is_departure:
+                # A second arrival without a departure in between replaces the first
+                arrival = (moment, flight, flight_date) if flight_date in flight_dates else None
+            elif arrival is not None:
+                add(tail, arrival, moment, flight)
+                arrival = None
+        if arrival is not None:
+            add(tail, arrival, schedule_end, open_ended=True)
+    return windows
+
+
+def affected_dates(flight_dates):
+    """Arrival dates whose windows can change when the rows of ``flight_dates`` change"""
+    return {flight_date - timedelta(days=days) for flight_date in flight_dates for days in range(LOOKAHEAD_DAYS + 1)}
+
+
+def rebuild_ground_windows(flight_dates, station=None):
+    """
+    Replace the windows affected by a change to the schedule of
+    ``flight_dates``. Returns how many windows were written.
+    """
+    dates = affected_dates(flight_dates)
+    if not dates:
+        return 0
+    windows = build_ground_windows(dates, station)
+    with transaction.atomic():
+        GroundWindow.objects.filter(flight_date__in=dates).delete()
+        GroundWindow.objects.bulk_create(windows, batch_size=BATCH_SIZE)
+    return len(windows)
+
+
+def ground_windows_overlapping(start, end, station=None):
+    """
+    Windows at ``station`` that overlap start..end. The start_at range is
+    bounded below by the longest window at the station, so the lookup is
+    an index range on (station, start_at) instead of a scan of every
+    window that started before ``end``.
+    """
+    station = station or settings.LINE_STATION
+    windows = GroundWindow.objects.filter(station=station)
+    longest = windows.order_by('-duration_minutes').values_list('duration_minutes', flat=True).first()
+    if longest is None:
+        return windows.none()
+    return windows.filter(
+        start_at__gte=start - timedelta(minutes=longest), start_at__lt=end, end_at__gt=start,
+    ).select_related('aircraft')
@@ -0,0 +1,371 @@
+"""
+Bulk ingestion of scraped Maintenix rows.
+
+Parsed rows (see parsers.py) are written with one INSERT ... ON CONFLICT
+DO UPDATE per batch, keyed on the existing unique_together constraints
+(aircraft, task_id) and (aircraft, work_package_id), instead of one
+save() per row. Each aircraft is written inside a single transaction.
+
+In ``sync`` mode every row carries a fingerprint of its scraped fields:
+unchanged rows are not written at all, changed rows are bulk updated and
+rows that disappeared from Maintenix are closed in one UPDATE. Status and
+date changes found on the way are appended to StatusChangeLog, in bulk
+with each batch.
+
+ingest_stream() takes rows straight from the streaming parser and writes
+them in fixed-size batches, so large fleet listings never sit in memory.
+"""
+import hashlib
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Aircraft, AircraftScrapingSession, OpenTask, OpenWorkPackage, StatusChangeLog
+
+BATCH_SIZE = 500
+INGEST_MODES = ('upsert', 'sync')
+
+# Fields that come from Maintenix and are overwritten on every scrape
+TASK_SCRAPED_FIELDS = [
+    'task_name', 'config_position', 'must_be_removed', 'due_date', 'soft_deadline',
+    'inventory', 'task_status', 'work_type', 'originator', 'task_priority',
+    'schedule_priority', 'driving_task_name', 'driving_task_id', 'etops_significant',
+    'work_package_name', 'work_package_id', 'work_package_number',
+]
+
+WORK_PACKAGE_SCRAPED_FIELDS = [
+    'work_package_name', 'inventory', 'work_package_number', 'work_package_status',
+    'request_parts', 'work_location', 'start_date', 'end_date', 'schedule_priority',
+    'driving_task_name', 'driving_task_id',
+]
+
+SCRAPE_METADATA_FIELDS = ['scraped_by', 'scraped_session', 'row_fingerprint']
+
+# Statuses we set on rows that are no longer listed in Maintenix
+TASK_CLOSED_STATUS = 'COMPLETED'
+TASK_FINISHED_STATUSES = ['COMPLETED', 'CANCELLED']
+WORK_PACKAGE_CLOSED_STATUS = 'CLOSED'
+WORK_PACKAGE_FINISHED_STATUSES = ['COMPLETED', 'CANCELLED', 'CLOSED']
+
+
+class RowKind:
+    """Per-model settings shared by the upsert and sync writers"""
+
+    def __init__(self, model, key, fields, status_field, closed_status, finished_statuses,
+                 object_type, logged_fields):
+        self.model = model
+        self.key = key
+        self.fields = fields
+        self.status_field = status_field
+        self.closed_status = closed_status
+        self.finished_statuses = finished_statuses
+        # StatusChangeLog.object_type and the fields whose changes are logged
+        self.object_type = object_type
+        self.logged_fields = logged_fields
+
+
+TASKS = RowKind(OpenTask, 'task_id', TASK_SCRAPED_FIELDS,
+                'task_status', TASK_CLOSED_STATUS, TASK_FINISHED_STATUSES,
+                'TASK', ['task_status', 'due_date'])
+WORK_PACKAGES = RowKind(OpenWorkPackage, 'work_package_id', WORK_PACKAGE_SCRAPED_FIELDS,
+                        'work_package_status', WORK_PACKAGE_CLOSED_STATUS, WORK_PACKAGE_FINISHED_STATUSES,
+                        'WORK_PACKAGE', ['work_package_status', 'start_date', 'end_date'])
+
+
+def default_inventory(aircraft):
+    """Maintenix style inventory label, e.g. BOEING 737-8MAX - ET-AVI"""
+    return f"{aircraft.model_group.full_name.upper()} - {aircraft.tail_number}"
+
+
+def unique_rows(rows, key):
+    """Drop repeated keys within a batch, keeping the last row Maintenix listed"""
+    return list({row[key]: row for row in rows if row.get(key)}.values())
+
+
+def _fingerprint_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def row_fingerprint(instance, fields):
+    """SHA-1 over the scraped field values of a task or work package"""
+    payload = '\x1f'.join(_fingerprint_value(getattr(instance, field)) for field in fields)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def log_value(value):
+    """StatusChangeLog text of a status or date; dates in UTC so equal instants compare equal"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = value.astimezone(dt_timezone.utc)
+        return value.isoformat()
+    return str(value)
+
+
+def build_instances(kind, aircraft, rows, session):
+    inventory = default_inventory(aircraft)
+    user = session.user if session else None
+    fields = kind.fields + [kind.key]
+    instances = []
+    for row in rows:
+        values = {field: row[field] for field in fields if field in row}
+        values.setdefault('inventory', inventory)
+        instance = kind.model(aircraft=aircraft, scraped_by=user, scraped_session=session, **values)
+        instance.row_fingerprint = row_fingerprint(instance, kind.fields)
+        instances.append(instance)
+    return instances
+
+
+def batched(iterable, size):
+    """Split any iterable into lists of at most ``size`` items"""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class AircraftWriter:
+    """
+    Writes one aircraft's rows batch by batch.
+
+    ``upsert`` rewrites every row. ``sync`` compares fingerprints and only
+    writes new or changed rows; it remembers the keys it has seen so that
+    finish() can close the rows Maintenix no longer lists.
+    """
+
+    def __init__(self, aircraft, session=None, mode='upsert', batch_size=BATCH_SIZE):
+        if mode not in INGEST_MODES:
+            raise ValueError(f"Unknown ingest mode {mode!r}, expected one of {INGEST_MODES}")
+        self.aircraft = aircraft
+        self.session = session
+        self.mode = mode
+        self.batch_size = batch_size
+        self.counts = {'tasks': 0, 'work_packages': 0}
+        if mode == 'sync':
+            self.counts.update(inserted=0, updated=0, unchanged=0, closed=0)
+        self._seen = {TASKS: set(), WORK_PACKAGES: set()}
+        self._changes = []
+
+    def write(self, kind, rows):
+        """Write one batch of ``kind`` rows and return the counts for it"""
+        instances = build_instances(kind, self.aircraft, unique_rows(rows, kind.key), self.session)
+        if self.mode == 'sync':
+            counts = self._sync(kind, instances)
+        else:
+            counts = self._upsert(kind, instances)
+        counts['tasks' if kind is TASKS else 'work_packages'] = len(instances)
+        self._add(counts)
+        self._write_changes()
+        return counts
+
+    def finish(self, kinds=(TASKS, WORK_PACKAGES)):
+        """
+        Close vanished rows of ``kinds`` (sync mode), add this aircraft's
+        totals to the session and return them.
+        """
+        if self.mode == 'sync':
+            closed = sum(self._close_vanished(kind) for kind in kinds)
+            self._add({'closed': closed})
+            self._write_changes()
+        record_session_counts(self.session, **{SESSION_COUNTERS[count]: value for count, value in self.counts.items()})
+        return dict(self.counts)
+
+    def _add(self, counts):
+        for count, value in counts.items():
+            self.counts[count] += value
+
+    def _log(self, kind, pk, field, old, new):
+        self._changes.append(StatusChangeLog(
+            object_type=kind.object_type, object_id=pk, aircraft=self.aircraft, field=field,
+            old_value=old, new_value=new, session=self.session,
+        ))
+
+    def _write_changes(self):
+        """Append the changes found since the last call, in the same transaction as the rows"""
+        if self._changes:
+            changed_at = timezone.now()
+            for change in self._changes:
+                change.changed_at = changed_at
+            StatusChangeLog.objects.bulk_create(self._changes, batch_size=self.batch_size)
+            self._changes = []
+
+    def _upsert(self, kind, instances):
+        kind.model.objects.bulk_create(
+            instances,
+            batch_size=self.batch_size,
+            update_conflicts=True,
+            unique_fields=['aircraft', kind.key],
+            update_fields=kind.fields + SCRAPE_METADATA_FIELDS,
+        )
+        return {}
+
+    def _sync(self, kind, instances):
+        keys = [getattr(instance, kind.key) for instance in instances]
+        self._seen[kind].update(keys)
+        # key -> (pk, fingerprint, *logged field values)
+        existing = {
+            row[0]: row[1:]
+            for row in kind.model.objects.filter(
+                aircraft=self.aircraft, **{f"{kind.key}__in": keys}
+            ).order_by().values_list(kind.key, 'pk', 'row_fingerprint', *kind.logged_fields)
+        } if keys else {}
+
+        new, changed = [], []
+        for instance in instances:
+            current = existing.get(getattr(instance, kind.key))
+            if current is None:
+                new.append(instance)
+            elif current[1] != instance.row_fingerprint:
+                instance.pk = current[0]
+                changed.append(instance)
+                for field, old in zip(kind.logged_fields, current[2:]):
+                    old, new_value = log_value(old), log_value(getattr(instance, field))
+                    if old != new_value:
+                        self._log(kind, instance.pk, field, old, new_value)
+
+        kind.model.objects.bulk_create(new, batch_size=self.batch_size)
+        # The first status of a new row starts its history
+        for instance in new:
+            self._log(kind, instance.pk, kind.status_field, '', log_value(getattr(instance, kind.status_field)))
+        kind.model.objects.bulk_update(changed, kind.fields + SCRAPE_METADATA_FIELDS, batch_size=self.batch_size)
+        return {
+            'inserted': len(new),
+            'updated': len(changed),
+            'unchanged': len(instances) - len(new) - len(changed),
+        }
+
+    def _close_vanished(self, kind):
+        """
+        Close open rows whose key was not scraped. The fingerprint is
+        cleared so the row counts as changed if it ever comes back.
+        """
+        candidates = kind.model.objects.filter(aircraft=self.aircraft).exclude(
+            **{f"{kind.status_field}__in": kind.finished_statuses}
+        ).order_by().values_list('pk', kind.key, kind.status_field)
+        vanished = []
+        for pk, key, status in candidates.iterator():
+            if key not in self._seen[kind]:
+                vanished.append(pk)
+                self._log(kind, pk, kind.status_field, status, kind.closed_status)
+        for start in range(0, len(vanished), self.batch_size):
+            kind.model.objects.filter(pk__in=vanished[start:start + self.batch_size]).update(
+                **{kind.status_field: kind.closed_status, 'row_fingerprint': '', 'scraped_session': self.session}
+            )
+        return len(vanished)
+
+
+SESSION_COUNTERS = {
+    'tasks': 'tasks_scraped',
+    'work_packages': 'work_packages_scraped',
+    'inserted': 'rows_inserted',
+    'updated': 'rows_updated',
+    'unchanged': 'rows_unchanged',
+    'closed': 'rows_closed',
+}
+
+
+def record_session_counts(session, **counts):
+    """Add batch counts to the session in one UPDATE so parallel writers don't clobber each other"""
+    counts = {field: value for field, value in counts.items() if value}
+    if session is None or not counts:
+        return
+    AircraftScrapingSession.objects.filter(pk=session.pk).update(
+        **{field: F(field) + value for field, value in counts.items()}
+    )
+    session.refresh_from_db(fields=list(counts))
+
+
+def record_unchanged_aircraft(aircraft, session=None):
+    """
+    Count a page identical to the last one ingested for ``aircraft``
+    without parsing it: it lists exactly the rows that still carry a
+    fingerprint (closing a row clears it), and all of them are unchanged.
+    """
+    counts = {
+        'tasks': OpenTask.objects.filter(aircraft=aircraft).exclude(row_fingerprint='').count(),
+        'work_packages': OpenWorkPackage.objects.filter(aircraft=aircraft).exclude(row_fingerprint='').count(),
+        'inserted': 0, 'updated': 0, 'closed': 0,
+    }
+    counts['unchanged'] = counts['tasks'] + counts['work_packages']
+    record_session_counts(session, **{SESSION_COUNTERS[count]: value for count, value in counts.items()})
+    return counts
+
+
+def ingest_aircraft(aircraft, tasks=(), work_packages=(), session=None, batch_size=BATCH_SIZE, mode='upsert'):
+    """
+    Write one aircraft's scraped tasks and work packages in a single
+    transaction and add the counts to ``session``.
+
+    ``mode='upsert'`` rewrites every row; ``mode='sync'`` skips unchanged
+    rows and closes the ones that disappeared. Returns a dict of counts.
+    """
+    writer = AircraftWriter(aircraft, session, mode, batch_size)
+    with transaction.atomic():
+        for kind, rows in ((TASKS, tasks), (WORK_PACKAGES, work_packages)):
+            for batch in batched(rows, batch_size):
+                writer.write(kind, batch)
+        return writer.finish()
+
+
+def ingest_stream(rows, session=None, aircraft=None, batch_size=BATCH_SIZE, mode='upsert'):
+    """
+    Write a stream of ('tasks' | 'work_packages', row) pairs, e.g. from
+    parsers.iter_page_rows(), in fixed-size batches so memory stays flat
+    whatever the size of the listing.
+
+    Fleet-level listings mix aircraft; rows are matched to an aircraft by
+    the tail at the end of their inventory label unless ``aircraft`` is
+    given. Each batch is committed in its own transaction. In sync mode
+    only aircraft that appear in the listing have vanished rows closed,
+    and only of the kinds the listing contains: a task listing leaves work
+    packages alone. Pass every listing of one sweep as a single stream
+    (e.g. itertools.chain) so each kind is closed against all of them.
+
+    Returns the summed counts plus 'skipped' for rows with an unknown tail.
+    """
+    from .parsers import tail_from_inventory
+
+    kinds = {'tasks': TASKS, 'work_packages': WORK_PACKAGES}
+    fleet = {} if aircraft else {
+        plane.tail_number: plane for plane in Aircraft.objects.select_related('model_group')
+    }
+    writers = {}
+    listed = set()
+    skipped = 0
+
+    for batch in batched(rows, batch_size):
+        groups = {}
+        for kind, row in batch:
+            listed.add(kind)
+            plane = aircraft or fleet.get(tail_from_inventory(row.get('inventory')))
+            if plane is None:
+                skipped += 1
+                continue
+            groups.setdefault((plane.pk, kind), (plane, []))[1].append(row)
+
+        with transaction.atomic():
+            for (plane_id, kind), (plane, group_rows) in groups.items():
+                if plane_id not in writers:
+                    writers[plane_id] = AircraftWriter(plane, session, mode, batch_size)
+                writers[plane_id].write(kinds[kind], group_rows)
+
+    totals = {'skipped': skipped}
+    closing = [kinds[kind] for kind in kinds if kind in listed]
+    with transaction.atomic():
+        for writer in writers.values():
+            for count, value in writer.finish(closing).items():
+                totals[count] = totals.get(count, 0) + value
+    return totals
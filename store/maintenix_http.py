@@ -0,0 +1,363 @@
+"""
+Browserless fetch engine for Maintenix.
+
+The ToDoList, open task and work package pages are server-rendered JSP,
+so once we hold a valid session cookie there is no need for Chrome: a
+plain keep-alive HTTP connection returns the same HTML in milliseconds.
+Selenium is still used by the login script that writes ``cookies.pkl``;
+CookieManager shares and re-validates that jar across workers.
+"""
+import http.client
+import os
+import pickle
+import queue
+import threading
+import time
+import zlib
+from http.cookies import SimpleCookie
+from urllib.parse import urljoin, urlsplit
+
+from django.conf import settings
+
+from .parsers import iter_page_rows, parse_aircraft_page, parse_fleet_list
+
+MAINTENIX_DOMAIN = 'ethiopianairlines.com'
+LOGIN_MARKERS = (b'j_security_check', b'sign in', b'login.jsp')
+
+
+class MaintenixLoginRequired(Exception):
+    """The saved cookies no longer give us a Maintenix session"""
+
+
+def read_cookie_file(cookie_file=None, domain=MAINTENIX_DOMAIN):
+    """The Selenium cookie dicts saved by the login script, for ``domain`` only"""
+    with open(cookie_file or settings.MAINTENIX_COOKIE_FILE, 'rb') as file:
+        cookies = pickle.load(file)
+    return [cookie for cookie in cookies if not domain or domain in cookie.get('domain', '')]
+
+
+def load_cookie_jar(cookie_file=None, domain=MAINTENIX_DOMAIN):
+    """Read the Selenium cookie dump into a {name: value} dict"""
+    return {cookie['name']: cookie['value'] for cookie in read_cookie_file(cookie_file, domain)}
+
+
+class MaintenixHttpClient:
+    """
+    Thread-safe HTTP client with a small pool of keep-alive connections
+    per host and a shared cookie jar.
+    """
+
+    def __init__(self, cookies=None, pool_size=None, timeout=15):
+        self.cookies = dict(cookies if cookies is not None else load_cookie_jar())
+        self.pool_size = pool_size or settings.SCRAPER_POOL_SIZE
+        self.timeout = timeout
+        self._pools = {}
+        self._lock = threading.Lock()
+        # Retries are counted per thread so each scrape can report its own
+        self._local = threading.local()
+
+    # -- connection pool ---------------------------------------------------
+
+    def _pool(self, scheme, netloc):
+        with self._lock:
+            key = (scheme, netloc)
+            if key not in self._pools:
+                self._pools[key] = queue.LifoQueue(maxsize=self.pool_size)
+            return self._pools[key]
+
+    def _connect(self, scheme, netloc):
+        connection_class = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        return connection_class(netloc, timeout=self.timeout)
+
+    def _checkout(self, scheme, netloc):
+        try:
+            return self._pool(scheme, netloc).get_nowait()
+        except queue.Empty:
+            return self._connect(scheme, netloc)
+
+    def _checkin(self, scheme, netloc, conn):
+        try:
+            self._pool(scheme, netloc).put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def take_retries(self):
+        """Connection retries made by this thread since the last call"""
+        retries = getattr(self._local, 'retries', 0)
+        self._local.retries = 0
+        return retries
+
+    def replace_cookies(self, cookies):
+        """Switch every connection over to a renewed cookie jar"""
+        with self._lock:
+            self.cookies = dict(cookies)
+
+    def close(self):
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            while not pool.empty():
+                pool.get_nowait().close()
+
+    # -- requests ----------------------------------------------------------
+
+    def _headers(self):
+        with self._lock:
+            cookie = '; '.join(f"{name}={value}" for name, value in self.cookies.items())
+        headers = {
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'User-Agent': 'LMP/1.0',
+        }
+        if cookie:
+            headers['Cookie'] = cookie
+        return headers
+
+    def _store_cookies(self, response):
+        for header in response.headers.get_all('Set-Cookie') or []:
+            jar = SimpleCookie()
+            jar.load(header)
+            with self._lock:
+                for name, morsel in jar.items():
+                    self.cookies[name] = morsel.value
+
+    def _open(self, url):
+        """Send a GET and return (connection, response) with the body still unread"""
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        # A pooled connection may have been dropped by the server; retry once on a fresh one
+        for attempt in range(2):
+            conn = self._checkout(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', path, headers=self._headers())
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                    ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if attempt:
+                    raise
+                self._local.retries = getattr(self._local, 'retries', 0) + 1
+
+    def _release(self, url, conn, response):
+        """Hand a fully read connection back to the pool"""
+        parts = urlsplit(url)
+        if response.will_close or not response.isclosed():
+            conn.close()
+        else:
+            self._checkin(parts.scheme, parts.netloc, conn)
+
+    def _follow(self, url, max_redirects):
+        """Open ``url``, following redirects, and return (url, connection, response) for the 200 page"""
+        for _ in range(max_redirects + 1):
+            conn, response = self._open(url)
+            self._store_cookies(response)
+            if response.status == 200:
+                return url, conn, response
+
+            response.read()
+            self._release(url, conn, response)
+            if response.status in (301, 302, 303, 307, 308):
+                url = urljoin(url, response.getheader('Location', ''))
+                if 'login' in url.lower():
+                    raise MaintenixLoginRequired(f"Redirected to login page: {url}")
+                continue
+            if response.status in (401, 403):
+                raise MaintenixLoginRequired(f"HTTP {response.status} for {url}")
+            raise http.client.HTTPException(f"HTTP {response.status} for {url}")
+        raise http.client.HTTPException(f"Too many redirects for {url}")
+
+    def stream(self, url, chunk_size=64 * 1024, max_redirects=5):
+        """
+        Yield the decoded page body in chunks of about ``chunk_size`` bytes,
+        so very large listings can be parsed while they download.
+        """
+        url, conn, response = self._follow(url, max_redirects)
+        encoding = (response.getheader('Content-Encoding') or '').lower()
+        if encoding == 'gzip':
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            decompressor = zlib.decompressobj()
+        else:
+            decompressor = None
+
+        first = True
+        try:
+            while True:
+                chunk = response.read(chunk_size)
+                if not chunk:
+                    break
+                if decompressor is not None:
+                    chunk = decompressor.decompress(chunk)
+                if first:
+                    if any(marker in chunk[:20000].lower() for marker in LOGIN_MARKERS):
+                        raise MaintenixLoginRequired(f"Login page served for {url}")
+                    first = False
+                yield chunk
+            if decompressor is not None:
+                tail = decompressor.flush()
+                if tail:
+                    yield tail
+        finally:
+            # Only a fully read response leaves the connection reusable
+            self._release(url, conn, response)
+
+    def probe(self, url, max_redirects=5):
+        """
+        Cheap login check: read only the first chunk of ``url`` and raise
+        MaintenixLoginRequired if it is (or redirects to) the login page.
+        """
+        for _ in self.stream(url, chunk_size=8 * 1024, max_redirects=max_redirects):
+            break
+
+    def get(self, url, max_redirects=5):
+        """Fetch ``url`` and return the decoded page body as bytes"""
+        return b''.join(self.stream(url, max_redirects=max_redirects))
+
+    def get_text(self, url):
+        return self.get(url).decode('utf-8', errors='replace')
+
+    # -- page helpers ------------------------------------------------------
+
+    def fetch_fleet_list(self, url=None):
+        """Aircraft listed on the ToDoList fleet tab"""
+        return parse_fleet_list(self.get_text(url or settings.MAINTENIX_TODO_LIST_URL))
+
+    def fetch_aircraft(self, aircraft):
+        """Open tasks and work packages for one aircraft"""
+        return parse_aircraft_page(self.get_text(aircraft.maintenix_url))
+
+    def iter_listing_rows(self, url):
+        """Stream ('tasks' | 'work_packages', row) pairs from a fleet-level listing"""
+        return iter_page_rows(self.stream(url))
+
+
+class CookieManager:
+    """
+    One validated Maintenix cookie jar shared by every scraper in the process.
+
+    Validity is checked with a single lightweight request (see probe()) and
+    cached for ``ttl`` seconds; every page that loads fine extends it. When
+    a worker is served the login page it calls renew() with the generation
+    of the jar it used: the first caller runs ``relogin`` (if any) while the
+    others wait on the lock and then share the jar it produced. Without a
+    relogin, a cookie file rewritten by the login script is picked up.
+    """
+
+    def __init__(self, cookie_file=None, probe_url=None, ttl=None, relogin=None, domain=MAINTENIX_DOMAIN):
+        self.cookie_file = cookie_file or settings.MAINTENIX_COOKIE_FILE
+        self.probe_url = probe_url or settings.MAINTENIX_TODO_LIST_URL
+        self.ttl = ttl if ttl is not None else settings.MAINTENIX_COOKIE_TTL_SECONDS
+        self.relogin = relogin
+        self.domain = domain
+        self.generation = 0
+        self.probes = 0
+        self._cookies = None
+        self._mtime = None
+        self._valid_until = 0
+        self._failed = False
+        self._lock = threading.RLock()
+
+    def _load(self):
+        """Read the cookie file again if it changed on disk"""
+        try:
+            mtime = os.stat(self.cookie_file).st_mtime_ns
+        except FileNotFoundError:
+            raise MaintenixLoginRequired(f"No cookie file at {self.cookie_file}, run the login script")
+        if self._cookies is not None and mtime == self._mtime:
+            return
+        self._cookies = read_cookie_file(self.cookie_file, self.domain)
+        self._mtime = mtime
+        self.generation += 1
+        self._valid_until = 0
+        self._failed = False
+
+    def jar(self):
+        """{name: value} of the current cookies"""
+        with self._lock:
+            return {cookie['name']: cookie['value'] for cookie in self._cookies or []}
+
+    def cookie_list(self):
+        """The current cookies as Selenium cookie dicts, for browser workers"""
+        with self._lock:
+            return [dict(cookie) for cookie in self._cookies or []]
+
+    def probe(self):
+        """One small GET of the probe page with the current jar; True if it is not a login page"""
+        self.probes += 1
+        client = MaintenixHttpClient(self.jar(), pool_size=1)
+        try:
+            client.probe(self.probe_url)
+            return True
+        except MaintenixLoginRequired:
+            return False
+        finally:
+            client.close()
+
+    def validate(self):
+        """(generation, jar) for a jar known to work, probing at most once per TTL"""
+        with self._lock:
+            self._load()
+            if time.monotonic() < self._valid_until:
+                return self.generation, self.jar()
+            if self._failed:
+                raise self._expired()
+            if self.probe():
+                self._valid_until = time.monotonic() + self.ttl
+                return self.generation, self.jar()
+            return self._renew()
+
+    def mark_valid(self, generation):
+        """A page just loaded with this jar, so trust it for another TTL"""
+        with self._lock:
+            if generation == self.generation:
+                self._valid_until = time.monotonic() + self.ttl
+
+    def renew(self, generation):
+        """
+        Get a working jar after the login page was served for ``generation``.
+        Returns (generation, jar) or raises MaintenixLoginRequired.
+        """
+        with self._lock:
+            self._load()
+            if self._failed:
+                raise self._expired()
+            if generation != self.generation:
+                # Another worker (or the login script) already renewed it
+                return self.generation, self.jar()
+            return self._renew()
+
+    def _renew(self):
+        self._valid_until = 0
+        if self.relogin is not None:
+            self.relogin(self.cookie_file)
+            self._mtime = None
+            self._load()
+            if self.probe():
+                self._valid_until = time.monotonic() + self.ttl
+                return self.generation, self.jar()
+        # Remember the failure so other workers don't probe the same dead jar
+        self._failed = True
+        raise self._expired()
+
+    def _expired(self):
+        return MaintenixLoginRequired(f"Maintenix cookies in {self.cookie_file} have expired, run the login script")
+
+
+_cookie_managers = {}
+_cookie_managers_lock = threading.Lock()
+
+
+def shared_cookie_manager(cookie_file=None, relogin=None):
+    """The process-wide CookieManager for ``cookie_file``"""
+    path = os.path.abspath(cookie_file or settings.MAINTENIX_COOKIE_FILE)
+    with _cookie_managers_lock:
+        manager = _cookie_managers.get(path)
+        if manager is None:
+            manager = _cookie_managers[path] = CookieManager(path)
+        if relogin is not None:
+            manager.relogin = relogin
+        return manager
@@ -0,0 +1,11 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+
+
+def resolve_user(email=None):
+    """Scraping sessions need an owner: the given user or the first superuser"""
+    users = get_user_model().objects.all()
+    user = users.filter(email=email).first() if email else users.filter(is_superuser=True).order_by('pk').first()
+    if user is None:
+        raise CommandError(f"No user found for {email}" if email else "Create a superuser or pass --user")
+    return user
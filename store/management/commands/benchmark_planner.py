@@ -0,0 +1,100 @@
+import random
+import time
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from store.ground_windows import rebuild_ground_windows
+from store.models import Aircraft, AircraftFlightSchedule, AircraftManufacturer, AircraftModelGroup, OpenTask
+from store.planner import PRIORITY_RANK, plan_line_maintenance, schedule_ground_times
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the line maintenance planner on a synthetic fleet, schedule and task list, "
+        "written to the database and rolled back afterwards"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--aircraft', type=int, default=150)
+        parser.add_argument('--days', type=int, default=30)
+        parser.add_argument('--tasks', type=int, default=20000)
+        parser.add_argument('--turns-per-day', type=int, default=4, help="Ground stops per aircraft per day")
+        parser.add_argument('--station-capacity', type=int, help="Tasks per station per day")
+        parser.add_argument('--window-capacity', type=int, help="Tasks per ground window")
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        # Everything is written inside one transaction that is rolled back,
+        # so the planner reads real tables without leaving the data behind
+        with transaction.atomic():
+            self.run(options)
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        rng = random.Random(options['seed'])
+        first_day = timezone.localdate()
+        last_day = first_day + timedelta(days=options['days'] - 1)
+        range_start = timezone.make_aware(datetime.combine(first_day, datetime.min.time()))
+
+        manufacturer, _ = AircraftManufacturer.objects.get_or_create(name='Benchmark')
+        model_group, _ = AircraftModelGroup.objects.get_or_create(
+            name='BENCHMARK', defaults={'full_name': 'Benchmark', 'manufacturer': manufacturer, 'category': 'PASSENGER'},
+        )
+        Aircraft.objects.bulk_create([
+            Aircraft(model_group=model_group, tail_number=f"BM-{number:04d}", registration=f"BM-{number:04d}",
+                     maintenix_inventory_id=f"benchmark:{number}")
+            for number in range(options['aircraft'])
+        ], batch_size=BATCH_SIZE)
+        fleet = list(Aircraft.objects.filter(model_group=model_group))
+
+        flights = []
+        for plane in fleet:
+            for day in range(options['days']):
+                for turn in range(options['turns_per_day']):
+                    arrives = timezone.localtime(range_start + timedelta(
+                        days=day, hours=24 * turn / options['turns_per_day'], minutes=rng.randint(0, 60),
+                    ))
+                    departs = timezone.localtime(arrives + timedelta(minutes=rng.randint(30, 300)))
+                    flights.append(AircraftFlightSchedule(
+                        flight_date=arrives.date(), previous_tail_scheduled=plane.tail_number,
+                        scheduled_arrival_time=arrives.time(), current_tail_scheduled=plane.tail_number,
+                        current_flight_number=f"BM{turn}", flight_destination='NBO',
+                        scheduled_departure_time=departs.time(),
+                    ))
+        AircraftFlightSchedule.objects.bulk_create(flights, batch_size=BATCH_SIZE)
+
+        priorities = list(PRIORITY_RANK)
+        OpenTask.objects.bulk_create([
+            OpenTask(aircraft=rng.choice(fleet), task_id=f"BM{number:07d}", task_name='BENCHMARK', inventory='x',
+                     due_date=range_start + timedelta(hours=rng.uniform(-12, 24 * options['days'] + 48)),
+                     task_priority=rng.choice(priorities))
+            for number in range(options['tasks'])
+        ], batch_size=BATCH_SIZE)
+
+        started = time.perf_counter()
+        rebuild_ground_windows({flight.flight_date for flight in flights})
+        indexed = time.perf_counter()
+        ground_times = schedule_ground_times(first_day, last_day)
+        loaded = time.perf_counter()
+        capacity = {settings.LINE_STATION: options['station_capacity']} if options['station_capacity'] else {}
+        plan = plan_line_maintenance(first_day, last_day, aircraft_ids=[plane.pk for plane in fleet],
+                                     station_capacity=capacity, window_capacity=options['window_capacity'])
+        finished = time.perf_counter()
+
+        reasons = {}
+        for reason in plan['unplaceable'].values():
+            reasons[reason] = reasons.get(reason, 0) + 1
+        self.stdout.write(
+            f"{options['aircraft']} aircraft x {options['days']} days: "
+            f"{sum(len(windows) for windows in ground_times.values())} ground windows, {options['tasks']} tasks"
+        )
+        self.stdout.write(f"indexing windows  {indexed - started:.3f}s")
+        self.stdout.write(f"loading windows   {loaded - indexed:.3f}s")
+        self.stdout.write(f"planning          {finished - loaded:.3f}s (loads windows and tasks, then assigns)")
+        self.stdout.write(f"{len(plan['assignments'])} placed, {len(plan['unplaceable'])} unplaceable {reasons or ''}")
@@ -0,0 +1,45 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.exports import DATASETS, EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export, parse_bound
+
+
+class Command(BaseCommand):
+    help = "Export open tasks, work packages or the flight schedule as CSV, JSON Lines or Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', help="File to write (default: standard output)")
+        parser.add_argument('--tail', action='append', dest='tails', help="Only this tail (repeatable)")
+        parser.add_argument('--model-group', action='append', dest='model_groups',
+                            help="Only this model group (repeatable)")
+        parser.add_argument('--from', dest='date_from', help="Earliest due/start/flight date, e.g. 2026-10-16")
+        parser.add_argument('--to', dest='date_to', help="Latest due/start/flight date (a date includes the whole day)")
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            chunks = export(
+                options['dataset'], options['format'],
+                aircraft=options['tails'],
+                model_groups=options['model_groups'],
+                date_from=parse_bound(options['date_from'], 'from') if options['date_from'] else None,
+                date_to=parse_bound(options['date_to'], 'to') if options['date_to'] else None,
+                chunk_size=options['chunk_size'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        size = 0
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+        if options['output']:
+            self.stdout.write(f"{options['output']}: {size} bytes")
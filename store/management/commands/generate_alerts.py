@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from store.alerts import generate_alerts
+from store.models import Aircraft
+
+
+class Command(BaseCommand):
+    help = "Raise alerts for overdue/critical tasks and overdue work packages and resolve cleared ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tail', action='append', dest='tails', help="Only this tail (repeatable)")
+
+    def handle(self, *args, **options):
+        aircraft_ids = None
+        if options['tails']:
+            aircraft_ids = list(Aircraft.objects.filter(tail_number__in=options['tails']).values_list('pk', flat=True))
+        counts = generate_alerts(aircraft_ids)
+        self.stdout.write(f"{counts['created']} alerts raised, {counts['resolved']} resolved")
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.schedule_import import BATCH_SIZE, SCHEDULE_FORMATS, import_schedule_file, parse_schedule_date
+
+
+class Command(BaseCommand):
+    help = "Bulk import flight schedule files (CSV or the fixed-width PFLT/FROM/STA/... report)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('files', nargs='+', help="Schedule file(s)")
+        parser.add_argument('--date', help="Flight date for files without a DATE column, e.g. 2026-10-16")
+        parser.add_argument('--format', choices=SCHEDULE_FORMATS, default='auto')
+        parser.add_argument('--replace', action='store_true',
+                            help="Delete existing flights for the imported dates first")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        flight_date = options['date']
+        if flight_date and parse_schedule_date(flight_date) is None:
+            raise CommandError(f"Could not read date {flight_date!r}")
+
+        for path in options['files']:
+            try:
+                totals = import_schedule_file(
+                    path, flight_date, file_format=options['format'],
+                    batch_size=options['batch_size'], replace=options['replace'],
+                )
+            except (OSError, ValueError) as e:
+                raise CommandError(f"{path}: {e}")
+
+            self.stdout.write(
+                f"{path}: {totals['flights']} flights, {totals['linked']} linked to aircraft, "
+                f"{totals['skipped']} rows skipped"
+            )
+            if totals['unknown_tails']:
+                self.stdout.write(self.style.WARNING(f"Unknown tails: {', '.join(totals['unknown_tails'])}"))
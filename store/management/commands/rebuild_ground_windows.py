@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.ground_windows import rebuild_ground_windows
+from store.models import AircraftFlightSchedule
+from store.schedule_import import parse_schedule_date
+
+
+class Command(BaseCommand):
+    help = "Re-derive the ground-window index from the flight schedule"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="First schedule date to rebuild (default: the whole schedule)")
+        parser.add_argument('--days', type=int, default=1, help="Number of dates from --date")
+
+    def handle(self, *args, **options):
+        if options['date']:
+            first = parse_schedule_date(options['date'])
+            if first is None:
+                raise CommandError(f"Could not read date {options['date']!r}")
+            dates = [first + timedelta(days=day) for day in range(options['days'])]
+        else:
+            dates = AircraftFlightSchedule.objects.order_by().values_list('flight_date', flat=True).distinct()
+        written = rebuild_ground_windows(set(dates))
+        self.stdout.write(f"{written} ground windows written")
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from store.ingest import INGEST_MODES
+from store.models import AircraftScrapingSession
+from store.page_cache import replay_session
+from store.scraper_pool import new_session_id
+from store.signals import send_session_completed
+
+from ._helpers import resolve_user
+
+
+class Command(BaseCommand):
+    help = "Re-parse (and optionally re-ingest) the cached pages of a past scraping session"
+
+    def add_arguments(self, parser):
+        parser.add_argument('session_id', help="Session to replay; child sessions are included")
+        parser.add_argument('--parse-only', action='store_true', help="Benchmark the parser without writing")
+        parser.add_argument('--repeat', type=int, default=1, help="Parse the pages this many times (with --parse-only)")
+        parser.add_argument('--mode', choices=INGEST_MODES, default='sync')
+        parser.add_argument('--user', help="Email of the user the replay session is recorded for")
+
+    def handle(self, *args, **options):
+        try:
+            session = AircraftScrapingSession.objects.get(session_id=options['session_id'])
+        except AircraftScrapingSession.DoesNotExist:
+            raise CommandError(f"No scraping session {options['session_id']}")
+
+        if options['parse_only']:
+            for run in range(1, max(1, options['repeat']) + 1):
+                totals = replay_session(session, parse_only=True)
+                self.report(f"run {run}", totals)
+            return
+
+        replay = AircraftScrapingSession.objects.create(
+            session_id=new_session_id('replay'),
+            user=resolve_user(options['user']),
+            status='IN_PROGRESS',
+        )
+        totals = replay_session(session, replay, mode=options['mode'])
+        replay.status = 'COMPLETED'
+        replay.completed_at = timezone.now()
+        replay.save(update_fields=['status', 'completed_at'])
+        send_session_completed(replay)
+        self.report(replay.session_id, totals)
+
+    def report(self, label, totals):
+        pages = totals['pages']
+        per_page = totals['parse_seconds'] / pages * 1000 if pages else 0
+        self.stdout.write(
+            f"{label}: {pages} pages, {totals['tasks']} tasks, {totals['work_packages']} work packages, "
+            f"parsed in {totals['parse_seconds']:.3f}s ({per_page:.1f} ms/page)"
+        )
+        if totals['missing']:
+            self.stdout.write(self.style.WARNING(f"{totals['missing']} pages were evicted from the cache"))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.maintenix_http import MaintenixLoginRequired
+from store.scheduler import ScrapeScheduler
+from store.scraper_pool import ENGINES
+
+from ._helpers import resolve_user
+
+
+class Command(BaseCommand):
+    help = "Keep Maintenix data fresh by scraping each aircraft when its refresh falls due"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-in-flight', type=int, help="Most scrapes to run at once")
+        parser.add_argument('--model-group', help="Only schedule this model group (e.g. B737_MAX)")
+        parser.add_argument('--tail', action='append', dest='tails', help="Only schedule this tail (repeatable)")
+        parser.add_argument('--user', help="Email of the user the sessions are recorded for")
+        parser.add_argument('--engine', choices=ENGINES, default='http')
+        parser.add_argument('--once', action='store_true', help="Scrape the aircraft that are due now and exit")
+
+    def handle(self, *args, **options):
+        scheduler = ScrapeScheduler(
+            resolve_user(options['user']),
+            max_in_flight=options['max_in_flight'],
+            engine=options['engine'],
+            model_group=options['model_group'],
+            tail_numbers=options['tails'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(f"Scheduler started with {scheduler.max_in_flight} scrapes in flight, Ctrl+C to stop")
+        try:
+            session = scheduler.run(once=options['once'])
+        except MaintenixLoginRequired as e:
+            raise CommandError(str(e))
+        except KeyboardInterrupt:
+            # run() has already waited for the scrapes in flight and closed the session
+            self.stdout.write("Scheduler stopped")
+            return
+
+        self.stdout.write(
+            f"{session.session_id}: {session.get_status_display()} - "
+            f"{session.tasks_scraped} tasks, {session.work_packages_scraped} work packages, "
+            f"{session.errors_encountered} errors"
+        )
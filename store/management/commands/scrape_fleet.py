@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.maintenix_http import MaintenixLoginRequired, shared_cookie_manager
+from store.scraper_pool import ENGINES, ScraperPool, fleet_queryset
+
+from ._helpers import resolve_user
+
+
+class Command(BaseCommand):
+    help = "Scrape open tasks and work packages for the fleet with a pool of parallel scrapers"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, help="Number of browsers to run at once")
+        parser.add_argument('--model-group', help="Only scrape this model group (e.g. B737_MAX)")
+        parser.add_argument('--tail', action='append', dest='tails', help="Only scrape this tail (repeatable)")
+        parser.add_argument('--user', help="Email of the user the session is recorded for")
+        parser.add_argument('--engine', choices=ENGINES, default='browser',
+                            help="'browser' drives headless Chrome, 'http' reuses the saved cookies without a browser")
+        parser.add_argument('--show-browser', action='store_true', help="Run the browsers with a window")
+        parser.add_argument('--interactive-login', action='store_true',
+                            help="If the cookies have expired, open one browser window to log in again")
+
+    def handle(self, *args, **options):
+        user = resolve_user(options['user'])
+        aircraft = fleet_queryset(options['model_group'], options['tails'])
+        if not aircraft.exists():
+            raise CommandError("No active aircraft with a Maintenix URL matched")
+
+        cookie_manager = None
+        if options['interactive_login']:
+            from store.scrape import browser_login
+            cookie_manager = shared_cookie_manager(relogin=browser_login)
+
+        pool = ScraperPool(user, workers=options['workers'], headless=not options['show_browser'],
+                           engine=options['engine'], cookie_manager=cookie_manager)
+        try:
+            session = pool.run(aircraft)
+        except MaintenixLoginRequired as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f"{session.session_id}: {session.get_status_display()} - "
+            f"{session.tasks_scraped} tasks, {session.work_packages_scraped} work packages, "
+            f"{session.errors_encountered} errors in {session.duration}"
+        )
+        self.stdout.write(
+            f"  {session.rows_inserted} inserted, {session.rows_updated} updated, "
+            f"{session.rows_unchanged} unchanged, {session.rows_closed} closed"
+        )
+        if session.error_message:
+            self.stdout.write(self.style.WARNING(session.error_message))
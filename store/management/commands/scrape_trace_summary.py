@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from store.models import AircraftScrapingSession
+from store.tracing import PHASES, SPAN_LEVELS, summarize_traces
+
+
+class Command(BaseCommand):
+    help = "Print p50/p95 per scraping phase across recent sessions' timing traces"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=10, help="Number of recent sweeps/scheduler runs")
+        parser.add_argument('--days', type=int, help="Only sessions started in the last N days")
+        parser.add_argument('--session', action='append', dest='session_ids', help="Summarise this session (repeatable)")
+
+    def handle(self, *args, **options):
+        sessions = AircraftScrapingSession.objects.filter(parent_session__isnull=True).exclude(log_file_path='')
+        if options['session_ids']:
+            sessions = sessions.filter(session_id__in=options['session_ids'])
+        if options['days']:
+            sessions = sessions.filter(started_at__gte=timezone.now() - timedelta(days=options['days']))
+        paths = list(sessions.order_by('-started_at').values_list('log_file_path', flat=True)[:options['sessions']])
+        if not paths:
+            raise CommandError("No traced scraping sessions found")
+
+        summary = summarize_traces(paths)
+        totals = summary.pop('_aircraft')
+        self.stdout.write(
+            f"{len(paths)} sessions, {totals['scrapes']} aircraft scrapes "
+            f"({totals['failed']} failed, {totals['retries']} retries, {totals['rows']} rows)"
+        )
+        self.stdout.write(
+            f"{'level':<10}{'phase':<14}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'total s':>10}"
+        )
+        for level in SPAN_LEVELS:
+            phases = summary.get(level, {})
+            for phase in PHASES + sorted(set(phases) - set(PHASES)):
+                stats = phases.get(phase)
+                if stats is None:
+                    continue
+                self.stdout.write(
+                    f"{level:<10}{phase:<14}{stats['count']:>7}{stats['p50'] * 1000:>10.1f}"
+                    f"{stats['p95'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}{stats['total']:>10.2f}"
+                )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from store.schedule_import import parse_schedule_date
+from store.snapshots import SNAPSHOT_DATASETS, write_snapshot
+
+
+class Command(BaseCommand):
+    help = "Write today's Parquet snapshot of the open tasks and work packages (run daily, e.g. from cron)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Snapshot date to write under (default: today)")
+        parser.add_argument('--dataset', action='append', dest='names', choices=SNAPSHOT_DATASETS,
+                            help="Only this dataset (repeatable)")
+
+    def handle(self, *args, **options):
+        snapshot_date = None
+        if options['date']:
+            snapshot_date = parse_schedule_date(options['date'])
+            if snapshot_date is None:
+                raise CommandError(f"Could not read date {options['date']!r}")
+        try:
+            counts = write_snapshot(snapshot_date, options['names'] or SNAPSHOT_DATASETS)
+        except ValueError as e:
+            raise CommandError(str(e))
+        for name, count in counts.items():
+            self.stdout.write(f"{name}: {count} rows")
@@ -0,0 +1,58 @@
+from itertools import chain
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from store.ingest import BATCH_SIZE, INGEST_MODES, ingest_stream
+from store.maintenix_http import MaintenixHttpClient, MaintenixLoginRequired, shared_cookie_manager
+from store.models import AircraftScrapingSession
+from store.scraper_pool import new_session_id
+from store.signals import send_session_completed
+
+from ._helpers import resolve_user
+
+
+class Command(BaseCommand):
+    help = "Stream fleet-level Maintenix task/work package listings into the database in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help="Maintenix listing page URL(s)")
+        parser.add_argument('--mode', choices=INGEST_MODES, default='sync')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument('--user', help="Email of the user the session is recorded for")
+
+    def handle(self, *args, **options):
+        try:
+            _, cookies = shared_cookie_manager().validate()
+        except MaintenixLoginRequired as e:
+            raise CommandError(str(e))
+
+        session = AircraftScrapingSession.objects.create(
+            session_id=new_session_id('listing'),
+            user=resolve_user(options['user']),
+            status='IN_PROGRESS',
+        )
+        client = MaintenixHttpClient(cookies)
+        try:
+            # One stream for every URL, so sync mode closes rows missing from all of them
+            totals = ingest_stream(
+                chain.from_iterable(client.iter_listing_rows(url) for url in options['urls']), session,
+                batch_size=options['batch_size'], mode=options['mode'],
+            )
+            self.stdout.write(f"{', '.join(options['urls'])}: {totals}")
+        except MaintenixLoginRequired as e:
+            session.status = 'FAILED'
+            session.error_message = str(e)
+            raise CommandError(f"{e}. Run the login script to refresh cookies.pkl")
+        else:
+            session.status = 'COMPLETED'
+            send_session_completed(session)
+        finally:
+            client.close()
+            session.completed_at = timezone.now()
+            session.save(update_fields=['status', 'error_message', 'completed_at'])
+
+        self.stdout.write(
+            f"{session.session_id}: {session.tasks_scraped} tasks, "
+            f"{session.work_packages_scraped} work packages"
+        )
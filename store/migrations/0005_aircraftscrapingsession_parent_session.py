@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0004_aircraftflightschedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aircraftscrapingsession',
+            name='parent_session',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='child_sessions', to='store.aircraftscrapingsession'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_aircraftscrapingsession_parent_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aircraftscrapingsession',
+            name='rows_closed',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aircraftscrapingsession',
+            name='rows_inserted',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aircraftscrapingsession',
+            name='rows_unchanged',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='aircraftscrapingsession',
+            name='rows_updated',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='opentask',
+            name='row_fingerprint',
+            field=models.CharField(blank=True, help_text='Hash of the scraped fields, used to skip unchanged rows', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='openworkpackage',
+            name='row_fingerprint',
+            field=models.CharField(blank=True, help_text='Hash of the scraped fields, used to skip unchanged rows', max_length=40),
+        ),
+    ]
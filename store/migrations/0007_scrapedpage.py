@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0006_row_fingerprint_and_sync_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScrapedPage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('page_type', models.CharField(choices=[('AIRCRAFT', 'Aircraft Open Items'), ('FLEET_LIST', 'Fleet List')], default='AIRCRAFT', max_length=20)),
+                ('url', models.TextField(blank=True)),
+                ('content_hash', models.CharField(db_index=True, max_length=64)),
+                ('size', models.IntegerField(default=0)),
+                ('fetched_at', models.DateTimeField(auto_now_add=True)),
+                ('ingested', models.BooleanField(default=False)),
+                ('unchanged', models.BooleanField(default=False)),
+                ('aircraft', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='scraped_pages', to='store.aircraft')),
+                ('session', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pages', to='store.aircraftscrapingsession')),
+            ],
+            options={
+                'ordering': ['-fetched_at'],
+                'indexes': [models.Index(fields=['aircraft', 'page_type', 'ingested'], name='store_scrap_aircraf_68c9ec_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0007_scrapedpage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AircraftDashboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_open_tasks', models.IntegerField(default=0)),
+                ('overdue_tasks', models.IntegerField(default=0)),
+                ('critical_tasks', models.IntegerField(default=0)),
+                ('total_open_work_packages', models.IntegerField(default=0)),
+                ('overdue_work_packages', models.IntegerField(default=0)),
+                ('active_alerts', models.IntegerField(default=0)),
+                ('next_task_due_date', models.DateTimeField(blank=True, null=True)),
+                ('next_work_package_start', models.DateTimeField(blank=True, null=True)),
+                ('calculated_at', models.DateTimeField(auto_now=True)),
+                ('aircraft', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='dashboard_stats', to='store.aircraft')),
+            ],
+            options={
+                'verbose_name': 'Aircraft Dashboard Statistics',
+                'verbose_name_plural': 'Aircraft Dashboard Statistics',
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0008_aircraftdashboardstats'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='opentask',
+            index=models.Index(fields=['due_date', 'id'], name='store_opent_due_dat_764487_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='opentask',
+            index=models.Index(fields=['aircraft', 'due_date', 'id'], name='store_opent_aircraf_1ffc9e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='opentask',
+            index=models.Index(fields=['task_priority', 'due_date', 'id'], name='store_opent_task_pr_f117a7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='opentask',
+            index=models.Index(fields=['work_type', 'due_date', 'id'], name='store_opent_work_ty_35dbbf_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='opentask',
+            index=models.Index(fields=['etops_significant', 'due_date', 'id'], name='store_opent_etops_s_abca88_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='opentask',
+            index=models.Index(fields=['soft_deadline', 'due_date', 'id'], name='store_opent_soft_de_b150cc_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+# External-content FTS5 tables over the task and work package names. The
+# triggers keep them in sync with every insert, update and delete, including
+# the bulk_create/bulk_update batches of ingestion, and only re-index a row
+# when one of its indexed names actually changed.
+FTS_TABLES = [
+    ('store_opentask_fts', 'store_opentask', ['task_name', 'driving_task_name', 'work_package_name']),
+    ('store_openworkpackage_fts', 'store_openworkpackage', ['work_package_name', 'work_package_number']),
+]
+
+
+def fts_sql(fts_table, table, columns):
+    names = ', '.join(columns)
+    new_values = ', '.join(f"new.{column}" for column in columns)
+    old_values = ', '.join(f"old.{column}" for column in columns)
+    changed = ' OR '.join(f"old.{column} IS NOT new.{column}" for column in columns)
+    return [
+        f"CREATE VIRTUAL TABLE {fts_table} USING fts5("
+        f"{names}, content='{table}', content_rowid='id', tokenize='unicode61', prefix='2 3')",
+        f"CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) VALUES ('delete', old.id, {old_values}); END",
+        f"CREATE TRIGGER {fts_table}_au AFTER UPDATE OF {names} ON {table} WHEN {changed} BEGIN "
+        f"INSERT INTO {fts_table}({fts_table}, rowid, {names}) VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {fts_table}(rowid, {names}) VALUES (new.id, {new_values}); END",
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts_table, table, columns in FTS_TABLES:
+        for statement in fts_sql(fts_table, table, columns):
+            schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for fts_table, _, _ in FTS_TABLES:
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f"DROP TRIGGER IF EXISTS {fts_table}_{suffix}")
+        schema_editor.execute(f"DROP TABLE IF EXISTS {fts_table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0009_opentask_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
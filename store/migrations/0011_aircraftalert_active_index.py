@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0010_fts5_search_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aircraftalert',
+            index=models.Index(fields=['is_active', 'alert_type'], name='store_aircr_is_acti_bf73bc_idx'),
+        ),
+    ]
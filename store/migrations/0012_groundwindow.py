@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:11
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0011_aircraftalert_active_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroundWindow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('flight_date', models.DateField()),
+                ('tail_number', models.CharField(max_length=20)),
+                ('station', models.CharField(max_length=3)),
+                ('start_at', models.DateTimeField()),
+                ('end_at', models.DateTimeField()),
+                ('duration_minutes', models.IntegerField()),
+                ('arrival_flight', models.CharField(blank=True, max_length=10)),
+                ('departure_flight', models.CharField(blank=True, max_length=10)),
+                ('open_ended', models.BooleanField(default=False, help_text='No departure scheduled yet; ends with the imported schedule')),
+                ('aircraft', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ground_windows', to='store.aircraft')),
+            ],
+            options={
+                'ordering': ['start_at'],
+                'indexes': [models.Index(fields=['station', 'start_at'], name='store_groun_station_a015b6_idx'), models.Index(fields=['station', 'duration_minutes'], name='store_groun_station_49085e_idx'), models.Index(fields=['aircraft', 'start_at'], name='store_groun_aircraf_a267b2_idx'), models.Index(fields=['flight_date'], name='store_groun_flight__5a2841_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0012_groundwindow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aircraftflightschedule',
+            name='is_tail_swap',
+            field=models.BooleanField(default=False, help_text='PTAIL arrived but a different TAIL departs'),
+        ),
+        migrations.AddField(
+            model_name='aircraftflightschedule',
+            name='previous_rotation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='next_rotations', to='store.aircraftflightschedule'),
+        ),
+        migrations.AddField(
+            model_name='aircraftflightschedule',
+            name='rotation_sequence',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='aircraftflightschedule',
+            index=models.Index(fields=['aircraft', 'flight_date', 'rotation_sequence'], name='store_aircr_aircraf_1d6286_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0013_flight_rotation_chain'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='opentask',
+            index=models.Index(fields=['aircraft', 'work_package_id', 'task_id'], name='store_opent_aircraf_3f737a_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-16 23:34
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0014_opentask_work_package_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_type', models.CharField(choices=[('TASK', 'Task'), ('WORK_PACKAGE', 'Work Package')], max_length=12)),
+                ('object_id', models.BigIntegerField()),
+                ('field', models.CharField(max_length=30)),
+                ('old_value', models.CharField(blank=True, max_length=40)),
+                ('new_value', models.CharField(blank=True, max_length=40)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('aircraft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_changes', to='store.aircraft')),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='status_changes', to='store.aircraftscrapingsession')),
+            ],
+            options={
+                'ordering': ['changed_at', 'id'],
+                'indexes': [models.Index(fields=['object_type', 'object_id', 'changed_at'], name='store_statu_object__d26e4f_idx'), models.Index(fields=['object_type', 'field', 'new_value', 'changed_at'], name='store_statu_object__983afb_idx')],
+            },
+        ),
+    ]
@@ -405,13 +405,21 @@ class Aircraft(models.Model):
     #         return self.next_check_due < timezone.now().date()
     #     return False
     
+    # Both counts come from dashboard_stats when it exists (select_related it
+    # for lists), falling back to a COUNT for aircraft not refreshed yet
     @property
     def open_task_count(self):
-        return self.open_tasks.filter(status='OPEN').count()
+        stats = getattr(self, 'dashboard_stats', None)
+        if stats is not None:
+            return stats.total_open_tasks
+        return self.open_tasks.exclude(task_status__in=['COMPLETED', 'CANCELLED']).count()
     
     @property
     def open_work_package_count(self):
-        return self.work_packages.filter(status='OPEN').count()
+        stats = getattr(self, 'dashboard_stats', None)
+        if stats is not None:
+            return stats.total_open_work_packages
+        return self.work_packages.exclude(work_package_status__in=['COMPLETED', 'CANCELLED', 'CLOSED']).count()
 
 
 class AircraftScrapingSession(models.Model):
@@ -428,6 +436,9 @@ class AircraftScrapingSession(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     aircraft = models.ForeignKey(Aircraft, on_delete=models.CASCADE, null=True, blank=True)
     aircraft_model_group = models.ForeignKey(AircraftModelGroup, on_delete=models.CASCADE, null=True, blank=True)
+    # Fleet sweeps record one child session per aircraft under a parent session
+    parent_session = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True,
+                                       related_name='child_sessions')
     
     status = models.CharField(max_length=20, choices=SCRAPING_STATUS_CHOICES, default='PENDING')
     started_at = models.DateTimeField(auto_now_add=True)
@@ -438,6 +449,12 @@ class AircraftScrapingSession(models.Model):
     work_packages_scraped = models.IntegerField(default=0)
     errors_encountered = models.IntegerField(default=0)
     
+    # Incremental sync results (tasks and work packages combined)
+    rows_inserted = models.IntegerField(default=0)
+    rows_updated = models.IntegerField(default=0)
+    rows_unchanged = models.IntegerField(default=0)
+    rows_closed = models.IntegerField(default=0)
+    
     # Error tracking
     error_message = models.TextField(blank=True)
     log_file_path = models.CharField(max_length=500, blank=True)
@@ -455,6 +472,36 @@ class AircraftScrapingSession(models.Model):
         return None
 
 
+class ScrapedPage(models.Model):
+    """Raw Maintenix page fetched during a session, stored gzipped in the page cache by content hash"""
+    PAGE_TYPE_CHOICES = [
+        ('AIRCRAFT', 'Aircraft Open Items'),
+        ('FLEET_LIST', 'Fleet List'),
+    ]
+
+    session = models.ForeignKey(AircraftScrapingSession, on_delete=models.CASCADE, related_name='pages')
+    aircraft = models.ForeignKey(Aircraft, on_delete=models.CASCADE, null=True, blank=True,
+                                 related_name='scraped_pages')
+    page_type = models.CharField(max_length=20, choices=PAGE_TYPE_CHOICES, default='AIRCRAFT')
+    url = models.TextField(blank=True)
+    content_hash = models.CharField(max_length=64, db_index=True)  # SHA-256 of the page body
+    size = models.IntegerField(default=0)  # Uncompressed bytes
+    fetched_at = models.DateTimeField(auto_now_add=True)
+
+    # False when the page matched the last ingested one and parsing was skipped
+    ingested = models.BooleanField(default=False)
+    unchanged = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ['-fetched_at']
+        indexes = [
+            models.Index(fields=['aircraft', 'page_type', 'ingested']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_page_type_display()} {self.content_hash[:12]} ({self.session.session_id})"
+
+
 class OpenTask(models.Model):
     """Open Tasks from Maintenix system"""
     TASK_STATUS_CHOICES = [
@@ -519,6 +566,8 @@ class OpenTask(models.Model):
     scraped_session = models.ForeignKey(AircraftScrapingSession, on_delete=models.SET_NULL,
                                        null=True, blank=True, related_name='scraped_tasks')
     scraped_at = models.DateTimeField(auto_now_add=True)
+    row_fingerprint = models.CharField(max_length=40, blank=True,
+                                       help_text="Hash of the scraped fields, used to skip unchanged rows")
     
     # Additional Fields
     # created_in_maintenix = models.DateTimeField(null=True, blank=True)
@@ -540,6 +589,15 @@ class OpenTask(models.Model):
             models.Index(fields=['task_status']),
             models.Index(fields=['due_date']),
             models.Index(fields=['aircraft', 'task_status']),
+            # Keyset pagination of the task listing on (due_date, id), per filter
+            models.Index(fields=['due_date', 'id']),
+            models.Index(fields=['aircraft', 'due_date', 'id']),
+            models.Index(fields=['task_priority', 'due_date', 'id']),
+            models.Index(fields=['work_type', 'due_date', 'id']),
+            models.Index(fields=['etops_significant', 'due_date', 'id']),
+            models.Index(fields=['soft_deadline', 'due_date', 'id']),
+            # A work package's task card index, read in task id order
+            models.Index(fields=['aircraft', 'work_package_id', 'task_id']),
         ]
         unique_together = ['aircraft', 'task_id']
     
@@ -615,6 +673,8 @@ class OpenWorkPackage(models.Model):
     scraped_session = models.ForeignKey(AircraftScrapingSession, on_delete=models.SET_NULL,
                                        null=True, blank=True, related_name='scraped_work_packages')
     scraped_at = models.DateTimeField(auto_now_add=True)
+    row_fingerprint = models.CharField(max_length=40, blank=True,
+                                       help_text="Hash of the scraped fields, used to skip unchanged rows")
     
     # Additional Fields
     # created_in_maintenix = models.DateTimeField(null=True, blank=True)
@@ -669,7 +729,9 @@ class OpenWorkPackage(models.Model):
     
     @property
     def associated_tasks(self):
-        """Get tasks associated with this work package"""
+        """Get tasks associated with this work package (a list if filled in by queries.prefetch_associated_tasks)"""
+        if hasattr(self, '_associated_tasks'):
+            return self._associated_tasks
         return OpenTask.objects.filter(
             work_package_id=self.work_package_id,
             aircraft=self.aircraft
@@ -684,6 +746,40 @@ class OpenWorkPackage(models.Model):
         return self.aircraft.model_group.name
 
 
+class StatusChangeLog(models.Model):
+    """
+    One changed status or date of a task or work package, appended by
+    sync ingestion (see ingest.py) only when the scraped value differs from
+    the stored one. Values are stored as text, dates in UTC ISO format.
+    """
+    OBJECT_TYPE_CHOICES = [
+        ('TASK', 'Task'),
+        ('WORK_PACKAGE', 'Work Package'),
+    ]
+
+    object_type = models.CharField(max_length=12, choices=OBJECT_TYPE_CHOICES)
+    object_id = models.BigIntegerField()  # OpenTask/OpenWorkPackage pk
+    aircraft = models.ForeignKey(Aircraft, on_delete=models.CASCADE, related_name='status_changes')
+    field = models.CharField(max_length=30)
+    old_value = models.CharField(max_length=40, blank=True)  # Blank when the row was first seen
+    new_value = models.CharField(max_length=40, blank=True)
+    session = models.ForeignKey(AircraftScrapingSession, on_delete=models.SET_NULL, null=True, blank=True,
+                                related_name='status_changes')
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['changed_at', 'id']
+        indexes = [
+            # History of one object
+            models.Index(fields=['object_type', 'object_id', 'changed_at']),
+            # When objects entered a status, for cycle times
+            models.Index(fields=['object_type', 'field', 'new_value', 'changed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.object_type} {self.object_id} {self.field}: {self.old_value or '-'} -> {self.new_value or '-'}"
+
+
 class AircraftAlert(models.Model):
     """Alerts for aircraft maintenance events"""
     ALERT_TYPE_CHOICES = [
@@ -721,6 +817,10 @@ class AircraftAlert(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Active alerts by type, compared against the rules in alerts.py
+            models.Index(fields=['is_active', 'alert_type']),
+        ]
     
     def __str__(self):
         return f"{self.get_alert_type_display()} - {self.aircraft.tail_number}"
@@ -730,69 +830,36 @@ class AircraftAlert(models.Model):
         return (timezone.now() - self.created_at).days
 
 
-# class AircraftDashboardStats(models.Model):
-#     """Dashboard statistics for quick access"""
-#     aircraft = models.OneToOneField(Aircraft, on_delete=models.CASCADE, related_name='dashboard_stats')
-    
-#     # Counts
-#     total_open_tasks = models.IntegerField(default=0)
-#     overdue_tasks = models.IntegerField(default=0)
-#     critical_tasks = models.IntegerField(default=0)
-#     total_open_work_packages = models.IntegerField(default=0)
-#     overdue_work_packages = models.IntegerField(default=0)
-#     active_alerts = models.IntegerField(default=0)
-    
-    # # Dates
-    # next_task_due_date = models.DateTimeField(null=True, blank=True)
-    # next_work_package_start = models.DateTimeField(null=True, blank=True)
-    
-    # calculated_at = models.DateTimeField(auto_now=True)
-    
-    # class Meta:
-    #     verbose_name = "Aircraft Dashboard Statistics"
-    #     verbose_name_plural = "Aircraft Dashboard Statistics"
-    
-    # def __str__(self):
-    #     return f"Stats for {self.aircraft.tail_number}"
-    
-    # def update_stats(self):
-    #     """Update all statistics"""
-    #     self.total_open_tasks = self.aircraft.open_tasks.filter(task_status='OPEN').count()
-    #     self.overdue_tasks = self.aircraft.open_tasks.filter(
-    #         task_status='OPEN',
-    #         due_date__lt=timezone.now()
-        # ).count()
-        # self.critical_tasks = self.aircraft.open_tasks.filter(
-        #     task_status='OPEN',
-        #     task_priority='CRITICAL'
-        # ).count()
-        
-        # self.total_open_work_packages = self.aircraft.work_packages.filter(
-        #     work_package_status='OPEN'
-        # ).count()
-        # self.overdue_work_packages = self.aircraft.work_packages.filter(
-        #     work_package_status='OPEN',
-        #     end_date__lt=timezone.now()
-        # ).count()
-        
-        # self.active_alerts = self.aircraft.alerts.filter(is_active=True, acknowledged=False).count()
-        
-        # # Get next due dates
-        # next_task = self.aircraft.open_tasks.filter(
-        #     task_status='OPEN',
-        #     due_date__gte=timezone.now()
-        # ).order_by('due_date').first()
-        # if next_task:
-        #     self.next_task_due_date = next_task.due_date
-        
-        # next_wp = self.aircraft.work_packages.filter(
-        #     work_package_status='OPEN',
-        #     start_date__gte=timezone.now()
-        # ).order_by('start_date').first()
-        # if next_wp:
-        #     self.next_work_package_start = next_wp.start_date
-        
-        # self.save()
+class AircraftDashboardStats(models.Model):
+    """Dashboard statistics for quick access, refreshed in bulk after each scraping session (see stats.py)"""
+    aircraft = models.OneToOneField(Aircraft, on_delete=models.CASCADE, related_name='dashboard_stats')
+    
+    # Counts
+    total_open_tasks = models.IntegerField(default=0)
+    overdue_tasks = models.IntegerField(default=0)
+    critical_tasks = models.IntegerField(default=0)
+    total_open_work_packages = models.IntegerField(default=0)
+    overdue_work_packages = models.IntegerField(default=0)
+    active_alerts = models.IntegerField(default=0)
+    
+    # Dates
+    next_task_due_date = models.DateTimeField(null=True, blank=True)
+    next_work_package_start = models.DateTimeField(null=True, blank=True)
+    
+    calculated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Aircraft Dashboard Statistics"
+        verbose_name_plural = "Aircraft Dashboard Statistics"
+    
+    def __str__(self):
+        return f"Stats for {self.aircraft.tail_number}"
+    
+    def update_stats(self):
+        """Recalculate the statistics for this aircraft only"""
+        from .stats import refresh_dashboard_stats
+        refresh_dashboard_stats([self.aircraft_id])
+        self.refresh_from_db()
 
 
 # ============================================================================
@@ -883,6 +950,12 @@ class AircraftFlightSchedule(models.Model):
     # Scraping metadata (minimal)
     scraped_at = models.DateTimeField(auto_now_add=True)
     
+    # Rotation chain of TAIL on flight_date (see rotations.py)
+    rotation_sequence = models.PositiveIntegerField(null=True, blank=True)
+    previous_rotation = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True,
+                                          related_name='next_rotations')
+    is_tail_swap = models.BooleanField(default=False, help_text="PTAIL arrived but a different TAIL departs")
+    
     class Meta:
         ordering = ['flight_date', 'scheduled_departure_time']
         verbose_name = "Aircraft Flight Schedule"
@@ -891,6 +964,7 @@ class AircraftFlightSchedule(models.Model):
             models.Index(fields=['flight_date']),
             models.Index(fields=['current_tail_scheduled']),
             models.Index(fields=['current_flight_number']),
+            models.Index(fields=['aircraft', 'flight_date', 'rotation_sequence']),
         ]
     
     def __str__(self):
@@ -906,4 +980,38 @@ class AircraftFlightSchedule(models.Model):
             except:
                 pass  # Silently fail if aircraft not found
         
-        super().save(*args, **kwargs)
\ No newline at end of file
+        super().save(*args, **kwargs)
+
+
+class GroundWindow(models.Model):
+    """
+    Time an aircraft is on the ground at a station between an arrival and
+    its next departure, derived from AircraftFlightSchedule (see
+    ground_windows.py) and rebuilt whenever the schedule of a date changes.
+    """
+    flight_date = models.DateField()  # Schedule date of the arrival that opens the window
+    tail_number = models.CharField(max_length=20)
+    aircraft = models.ForeignKey(Aircraft, on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='ground_windows')
+    station = models.CharField(max_length=3)
+    start_at = models.DateTimeField()
+    end_at = models.DateTimeField()
+    duration_minutes = models.IntegerField()
+    arrival_flight = models.CharField(max_length=10, blank=True)
+    departure_flight = models.CharField(max_length=10, blank=True)
+    open_ended = models.BooleanField(default=False,
+                                     help_text="No departure scheduled yet; ends with the imported schedule")
+
+    class Meta:
+        ordering = ['start_at']
+        indexes = [
+            # Overlap lookups: a start_at range bounded by the longest window at the station
+            models.Index(fields=['station', 'start_at']),
+            models.Index(fields=['station', 'duration_minutes']),
+            models.Index(fields=['aircraft', 'start_at']),
+            models.Index(fields=['flight_date']),
+        ]
+
+    def __str__(self):
+        return f"{self.tail_number} at {self.station} {self.start_at:%Y-%m-%d %H:%M} - {self.end_at:%H:%M}"
+
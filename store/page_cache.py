@@ -0,0 +1,158 @@
+"""
+Content-addressed cache of raw Maintenix pages.
+
+Every fetched page is stored gzipped under its SHA-256 and recorded as a
+ScrapedPage for its session, aircraft and page type. When a fetch hashes
+the same as the last page we ingested for that aircraft, parsing and the
+database write are skipped. Past sessions can be replayed from the cache
+to re-ingest them or to benchmark the parser offline.
+
+Files are touched on every read and write, so eviction removes the least
+recently used pages first once the cache is over its disk budget, and
+anything older than the age limit.
+"""
+import gzip
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .ingest import ingest_aircraft
+from .models import ScrapedPage
+from .parsers import parse_aircraft_page
+
+
+def content_hash(body):
+    return hashlib.sha256(body).hexdigest()
+
+
+class PageCache:
+    """Gzipped pages on disk under ``root/ab/abcdef....html.gz``"""
+
+    def __init__(self, root=None, max_bytes=None, max_age_days=None):
+        self.root = root or settings.SCRAPE_PAGE_CACHE_DIR
+        self.max_bytes = max_bytes if max_bytes is not None else settings.SCRAPE_PAGE_CACHE_MAX_BYTES
+        self.max_age_days = max_age_days if max_age_days is not None else settings.SCRAPE_PAGE_CACHE_MAX_AGE_DAYS
+        self._written = 0
+        self._lock = threading.Lock()
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], f"{digest}.html.gz")
+
+    def put(self, body):
+        """Store ``body`` (bytes) unless already cached and return its hash"""
+        digest = content_hash(body)
+        path = self.path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so readers never see half a page
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as file:
+            file.write(gzip.compress(body, compresslevel=6))
+        os.replace(temp_path, path)
+
+        # Check the budget every time another tenth of it has been written
+        with self._lock:
+            self._written += os.path.getsize(path)
+            due = self._written > self.max_bytes // 10
+            if due:
+                self._written = 0
+        if due:
+            self.evict()
+        return digest
+
+    def get(self, digest):
+        """The cached page body, or None if it was never stored or has been evicted"""
+        path = self.path(digest)
+        try:
+            with open(path, 'rb') as file:
+                body = gzip.decompress(file.read())
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        return body
+
+    def __contains__(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def evict(self):
+        """Remove pages past the age limit, then least recently used ones until under budget"""
+        entries = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        oldest = time.time() - self.max_age_days * 86400
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for mtime, size, path in sorted(entries):
+            if mtime >= oldest and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+
+def last_ingested_hash(aircraft, page_type='AIRCRAFT'):
+    """Hash of the last page of this type we parsed and wrote for ``aircraft``"""
+    return ScrapedPage.objects.filter(
+        aircraft=aircraft, page_type=page_type, ingested=True,
+    ).order_by('-fetched_at', '-pk').values_list('content_hash', flat=True).first()
+
+
+def session_pages(session):
+    """Pages fetched in ``session`` and its child sessions, in fetch order"""
+    return ScrapedPage.objects.filter(
+        Q(session=session) | Q(session__parent_session=session)
+    ).select_related('aircraft__model_group').order_by('fetched_at', 'pk')
+
+
+def replay_session(session, replay_into=None, mode='sync', parse_only=False, cache=None):
+    """
+    Parse every cached page of ``session`` again and, unless ``parse_only``,
+    ingest it into ``replay_into`` (a new session). Each ingested page is
+    recorded against ``replay_into``, so the next sweep compares its fetch
+    with the replayed page and a newer page is parsed again.
+    Returns {'pages', 'missing', 'tasks', 'work_packages', 'parse_seconds'}.
+    """
+    if not parse_only and replay_into is None:
+        raise ValueError("Pass the session to replay into, or parse_only=True")
+    cache = cache or PageCache()
+    totals = {'pages': 0, 'missing': 0, 'tasks': 0, 'work_packages': 0, 'parse_seconds': 0.0}
+    for page in session_pages(session).filter(page_type='AIRCRAFT', aircraft__isnull=False):
+        body = cache.get(page.content_hash)
+        if body is None:
+            totals['missing'] += 1
+            continue
+
+        started = time.perf_counter()
+        rows = parse_aircraft_page(body.decode('utf-8', errors='replace'))
+        totals['parse_seconds'] += time.perf_counter() - started
+        totals['pages'] += 1
+        totals['tasks'] += len(rows['tasks'])
+        totals['work_packages'] += len(rows['work_packages'])
+        if not parse_only:
+            with transaction.atomic():
+                ingest_aircraft(page.aircraft, rows['tasks'], rows['work_packages'], replay_into, mode=mode)
+                ScrapedPage.objects.create(
+                    session=replay_into, aircraft=page.aircraft, page_type=page.page_type, url=page.url,
+                    content_hash=page.content_hash, size=page.size, ingested=True,
+                )
+    return totals
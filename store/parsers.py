@@ -0,0 +1,482 @@
+"""
+Parsers for the server-rendered Maintenix JSP pages.
+
+Maintenix renders its lists as plain HTML tables (nested inside layout
+tables). We walk the markup once with the standard library HTML parser,
+pick out every table that has a header row and turn its data rows into
+dicts keyed by the header text. The column maps below then translate
+those into OpenTask / OpenWorkPackage field values.
+
+Fleet-level listings can run to tens of thousands of rows, so the
+iter_* functions at the bottom work on a stream of chunks and yield rows
+as soon as they are complete instead of building the whole page first.
+"""
+import codecs
+import re
+from datetime import datetime
+from functools import lru_cache
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from django.utils import timezone
+
+
+# ============================================================================
+# COLUMN MAPS (normalised header text -> model field)
+# ============================================================================
+
+TASK_COLUMNS = {
+    'task name': 'task_name',
+    'task': 'task_name',
+    'task id': 'task_id',
+    'id': 'task_id',
+    'config position': 'config_position',
+    'config pos': 'config_position',
+    'must be removed': 'must_be_removed',
+    'due': 'due_date',
+    'due date': 'due_date',
+    'soft deadline': 'soft_deadline',
+    'inventory': 'inventory',
+    'status': 'task_status',
+    'task status': 'task_status',
+    'work type': 'work_type',
+    'originator': 'originator',
+    'task priority': 'task_priority',
+    'priority': 'task_priority',
+    'schedule priority': 'schedule_priority',
+    'driving task': 'driving_task_name',
+    'driving task name': 'driving_task_name',
+    'driving task id': 'driving_task_id',
+    'etops significant': 'etops_significant',
+    'etops': 'etops_significant',
+    'work package': 'work_package_name',
+    'work package name': 'work_package_name',
+    'work package id': 'work_package_id',
+    'wo': 'work_package_number',
+    'wo #': 'work_package_number',
+    'work order': 'work_package_number',
+    'work package no': 'work_package_number',
+}
+
+WORK_PACKAGE_COLUMNS = {
+    'work package': 'work_package_name',
+    'work package name': 'work_package_name',
+    'name': 'work_package_name',
+    'work package id': 'work_package_id',
+    'id': 'work_package_id',
+    'inventory': 'inventory',
+    'wo': 'work_package_number',
+    'wo #': 'work_package_number',
+    'work order': 'work_package_number',
+    'work package no': 'work_package_number',
+    'status': 'work_package_status',
+    'work package status': 'work_package_status',
+    'request parts': 'request_parts',
+    'location': 'work_location',
+    'work location': 'work_location',
+    'start': 'start_date',
+    'start date': 'start_date',
+    'scheduled start': 'start_date',
+    'end': 'end_date',
+    'end date': 'end_date',
+    'scheduled end': 'end_date',
+    'schedule priority': 'schedule_priority',
+    'priority': 'schedule_priority',
+    'driving task': 'driving_task_name',
+    'driving task name': 'driving_task_name',
+    'driving task id': 'driving_task_id',
+}
+
+FLEET_COLUMNS = {
+    'aircraft': 'tail_number',
+    'tail': 'tail_number',
+    'tail number': 'tail_number',
+    'registration': 'tail_number',
+    'reg': 'tail_number',
+    'inventory': 'inventory',
+    'aircraft type': 'inventory',
+    'assembly': 'inventory',
+    'serial no': 'serial_number',
+    'serial number': 'serial_number',
+    'msn': 'serial_number',
+}
+
+TASK_DATE_FIELDS = ('due_date',)
+TASK_BOOLEAN_FIELDS = ('must_be_removed', 'soft_deadline', 'etops_significant')
+WORK_PACKAGE_DATE_FIELDS = ('start_date', 'end_date')
+WORK_PACKAGE_BOOLEAN_FIELDS = ('request_parts',)
+
+# Maintenix status/priority codes -> our choice values
+TASK_STATUS_MAP = {
+    'ACTV': 'OPEN',
+    'ACTIVE': 'OPEN',
+    'OPEN': 'OPEN',
+    'IN WORK': 'IN_PROGRESS',
+    'INWORK': 'IN_PROGRESS',
+    'IN PROGRESS': 'IN_PROGRESS',
+    'PAUSE': 'ON_HOLD',
+    'ON HOLD': 'ON_HOLD',
+    'COMPLETE': 'COMPLETED',
+    'COMPLETED': 'COMPLETED',
+    'CANCEL': 'CANCELLED',
+    'CANCELLED': 'CANCELLED',
+    'DEFER': 'DEFERRED',
+    'DEFERRED': 'DEFERRED',
+}
+
+WORK_PACKAGE_STATUS_MAP = {
+    'ACTV': 'OPEN',
+    'ACTIVE': 'OPEN',
+    'COMMIT': 'OPEN',
+    'OPEN': 'OPEN',
+    'IN WORK': 'IN_PROGRESS',
+    'INWORK': 'IN_PROGRESS',
+    'IN PROGRESS': 'IN_PROGRESS',
+    'PAUSE': 'ON_HOLD',
+    'ON HOLD': 'ON_HOLD',
+    'COMPLETE': 'COMPLETED',
+    'COMPLETED': 'COMPLETED',
+    'CANCEL': 'CANCELLED',
+    'CANCELLED': 'CANCELLED',
+    'CLOSE': 'CLOSED',
+    'CLOSED': 'CLOSED',
+}
+
+PRIORITY_MAP = {
+    'CRITICAL': 'CRITICAL',
+    'AOG': 'CRITICAL',
+    'HIGH': 'HIGH',
+    'MEDIUM': 'MEDIUM',
+    'NORMAL': 'MEDIUM',
+    'LOW': 'LOW',
+    'ROUTINE': 'ROUTINE',
+}
+
+WORK_TYPE_MAP = {
+    'LINE': 'LINE',
+    'HANGAR': 'HANGAR',
+    'BASE': 'HANGAR',
+    'SHOP': 'SHOP',
+    'INSPECTION': 'INSPECTION',
+    'INSP': 'INSPECTION',
+    'MODIFICATION': 'MODIFICATION',
+    'MOD': 'MODIFICATION',
+    'TROUBLESHOOTING': 'TROUBLESHOOTING',
+    'TS': 'TROUBLESHOOTING',
+}
+
+DATE_FORMATS = [
+    '%d-%b-%Y %H:%M:%S',
+    '%d-%b-%Y %H:%M',
+    '%d-%b-%Y',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d',
+]
+
+TRUE_VALUES = {'yes', 'y', 'true', 'x', '1', 'checked'}
+
+
+# ============================================================================
+# HTML TABLE EXTRACTION
+# ============================================================================
+
+def normalize_header(text):
+    """Lower-case a header cell and collapse whitespace/punctuation"""
+    text = re.sub(r'[:*]', '', text or '')
+    return ' '.join(text.lower().split())
+
+
+class TableParser(HTMLParser):
+    """
+    Single pass table extractor.
+
+    Every table with a <th> header row reports its data rows through
+    ``on_row(table_id, row)`` where ``row`` maps header text to cell text
+    and carries the cell links under ``'_links'``. Nested layout tables
+    are tracked on a stack so their cells never bleed into each other.
+    """
+
+    def __init__(self, on_row):
+        super().__init__(convert_charrefs=True)
+        self.on_row = on_row
+        self._tables = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'table':
+            self._tables.append({
+                'id': attrs.get('id', ''),
+                'headers': None,
+                'row': None,
+                'cell': None,
+            })
+            return
+
+        if not self._tables:
+            return
+        table = self._tables[-1]
+
+        # JSP output often leaves <tr>/<td> unclosed, so a new one closes the last
+        if tag == 'tr':
+            self._close_row(table)
+            table['row'] = {'cells': [], 'is_header': False, 'links': []}
+        elif tag in ('td', 'th') and table['row'] is not None:
+            self._close_cell(table)
+            table['cell'] = []
+            if tag == 'th':
+                table['row']['is_header'] = True
+        elif table['cell'] is not None:
+            if tag == 'a' and attrs.get('href'):
+                table['row']['links'].append(attrs['href'])
+            elif tag == 'input' and attrs.get('type') == 'checkbox':
+                table['cell'].append('Yes' if 'checked' in attrs else 'No')
+            elif tag == 'br':
+                table['cell'].append(' ')
+
+    def handle_endtag(self, tag):
+        if not self._tables:
+            return
+        table = self._tables[-1]
+
+        if tag in ('td', 'th'):
+            self._close_cell(table)
+        elif tag == 'tr':
+            self._close_row(table)
+        elif tag == 'table':
+            self._close_row(table)
+            self._tables.pop()
+
+    def handle_data(self, data):
+        if self._tables and self._tables[-1]['cell'] is not None:
+            self._tables[-1]['cell'].append(data)
+
+    def _close_cell(self, table):
+        if table['cell'] is not None and table['row'] is not None:
+            table['row']['cells'].append(' '.join(''.join(table['cell']).split()))
+        table['cell'] = None
+
+    def _close_row(self, table):
+        self._close_cell(table)
+        row = table['row']
+        table['row'] = None
+        if not row or not row['cells']:
+            return
+
+        if row['is_header']:
+            if table['headers'] is None:
+                table['headers'] = [normalize_header(cell) for cell in row['cells']]
+            return
+
+        if table['headers'] is None:
+            return
+
+        data = dict(zip(table['headers'], row['cells']))
+        data['_links'] = row['links']
+        self.on_row(table['id'], data)
+
+
+def parse_tables(html):
+    """Return {table_key: [row, ...]} for every header table on the page"""
+    tables = {}
+
+    def collect(table_id, row):
+        key = table_id or tuple(header for header in row if header != '_links')
+        tables.setdefault(key, []).append(row)
+
+    parser = TableParser(collect)
+    parser.feed(html)
+    parser.close()
+    return tables
+
+
+# ============================================================================
+# VALUE CONVERSION
+# ============================================================================
+
+def parse_maintenix_date(value):
+    """Parse a Maintenix date string (e.g. 16-OCT-2026 14:30) into an aware datetime"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    return _parse_date_string(value)
+
+
+# Large listings repeat the same due dates over and over, so cache the parse
+@lru_cache(maxsize=4096)
+def _parse_date_string(value):
+    # Maintenix appends the timezone abbreviation to some timestamps
+    value = re.sub(r'\s+[A-Z]{2,4}$', '', value)
+    titled = value.title()
+    for fmt in DATE_FORMATS:
+        try:
+            parsed = datetime.strptime(titled if '%b' in fmt else value, fmt)
+        except ValueError:
+            continue
+        return timezone.make_aware(parsed)
+    return None
+
+
+def parse_boolean(value):
+    return (value or '').strip().lower() in TRUE_VALUES
+
+
+def map_choice(value, mapping, default=''):
+    key = ' '.join((value or '').upper().replace('_', ' ').split())
+    return mapping.get(key, default)
+
+
+def map_columns(row, columns):
+    """Translate a header-keyed row into model field names"""
+    mapped = {}
+    for header, value in row.items():
+        field = columns.get(header)
+        if field and field not in mapped:
+            mapped[field] = value
+    return mapped
+
+
+def table_kind(headers):
+    """Work out whether a header row belongs to a task or work package list"""
+    headers = [normalize_header(header) for header in headers]
+    task_fields = {TASK_COLUMNS.get(header) for header in headers}
+    if {'task_name', 'task_id'} <= task_fields:
+        return 'tasks'
+    work_package_fields = {WORK_PACKAGE_COLUMNS.get(header) for header in headers}
+    if {'work_package_name', 'work_package_id'} <= work_package_fields:
+        return 'work_packages'
+    return None
+
+
+def clean_task_row(row):
+    """Turn a raw open task table row into OpenTask field values"""
+    data = map_columns(row, TASK_COLUMNS)
+    if not data.get('task_id'):
+        return None
+
+    for field in TASK_DATE_FIELDS:
+        data[field] = parse_maintenix_date(data.get(field))
+    for field in TASK_BOOLEAN_FIELDS:
+        data[field] = parse_boolean(data.get(field))
+
+    data['task_status'] = map_choice(data.get('task_status'), TASK_STATUS_MAP, 'OPEN')
+    data['task_priority'] = map_choice(data.get('task_priority'), PRIORITY_MAP, 'MEDIUM')
+    data['schedule_priority'] = map_choice(data.get('schedule_priority'), PRIORITY_MAP)
+    data['work_type'] = map_choice(data.get('work_type'), WORK_TYPE_MAP, 'OTHER' if data.get('work_type') else 'LINE')
+    return data
+
+
+def clean_work_package_row(row):
+    """Turn a raw work package table row into OpenWorkPackage field values"""
+    data = map_columns(row, WORK_PACKAGE_COLUMNS)
+    if not data.get('work_package_id'):
+        return None
+
+    for field in WORK_PACKAGE_DATE_FIELDS:
+        data[field] = parse_maintenix_date(data.get(field))
+    for field in WORK_PACKAGE_BOOLEAN_FIELDS:
+        data[field] = parse_boolean(data.get(field))
+
+    data['work_package_status'] = map_choice(data.get('work_package_status'), WORK_PACKAGE_STATUS_MAP, 'OPEN')
+    schedule_priority = map_choice(data.get('schedule_priority'), PRIORITY_MAP)
+    data['schedule_priority'] = '' if schedule_priority == 'ROUTINE' else schedule_priority
+    return data
+
+
+def inventory_id_from_links(links):
+    """Pull the Maintenix inventory key (aInvNo=...) out of a row's links"""
+    for link in links:
+        match = re.search(r'[?&]a?InvNo=([^&#]+)', link, re.IGNORECASE)
+        if match:
+            return unquote(match.group(1))
+    return ''
+
+
+# ============================================================================
+# PAGE PARSERS
+# ============================================================================
+
+def parse_fleet_list(html):
+    """
+    Parse the ToDoList fleet tab into
+    [{'tail_number', 'inventory', 'serial_number', 'maintenix_inventory_id'}, ...]
+    """
+    fleet = []
+    for rows in parse_tables(html).values():
+        headers = {normalize_header(header) for header in rows[0] if header != '_links'}
+        if 'tail_number' not in {FLEET_COLUMNS.get(header) for header in headers}:
+            continue
+        for row in rows:
+            data = map_columns(row, FLEET_COLUMNS)
+            if not data.get('tail_number'):
+                continue
+            data['maintenix_inventory_id'] = inventory_id_from_links(row['_links'])
+            fleet.append(data)
+    return fleet
+
+
+def parse_aircraft_page(html):
+    """
+    Parse an aircraft's Maintenix page.
+
+    Returns {'tasks': [...], 'work_packages': [...]} with rows already
+    converted to model field values.
+    """
+    result = {'tasks': [], 'work_packages': []}
+    for kind, row in iter_page_rows([html]):
+        result[kind].append(row)
+    return result
+
+
+# ============================================================================
+# STREAMING
+# ============================================================================
+
+def iter_table_rows(chunks):
+    """
+    Yield (table_id, row) pairs while the page is still streaming in.
+
+    ``chunks`` is any iterable of str or bytes (e.g. an HTTP response read
+    in blocks). Only the current chunk and the rows completed in it are
+    held in memory, however large the table is.
+    """
+    completed = []
+    parser = TableParser(lambda table_id, row: completed.append((table_id, row)))
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+    for chunk in chunks:
+        if isinstance(chunk, bytes):
+            chunk = decoder.decode(chunk)
+        parser.feed(chunk)
+        yield from completed
+        completed.clear()
+
+    parser.feed(decoder.decode(b'', final=True))
+    parser.close()
+    yield from completed
+
+
+def iter_page_rows(chunks):
+    """
+    Stream the task and work package rows of a Maintenix page as
+    ('tasks' | 'work_packages', cleaned_row) pairs. Tables that are
+    neither (layout, fleet list, ...) are skipped.
+    """
+    kinds = {}
+    cleaners = {'tasks': clean_task_row, 'work_packages': clean_work_package_row}
+    for table_id, row in iter_table_rows(chunks):
+        headers = tuple(header for header in row if header != '_links')
+        key = (table_id, headers)
+        if key not in kinds:
+            kinds[key] = table_kind(headers)
+        kind = kinds[key]
+        if kind is None:
+            continue
+        cleaned = cleaners[kind](row)
+        if cleaned:
+            yield kind, cleaned
+
+
+def tail_from_inventory(inventory):
+    """'BOEING 737-8MAX - ET-AVI' -> 'ET-AVI'"""
+    return (inventory or '').rsplit(' - ', 1)[-1].strip()
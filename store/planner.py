@@ -0,0 +1,140 @@
+"""
+Line maintenance slot planner.
+
+Ground windows are read from the GroundWindow index that ground_windows
+keeps in step with the flight schedule, so the planner and the
+ground-window API agree on when each aircraft is on the ground. Open
+tasks are then assigned greedily, most urgent priority first, each to the
+latest window on its aircraft that starts at least the minimum ground
+time before the task is due, so work is done as late as allowed and the
+earlier windows stay free for tighter tasks.
+
+Per aircraft the windows are sorted, so the latest feasible one is a
+bisect. Full windows are skipped with a union-find "previous free window"
+pointer, so a run costs O((tasks + windows) log windows) whatever the
+capacity contention.
+"""
+from bisect import bisect_right
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .ground_windows import ground_windows_overlapping
+from .models import OpenTask
+from .queries import open_tasks
+
+GroundTime = namedtuple('GroundTime', 'aircraft_id station start end')
+PlannedTask = namedtuple('PlannedTask', 'task_id aircraft_id due priority')
+
+PRIORITY_RANK = {value: rank for rank, (value, _) in enumerate(OpenTask.TASK_PRIORITY_CHOICES)}
+
+# Why a task could not be placed
+NO_DUE_DATE = 'no_due_date'
+NO_GROUND_TIME = 'no_ground_time'
+NO_WINDOW_BEFORE_DUE = 'no_window_before_due'
+CAPACITY = 'capacity'
+
+
+def schedule_ground_times(start_date, end_date, station=None, min_ground=None):
+    """
+    aircraft id -> its GroundTime windows at ``station`` that overlap
+    start_date..end_date and last at least ``min_ground``, in order.
+    Windows of tails outside the fleet are left out.
+    """
+    station = station or settings.LINE_STATION
+    min_ground = min_ground if min_ground is not None else timedelta(minutes=settings.PLANNER_MIN_GROUND_MINUTES)
+    range_start = timezone.make_aware(datetime.combine(start_date, time.min))
+    range_end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), time.min))
+    windows = ground_windows_overlapping(range_start, range_end, station).filter(aircraft__isnull=False)
+
+    ground_times = {}
+    for aircraft_id, start, end in windows.order_by('start_at').values_list('aircraft_id', 'start_at', 'end_at'):
+        if end - start >= min_ground:
+            ground_times.setdefault(aircraft_id, []).append(GroundTime(aircraft_id, station, start, end))
+    return ground_times
+
+
+def assign_tasks(ground_times, tasks, station_capacity=None, window_capacity=None, min_ground=timedelta(0)):
+    """
+    Greedy assignment of ``tasks`` (PlannedTask) to ``ground_times``
+    ({aircraft id: sorted GroundTime list}). ``station_capacity`` limits
+    tasks per {station: per day}; ``window_capacity`` limits tasks per
+    window. Returns ({task id: GroundTime}, {task id: reason}).
+    """
+    station_capacity = station_capacity or {}
+    starts = {aircraft_id: [window.start for window in windows] for aircraft_id, windows in ground_times.items()}
+    # Union-find over each aircraft's windows: free[aircraft][i] leads to
+    # the latest window at or before i that still has room, -1 for none
+    free = {aircraft_id: list(range(len(windows))) for aircraft_id, windows in ground_times.items()}
+    window_load = {}
+    day_load = {}
+
+    def has_room(window):
+        if window_capacity is not None and window_load.get(window, 0) >= window_capacity:
+            return False
+        limit = station_capacity.get(window.station)
+        return limit is None or day_load.get((window.station, window.start.date()), 0) < limit
+
+    def latest_free(aircraft_id, index):
+        parents = free[aircraft_id]
+        windows = ground_times[aircraft_id]
+        root = index
+        while root >= 0 and (parents[root] != root or not has_room(windows[root])):
+            # Fullness only ever grows, so a full window can point past itself for good
+            if parents[root] == root:
+                parents[root] = root - 1
+            root = parents[root]
+        while index > root:
+            parents[index], index = root, parents[index]
+        return root
+
+    assignments, unplaceable = {}, {}
+    ordered = sorted(
+        (task for task in tasks if task.due is not None),
+        key=lambda task: (PRIORITY_RANK.get(task.priority, len(PRIORITY_RANK)), task.due, task.task_id),
+    )
+    for task in tasks:
+        if task.due is None:
+            unplaceable[task.task_id] = NO_DUE_DATE
+    for task in ordered:
+        if not ground_times.get(task.aircraft_id):
+            unplaceable[task.task_id] = NO_GROUND_TIME
+            continue
+        latest = bisect_right(starts[task.aircraft_id], task.due - min_ground) - 1
+        if latest < 0:
+            unplaceable[task.task_id] = NO_WINDOW_BEFORE_DUE
+            continue
+        index = latest_free(task.aircraft_id, latest)
+        if index < 0:
+            unplaceable[task.task_id] = CAPACITY
+            continue
+        window = ground_times[task.aircraft_id][index]
+        assignments[task.task_id] = window
+        window_load[window] = window_load.get(window, 0) + 1
+        day = (window.station, window.start.date())
+        day_load[day] = day_load.get(day, 0) + 1
+    return assignments, unplaceable
+
+
+def plan_line_maintenance(start_date, end_date, aircraft_ids=None, station=None, station_capacity=None,
+                          window_capacity=None, min_ground=None):
+    """
+    Plan the open tasks of ``aircraft_ids`` (default: the whole fleet) into
+    the ground windows between start_date and end_date. Returns
+    {'windows': {aircraft id: [GroundTime]}, 'assignments': {task id:
+    GroundTime}, 'unplaceable': {task id: reason}}.
+    """
+    min_ground = min_ground if min_ground is not None else timedelta(minutes=settings.PLANNER_MIN_GROUND_MINUTES)
+    station_capacity = station_capacity if station_capacity is not None else settings.PLANNER_STATION_CAPACITY
+    ground_times = schedule_ground_times(start_date, end_date, station, min_ground)
+    tasks = open_tasks()
+    if aircraft_ids is not None:
+        tasks = tasks.filter(aircraft_id__in=aircraft_ids)
+        aircraft_ids = set(aircraft_ids)
+        ground_times = {pk: windows for pk, windows in ground_times.items() if pk in aircraft_ids}
+    planned = [PlannedTask(*row) for row in tasks.order_by().values_list(
+        'pk', 'aircraft_id', 'due_date', 'task_priority').iterator()]
+    assignments, unplaceable = assign_tasks(ground_times, planned, station_capacity, window_capacity, min_ground)
+    return {'windows': ground_times, 'assignments': assignments, 'unplaceable': unplaceable}
@@ -0,0 +1,244 @@
+"""
+Read-side queries for the maintenance planning pages and JSON API.
+
+Per-aircraft figures are computed in the database as correlated
+subqueries, so a whole fleet is listed with a single SELECT however many
+tails it has, instead of one COUNT per aircraft per figure.
+
+Task listings are paged with a keyset cursor on (due_date, id) rather than
+OFFSET, so page 200 costs the same index range scan as page 1.
+
+Work package task lists come from one fleet-wide (aircraft, work package)
+-> tasks index, cached until the next scraping session completes.
+"""
+import base64
+import json
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from django.db.models import Count, IntegerField, Max, Min, OuterRef, Q, Subquery, prefetch_related_objects
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .ingest import TASK_FINISHED_STATUSES, WORK_PACKAGE_FINISHED_STATUSES
+from .models import Aircraft, AircraftScrapingSession, OpenTask, OpenWorkPackage
+from .stats import ACTIVE_WORK_PACKAGE_STATUSES
+
+
+def open_tasks():
+    return OpenTask.objects.exclude(task_status__in=TASK_FINISHED_STATUSES)
+
+
+def open_work_packages():
+    return OpenWorkPackage.objects.exclude(work_package_status__in=WORK_PACKAGE_FINISHED_STATUSES)
+
+
+def per_aircraft(queryset, aggregate):
+    """``aggregate`` over the rows of ``queryset`` belonging to the outer aircraft"""
+    return Subquery(
+        queryset.filter(aircraft=OuterRef('pk')).order_by().values('aircraft')
+        .annotate(value=aggregate).values('value')[:1]
+    )
+
+
+def per_aircraft_count(queryset):
+    return Coalesce(per_aircraft(queryset, Count('pk')), 0, output_field=IntegerField())
+
+
+def fleet_overview(model_groups=None, statuses=None, now=None):
+    """
+    Active aircraft with their model group and open/overdue/critical task
+    and open/overdue work package counts, in one query.
+    """
+    now = now or timezone.now()
+    aircraft = Aircraft.objects.filter(active=True).select_related('model_group')
+    if model_groups:
+        aircraft = aircraft.filter(model_group__name__in=model_groups)
+    if statuses:
+        aircraft = aircraft.filter(current_status__in=statuses)
+    return aircraft.annotate(
+        open_task_total=per_aircraft_count(open_tasks()),
+        overdue_task_total=per_aircraft_count(open_tasks().filter(due_date__lt=now)),
+        critical_task_total=per_aircraft_count(open_tasks().filter(task_priority='CRITICAL')),
+        next_task_due=per_aircraft(open_tasks().filter(due_date__gte=now), Min('due_date')),
+        open_work_package_total=per_aircraft_count(open_work_packages()),
+        overdue_work_package_total=per_aircraft_count(
+            open_work_packages().filter(end_date__lt=now, work_package_status__in=ACTIVE_WORK_PACKAGE_STATUSES)
+        ),
+    ).order_by('model_group__name', 'tail_number')
+
+
+TASK_PAGE_SIZE = 100
+TASK_PAGE_MAX = 500
+TRUE_VALUES = ('1', 'true', 'yes')
+FALSE_VALUES = ('0', 'false', 'no')
+
+
+def encode_cursor(task):
+    """Opaque cursor pointing just past ``task`` in (due_date, id) order"""
+    due = task.due_date.isoformat() if task.due_date else None
+    return base64.urlsafe_b64encode(json.dumps([due, task.pk]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(due_date or None, id) from a cursor made by encode_cursor"""
+    try:
+        due, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        due = parse_datetime(due) if due is not None else None
+        return due, int(pk)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid cursor {cursor!r}")
+
+
+def parse_flag(value, name):
+    if value.lower() in TRUE_VALUES:
+        return True
+    if value.lower() in FALSE_VALUES:
+        return False
+    raise ValueError(f"{name} must be true or false, not {value!r}")
+
+
+def parse_moment(value, name):
+    moment = parse_datetime(value)
+    if moment is None:
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"{name} must be an ISO date or date-time, not {value!r}")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def filter_tasks(aircraft=None, due_from=None, due_to=None, priorities=None, work_types=None,
+                 etops_significant=None, soft_deadline=None, statuses=None):
+    """
+    OpenTask queryset for the task listing filters. Every filter is served
+    by one of the (column, due_date, id) indexes on OpenTask; without
+    ``statuses`` finished tasks are left out.
+    """
+    tasks = OpenTask.objects.filter(task_status__in=statuses) if statuses else open_tasks()
+    if aircraft:
+        tasks = tasks.filter(aircraft__tail_number__in=aircraft)
+    if due_from is not None:
+        tasks = tasks.filter(due_date__gte=due_from)
+    if due_to is not None:
+        tasks = tasks.filter(due_date__lt=due_to)
+    if priorities:
+        tasks = tasks.filter(task_priority__in=priorities)
+    if work_types:
+        tasks = tasks.filter(work_type__in=work_types)
+    if etops_significant is not None:
+        tasks = tasks.filter(etops_significant=etops_significant)
+    if soft_deadline is not None:
+        tasks = tasks.filter(soft_deadline=soft_deadline)
+    return tasks
+
+
+def task_page(tasks, cursor=None, limit=TASK_PAGE_SIZE):
+    """
+    One page of ``tasks`` in (due_date, id) order, undated tasks last.
+    Returns (tasks, next cursor or None).
+
+    Dated and undated tasks are read as two keyset ranges so each query
+    stays a plain index range scan (SQLite sorts NULLs first otherwise).
+    The cursor is also a plain due_date >= bound, because an OR of the two
+    keyset terms alone turns a multi-value filter into a MULTI-INDEX OR
+    that sorts every matching row.
+
+    With several values for one filter (e.g. two tails) SQLite walks each
+    value's (column, due_date, id) range and merges them in a sorter
+    capped at the page size, so EXPLAIN shows USE TEMP B-TREE FOR ORDER
+    BY. Each range stops once it can no longer reach the page, so a page
+    costs one short range per value, not a sort of every matching task.
+    SQLite only stops early when nothing is joined onto the rows, so the
+    aircraft are fetched afterwards in one query instead of joined.
+    """
+    limit = max(1, min(limit, TASK_PAGE_MAX))
+    due, after = decode_cursor(cursor) if cursor else (None, None)
+
+    page = []
+    if after is None or due is not None:
+        dated = tasks.filter(due_date__isnull=False)
+        if after is not None:
+            dated = dated.filter(Q(due_date__gt=due) | Q(pk__gt=after), due_date__gte=due)
+        page = list(dated.order_by('due_date', 'pk')[:limit + 1])
+        after = None
+    if len(page) <= limit:
+        undated = tasks.filter(due_date__isnull=True)
+        if after is not None:
+            undated = undated.filter(pk__gt=after)
+        page += list(undated.order_by('pk')[:limit + 1 - len(page)])
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1])
+    prefetch_related_objects(page, 'aircraft')
+    return page, next_cursor
+
+
+# Task indexes kept per (session version, aircraft ids), most recent last
+TASK_INDEX_CACHE_SIZE = 16
+_task_indexes = OrderedDict()
+_task_indexes_lock = threading.Lock()
+
+
+def session_version():
+    """Changes whenever a scraping session completes, i.e. whenever scraped data may have changed"""
+    version = AircraftScrapingSession.objects.filter(status='COMPLETED').aggregate(
+        latest=Max('completed_at'), sessions=Count('pk'),
+    )
+    return version['latest'], version['sessions']
+
+
+def build_task_index(aircraft_ids=None):
+    """
+    {(aircraft_id, work_package_id): [tasks]} for every task assigned to a
+    work package, in one query. Tasks keep OpenTask's default ordering.
+    """
+    tasks = OpenTask.objects.exclude(work_package_id='')
+    if aircraft_ids is not None:
+        tasks = tasks.filter(aircraft_id__in=aircraft_ids)
+    index = {}
+    for task in tasks:
+        index.setdefault((task.aircraft_id, task.work_package_id), []).append(task)
+    return index
+
+
+def task_index(aircraft_ids=None, version=None):
+    """
+    build_task_index() cached per session version, so repeated listings
+    between scrapes cost one version query instead of a rebuild.
+    """
+    version = version if version is not None else session_version()
+    key = (version, tuple(sorted(set(aircraft_ids))) if aircraft_ids is not None else None)
+    with _task_indexes_lock:
+        if key in _task_indexes:
+            _task_indexes.move_to_end(key)
+            return _task_indexes[key]
+
+    index = build_task_index(key[1])
+    with _task_indexes_lock:
+        _task_indexes[key] = index
+        while len(_task_indexes) > TASK_INDEX_CACHE_SIZE:
+            _task_indexes.popitem(last=False)
+    return index
+
+
+def clear_task_index_cache():
+    with _task_indexes_lock:
+        _task_indexes.clear()
+
+
+def prefetch_associated_tasks(work_packages, version=None):
+    """
+    Evaluate ``work_packages`` (a queryset or list) and fill in each one's
+    associated_tasks from a single task index instead of a query per row.
+    Returns the work packages as a list.
+    """
+    work_packages = list(work_packages)
+    index = task_index({work_package.aircraft_id for work_package in work_packages}, version)
+    for work_package in work_packages:
+        work_package._associated_tasks = index.get((work_package.aircraft_id, work_package.work_package_id), [])
+    return work_packages
@@ -0,0 +1,118 @@
+"""
+Versioned read-through cache for dashboard and planning payloads.
+
+Fleet overviews, due-date histograms, task listings and ground windows
+are read far more often than they change, and they only change when a
+scraping session completes or the flight schedule is imported. Every key
+is namespaced by one global data version held in the cache itself. The
+signal receivers bump it on either event, so every cached payload is
+invalidated at once. The next read misses and recomputes, and no stale
+payload can be read under the new version.
+
+The cache is the QUERY_CACHE_ALIAS entry of Django's CACHES. It must be
+shared by every process (on disk by default): the scrapers and schedule
+imports bump the version in their own processes, and a per-process cache
+would keep serving the old namespace to the web server. Hits and misses
+are counted per cached name, per process, for cache_stats().
+"""
+import hashlib
+import json
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.http import HttpResponse
+
+VERSION_KEY = 'data-version'
+
+_counters = {}
+_counters_lock = threading.Lock()
+
+
+def query_cache():
+    return caches[settings.QUERY_CACHE_ALIAS]
+
+
+def data_version():
+    """
+    The current data version. A version that was evicted or never set is
+    restarted from the clock, so it can never reuse an older namespace.
+    """
+    cache = query_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_data_version():
+    """Invalidate every cached payload at once and return the new version"""
+    cache = query_cache()
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+        return cache.get(VERSION_KEY)
+
+
+def cache_key(name, params, version):
+    """``name:version:digest`` of the JSON-encoded params, so any mix of lists, dates and None works"""
+    payload = json.dumps(params, sort_keys=True, default=str)
+    return f"{name}:{version}:{hashlib.sha1(payload.encode('utf-8')).hexdigest()}"
+
+
+def _count(name, outcome):
+    with _counters_lock:
+        counts = _counters.setdefault(name, {'hits': 0, 'misses': 0})
+        counts[outcome] += 1
+
+
+def cached_json_view(name, timeout=DEFAULT_TIMEOUT):
+    """
+    Cache the body of a JSON view per URL arguments and query string.
+    Only successful responses are stored, so a bad request is never
+    cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            cache = query_cache()
+            params = [args, kwargs, sorted(request.GET.lists())]
+            key = cache_key(name, params, data_version())
+            content = cache.get(key)
+            if content is not None:
+                _count(name, 'hits')
+                return HttpResponse(content, content_type='application/json')
+            _count(name, 'misses')
+            response = view(request, *args, **kwargs)
+            if response.status_code == 200:
+                cache.set(key, response.content, timeout)
+            return response
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """{'version', 'hits', 'misses', 'hit_rate', 'by_name': {name: {'hits', 'misses'}}} of this process"""
+    with _counters_lock:
+        by_name = {name: dict(counts) for name, counts in _counters.items()}
+    hits = sum(counts['hits'] for counts in by_name.values())
+    misses = sum(counts['misses'] for counts in by_name.values())
+    return {
+        'version': data_version(),
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        'by_name': by_name,
+    }
+
+
+def clear_query_cache():
+    """Drop every cached payload and the hit/miss counters (the version restarts on next use)"""
+    query_cache().clear()
+    with _counters_lock:
+        _counters.clear()
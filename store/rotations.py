@@ -0,0 +1,102 @@
+"""
+Per-tail rotation chains over the flight schedule.
+
+The flights each tail operates on a day are ordered by departure in one
+sorted pass. Every flight gets its place in the chain
+(rotation_sequence), a link to the flight before it (previous_rotation)
+and is_tail_swap when the aircraft that arrived for it (PTAIL) is not the
+one that leaves (TAIL).
+
+Chains only depend on the flights of one tail on one day, so after an
+import just the (date, tail) chains that received rows are recomputed,
+and only rows whose chain fields changed are written.
+"""
+from datetime import datetime, timedelta
+
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import AircraftFlightSchedule
+from .schedule_import import fleet_map
+
+ROTATION_FIELDS = ['rotation_sequence', 'previous_rotation', 'is_tail_swap']
+
+
+def _departs(flight_date, arrival, departure):
+    """Sort key: departure on the flight date, or the next morning when it leaves before it arrives"""
+    if departure is None:
+        return datetime.max
+    departs = datetime.combine(flight_date, departure)
+    if arrival is not None and departure < arrival:
+        departs += timedelta(days=1)
+    return departs
+
+
+def rebuild_rotations(flight_dates, tails=None):
+    """
+    Recompute the rotation chains of ``tails`` (default: every tail) on
+    ``flight_dates``. Returns how many flights changed.
+    """
+    flight_dates = set(flight_dates)
+    if not flight_dates:
+        return 0
+    fleet = fleet_map()
+    flights = AircraftFlightSchedule.objects.filter(flight_date__in=flight_dates)
+    if tails is not None:
+        # Both spellings of a tail (ET-AVI and AVI) chain together through the aircraft
+        tails = {tail.upper() for tail in tails}
+        aircraft_ids = {fleet[tail] for tail in tails if tail in fleet}
+        flights = flights.filter(Q(current_tail_scheduled__in=tails) | Q(aircraft_id__in=aircraft_ids))
+    rows = []
+    for (pk, flight_date, aircraft_id, arrived, departing, arrival, departure,
+         sequence, previous_id, swap) in flights.order_by().values_list(
+            'pk', 'flight_date', 'aircraft_id', 'previous_tail_scheduled', 'current_tail_scheduled',
+            'scheduled_arrival_time', 'scheduled_departure_time', 'rotation_sequence',
+            'previous_rotation_id', 'is_tail_swap').iterator():
+        departing = departing.upper()
+        arrived = (arrived or '').upper()
+        chain = (flight_date, str(aircraft_id or fleet.get(departing, departing)))
+        swapped = bool(arrived) and fleet.get(arrived, arrived) != fleet.get(departing, departing)
+        rows.append((chain, _departs(flight_date, arrival, departure), pk, swapped,
+                     (sequence, previous_id, swap)))
+
+    changed = []
+    chain, previous = None, None
+    for key, _, pk, swapped, current in sorted(rows, key=lambda row: row[:3]):
+        if key != chain:
+            chain, previous, sequence = key, None, 0
+        sequence += 1
+        values = (sequence, previous, swapped)
+        if values != current:
+            changed.append(values + (pk,))
+        previous = pk
+
+    if changed:
+        _write_rotations(changed)
+    return len(changed)
+
+
+def _write_rotations(rows):
+    """
+    Write (sequence, previous id, tail swap, pk) rows as one UPDATE ... FROM
+    a VALUES list per batch. bulk_update() would build a CASE per field per
+    row, and an UPDATE per row pays SQLite's statement journal once per
+    row inside a savepoint, so a full schedule day took most of the import.
+    """
+    quote = connection.ops.quote_name
+    meta = AircraftFlightSchedule._meta
+    table = quote(meta.db_table)
+    columns = [meta.get_field(name).column for name in ROTATION_FIELDS]
+    assignments = ', '.join(f"{quote(column)} = v.c{index}" for index, column in enumerate(columns))
+    names = ', '.join(f"c{index}" for index in range(len(columns))) + ', pk'
+    row_values = f"({', '.join(['%s'] * (len(columns) + 1))})"
+    batch_size = connection.features.max_query_params // (len(columns) + 1)
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            values = ', '.join([row_values] * len(batch))
+            cursor.execute(
+                f"WITH v({names}) AS (VALUES {values}) "
+                f"UPDATE {table} SET {assignments} FROM v WHERE {table}.{quote(meta.pk.column)} = v.pk",
+                [value for row in batch for value in row],
+            )
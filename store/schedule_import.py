@@ -0,0 +1,218 @@
+"""
+Bulk import of the daily flight schedule.
+
+AircraftFlightSchedule.save() looks the tail up one flight at a time.
+Here the fleet is loaded once into a tail -> aircraft map and flights are
+written with bulk_create in batches, so a whole network day costs a
+handful of queries whatever its size.
+
+Two layouts are read: CSV with the usual column headings and the
+fixed-width ops report, whose column positions are taken from its
+heading line (PFLT FROM STA EQPT PTAIL TAIL FLT DEST STD).
+"""
+import csv
+from datetime import date, datetime
+from functools import lru_cache
+
+from django.db import transaction
+
+from .models import Aircraft, AircraftFlightSchedule
+from .signals import send_schedule_changed
+
+BATCH_SIZE = 1000
+SCHEDULE_FORMATS = ('auto', 'csv', 'fixed')
+
+# Report heading -> AircraftFlightSchedule field
+SCHEDULE_COLUMNS = {
+    'PFLT': 'previous_flight_number',
+    'FROM': 'previous_flight_location',
+    'STA': 'scheduled_arrival_time',
+    'EQPT': 'equipment_type',
+    'PTAIL': 'previous_tail_scheduled',
+    'TAIL': 'current_tail_scheduled',
+    'FLT': 'current_flight_number',
+    'DEST': 'flight_destination',
+    'STD': 'scheduled_departure_time',
+}
+
+# Optional per-row date column, otherwise the date passed in is used
+DATE_COLUMNS = ('DATE', 'FLIGHT DATE', 'DOF')
+
+DATE_FORMATS = ['%Y-%m-%d', '%d-%b-%Y', '%d%b%y', '%d%b%Y', '%d/%m/%Y']
+TIME_FORMATS = ['%H:%M', '%H%M', '%H:%M:%S']
+
+TIME_FIELDS = ('scheduled_arrival_time', 'scheduled_departure_time')
+UPPERCASE_FIELDS = ('previous_flight_location', 'flight_destination', 'previous_tail_scheduled',
+                    'current_tail_scheduled', 'equipment_type')
+
+
+# A schedule repeats the same few dates and clock times, so each string is parsed once
+@lru_cache(maxsize=4096)
+def parse_schedule_date(value):
+    if isinstance(value, date):
+        return value
+    value = (value or '').strip().upper()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4096)
+def parse_schedule_time(value):
+    """'14:30', '1430' or '14:30:00'; a trailing day offset like '+1' is dropped"""
+    value = (value or '').strip().split('+')[0].split('-')[0].strip()
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format).time()
+        except ValueError:
+            continue
+    return None
+
+
+def _is_heading(line):
+    words = set(line.upper().replace(',', ' ').split())
+    return {'FLT', 'TAIL'} <= words
+
+
+def iter_csv_rows(lines):
+    """Rows of a CSV schedule as {HEADING: value} dicts"""
+    reader = csv.reader(lines)
+    headings = None
+    for values in reader:
+        if headings is None:
+            if _is_heading(','.join(values)):
+                headings = [value.strip().upper() for value in values]
+            continue
+        if any(value.strip() for value in values):
+            yield dict(zip(headings, (value.strip() for value in values)))
+
+
+def fixed_width_columns(heading):
+    """
+    (HEADING, start, end) for each column of a fixed-width heading line.
+    A column runs from the start of its heading to the start of the next.
+    """
+    starts = []
+    position = 0
+    for word in heading.split():
+        position = heading.index(word, position)
+        starts.append((word.upper(), position))
+        position += len(word)
+    return [
+        (name, start, starts[number + 1][1] if number + 1 < len(starts) else None)
+        for number, (name, start) in enumerate(starts)
+    ]
+
+
+def iter_fixed_width_rows(lines):
+    """Rows of the fixed-width ops report as {HEADING: value} dicts"""
+    columns = None
+    for line in lines:
+        line = line.rstrip('\r\n')
+        if columns is None:
+            if _is_heading(line):
+                columns = fixed_width_columns(line)
+            continue
+        # Skip blank lines and ---- / ==== rulers under the heading
+        if not line.strip() or not line.strip(' -=|'):
+            continue
+        yield {name: line[start:end].strip() for name, start, end in columns}
+
+
+def detect_format(lines):
+    """'csv' when the heading line is comma separated, otherwise 'fixed'"""
+    for line in lines:
+        if _is_heading(line):
+            return 'csv' if ',' in line else 'fixed'
+    return 'fixed'
+
+
+def fleet_map():
+    """tail number -> aircraft id, also keyed by the bare suffix (AVI for ET-AVI)"""
+    fleet = {}
+    suffixes = {}
+    for aircraft_id, tail in Aircraft.objects.values_list('id', 'tail_number'):
+        tail = tail.upper()
+        fleet[tail] = aircraft_id
+        if '-' in tail:
+            suffixes.setdefault(tail.split('-', 1)[1], []).append(aircraft_id)
+    for suffix, ids in suffixes.items():
+        if len(ids) == 1:
+            fleet.setdefault(suffix, ids[0])
+    return fleet
+
+
+def build_flight(row, flight_date, fleet):
+    """AircraftFlightSchedule for one row, or None when the row has no flight number"""
+    values = {field: row.get(heading, '') for heading, field in SCHEDULE_COLUMNS.items()}
+    if not values['current_flight_number']:
+        return None
+    for field in TIME_FIELDS:
+        values[field] = parse_schedule_time(values[field])
+    for field in UPPERCASE_FIELDS:
+        values[field] = values[field].upper()
+
+    row_date = next((row[column] for column in DATE_COLUMNS if row.get(column)), None)
+    flight_date = parse_schedule_date(row_date) or flight_date
+    if flight_date is None:
+        raise ValueError(f"No flight date for {values['current_flight_number']}; pass one for this file")
+
+    return AircraftFlightSchedule(
+        flight_date=flight_date,
+        aircraft_id=fleet.get(values['current_tail_scheduled']),
+        **values,
+    )
+
+
+def import_schedule(rows, flight_date=None, batch_size=BATCH_SIZE, replace=False):
+    """
+    Write schedule rows ({HEADING: value} dicts) in batches.
+
+    With ``replace`` the existing flights for every date in the file are
+    deleted first, so re-importing a day does not duplicate it.
+    Returns {'flights', 'linked', 'skipped', 'unknown_tails'}.
+    """
+    flight_date = parse_schedule_date(flight_date) if flight_date else None
+    fleet = fleet_map()
+    flights = []
+    skipped = 0
+    for row in rows:
+        flight = build_flight(row, flight_date, fleet)
+        if flight is None:
+            skipped += 1
+        else:
+            flights.append(flight)
+
+    with transaction.atomic():
+        if replace:
+            dates = {flight.flight_date for flight in flights}
+            AircraftFlightSchedule.objects.filter(flight_date__in=dates).delete()
+        AircraftFlightSchedule.objects.bulk_create(flights, batch_size=batch_size)
+    send_schedule_changed(
+        {flight.flight_date for flight in flights},
+        {flight.current_tail_scheduled for flight in flights if flight.current_tail_scheduled},
+    )
+
+    unknown = {flight.current_tail_scheduled for flight in flights
+               if flight.aircraft_id is None and flight.current_tail_scheduled}
+    return {
+        'flights': len(flights),
+        'linked': sum(1 for flight in flights if flight.aircraft_id),
+        'skipped': skipped,
+        'unknown_tails': sorted(unknown),
+    }
+
+
+def import_schedule_file(path, flight_date=None, file_format='auto', batch_size=BATCH_SIZE, replace=False):
+    """Import a CSV or fixed-width schedule file, see import_schedule()"""
+    if file_format not in SCHEDULE_FORMATS:
+        raise ValueError(f"Unknown schedule format {file_format!r}, expected one of {SCHEDULE_FORMATS}")
+    with open(path, newline='', encoding='utf-8-sig') as file:
+        lines = file.readlines()
+    if file_format == 'auto':
+        file_format = detect_format(lines)
+    rows = iter_csv_rows(lines) if file_format == 'csv' else iter_fixed_width_rows(lines)
+    return import_schedule(rows, flight_date, batch_size=batch_size, replace=replace)
@@ -0,0 +1,267 @@
+"""
+Long-running scrape scheduler.
+
+Rather than sweeping the whole fleet by hand, each aircraft gets its own
+refresh cadence: hot aircraft (a task coming due or a departure in the
+next few hours) are refreshed every few minutes, stored and parked ones a
+couple of times a day. Aircraft wait in a heap ordered by when their next
+refresh is due and at most ``max_in_flight`` scrapes run at once, so the
+load on Maintenix stays flat however stale the fleet is.
+
+Every scrape is a child session of one parent session per scheduler run
+(see scraper_pool), so staleness is read back from the sessions table.
+"""
+import heapq
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from .ingest import TASK_FINISHED_STATUSES
+from .maintenix_http import MaintenixLoginRequired
+from .models import AircraftFlightSchedule, AircraftScrapingSession, OpenTask
+from .scraper_pool import ScraperPool, finish_parent_session, fleet_queryset
+from .signals import send_session_completed
+
+PARKED_STATUSES = ('STORED', 'RETIRED', 'INACTIVE')
+# Aircraft that were never scraped go to the front of the queue
+NEVER_SCRAPED = datetime(2000, 1, 1, tzinfo=dt_timezone.utc)
+# Failed scrapes are retried after this long (or their normal cadence, if shorter)
+RETRY_AFTER = timedelta(minutes=5)
+# Expired cookies fail every scrape, so everything waits this long instead
+LOGIN_BACKOFF = timedelta(minutes=10)
+# How often staleness and urgency are re-read from the database
+REPLAN_SECONDS = 60
+
+
+def last_scraped():
+    """aircraft id -> completion time of its latest completed scrape"""
+    return dict(
+        AircraftScrapingSession.objects.filter(aircraft__isnull=False, status='COMPLETED')
+        .order_by().values('aircraft_id').annotate(latest=Max('completed_at'))
+        .values_list('aircraft_id', 'latest')
+    )
+
+
+def next_task_due(now):
+    """
+    aircraft id -> due date of its soonest unfinished task not yet overdue.
+    An overdue task stays overdue however often it is scraped, so it must
+    not keep the aircraft on the hot cadence.
+    """
+    return dict(
+        OpenTask.objects.filter(due_date__gte=now).exclude(task_status__in=TASK_FINISHED_STATUSES)
+        .order_by().values('aircraft_id').annotate(soonest=Min('due_date'))
+        .values_list('aircraft_id', 'soonest')
+    )
+
+
+def next_departure(now):
+    """aircraft id -> its next scheduled departure today or tomorrow"""
+    today = timezone.localdate(now)
+    flights = AircraftFlightSchedule.objects.filter(
+        aircraft__isnull=False,
+        flight_date__range=(today, today + timedelta(days=1)),
+        scheduled_departure_time__isnull=False,
+    ).values_list('aircraft_id', 'flight_date', 'scheduled_departure_time')
+
+    soonest = {}
+    for aircraft_id, flight_date, departure_time in flights:
+        departs = timezone.make_aware(datetime.combine(flight_date, departure_time))
+        if departs >= now and (aircraft_id not in soonest or departs < soonest[aircraft_id]):
+            soonest[aircraft_id] = departs
+    return soonest
+
+
+def refresh_cadence(aircraft, soonest, now):
+    """'hot', 'normal' or 'parked' for an aircraft whose next task/departure is ``soonest``"""
+    if aircraft.current_status in PARKED_STATUSES:
+        return 'parked'
+    if soonest is not None and soonest - now <= timedelta(hours=settings.SCRAPE_HOT_WINDOW_HOURS):
+        return 'hot'
+    return 'normal'
+
+
+def refresh_interval(cadence):
+    return timedelta(minutes=settings.SCRAPE_REFRESH_MINUTES[cadence])
+
+
+def plan_refreshes(aircraft, now=None):
+    """
+    Heap entries (due_at, urgency, aircraft_id, cadence) for ``aircraft``.
+
+    due_at is the last completed scrape plus the aircraft's cadence, so the
+    stalest aircraft come first; urgency (seconds to the next task due or
+    departure) breaks ties in favour of the aircraft needed soonest.
+    """
+    now = now or timezone.now()
+    scraped = last_scraped()
+    tasks_due = next_task_due(now)
+    departures = next_departure(now)
+
+    entries = []
+    for plane in aircraft:
+        upcoming = [moment for moment in (tasks_due.get(plane.pk), departures.get(plane.pk)) if moment]
+        soonest = min(upcoming) if upcoming else None
+        cadence = refresh_cadence(plane, soonest, now)
+        latest = scraped.get(plane.pk)
+        due_at = latest + refresh_interval(cadence) if latest else NEVER_SCRAPED
+        urgency = (soonest - now).total_seconds() if soonest else float('inf')
+        entries.append((due_at, urgency, plane.pk, cadence))
+    heapq.heapify(entries)
+    return entries
+
+
+class ScrapeScheduler:
+    """
+    Keep the fleet fresh by scraping each aircraft when its refresh falls
+    due, with at most ``max_in_flight`` scrapes running at once.
+    """
+
+    def __init__(self, user, max_in_flight=None, engine='http', headless=True, cookie_file=None,
+                 model_group=None, tail_numbers=None, replan_seconds=REPLAN_SECONDS, log=None):
+        self.pool = ScraperPool(user, workers=max_in_flight or settings.SCRAPE_MAX_IN_FLIGHT,
+                                headless=headless, cookie_file=cookie_file, engine=engine)
+        self.max_in_flight = self.pool.workers
+        self.model_group = model_group
+        self.tail_numbers = tail_numbers
+        self.replan_seconds = replan_seconds
+        self.log = log or (lambda message: None)
+        self._heap = []
+        self._aircraft = {}
+        self._in_flight = {}
+        self._not_before = {}
+        self._paused_until = None
+        self._replan_at = None
+        self._finished = queue.Queue()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._local = threading.local()
+        self._closers = []
+        self._closers_lock = threading.Lock()
+
+    def stop(self):
+        """Stop dispatching; scrapes already in flight are allowed to finish"""
+        self._stopping.set()
+        self._wakeup.set()
+
+    def replan(self, now):
+        """Re-read the fleet, staleness and urgency and rebuild the queue"""
+        self._aircraft = {plane.pk: plane for plane in fleet_queryset(self.model_group, self.tail_numbers)}
+        heap = []
+        for due_at, urgency, aircraft_id, cadence in plan_refreshes(self._aircraft.values(), now):
+            if aircraft_id in self._in_flight:
+                continue
+            # Keep failed aircraft waiting out their retry delay
+            not_before = self._not_before.get(aircraft_id)
+            heap.append((max(due_at, not_before) if not_before else due_at, urgency, aircraft_id, cadence))
+        heapq.heapify(heap)
+        self._heap = heap
+        self._replan_at = now + timedelta(seconds=self.replan_seconds)
+
+    def run(self, once=False):
+        """
+        Scrape until stop() is called. With ``once`` every aircraft that is
+        due now is scraped and the scheduler returns. Returns the parent
+        session of this run.
+        """
+        parent = self.pool.start('scheduler', connections=self.max_in_flight)
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='scheduler')
+        try:
+            self.replan(timezone.now())
+            while not self._stopping.is_set():
+                self._wakeup.clear()
+                now = timezone.now()
+                self._collect(now)
+                if now >= self._replan_at:
+                    self.replan(now)
+                self._dispatch(executor, now)
+                if once and not self._in_flight and not self._due(now):
+                    break
+                self._wakeup.wait(self._sleep_seconds(now))
+        finally:
+            executor.shutdown(wait=True)
+            self._collect(timezone.now())
+            with self._closers_lock:
+                closers, self._closers = self._closers, []
+            for close in closers:
+                close()
+            self.pool.close()
+            finish_parent_session(parent)
+        return parent
+
+    def _due(self, now):
+        if self._paused_until and now < self._paused_until:
+            return False
+        return bool(self._heap) and self._heap[0][0] <= now
+
+    def _dispatch(self, executor, now):
+        while len(self._in_flight) < self.max_in_flight and self._due(now):
+            entry = heapq.heappop(self._heap)
+            aircraft = self._aircraft.get(entry[2])
+            if aircraft is None or entry[2] in self._in_flight:
+                continue
+            self.log(f"Scraping {aircraft.tail_number} ({entry[3]})")
+            future = executor.submit(self._scrape, aircraft)
+            self._in_flight[entry[2]] = entry
+            future.add_done_callback(lambda future, aircraft_id=entry[2]: self._done(aircraft_id, future))
+
+    def _done(self, aircraft_id, future):
+        # Runs on the worker thread; the main loop does the bookkeeping
+        self._finished.put((aircraft_id, future))
+        self._wakeup.set()
+
+    def _collect(self, now):
+        """Requeue aircraft whose scrape finished at their next refresh time"""
+        while True:
+            try:
+                aircraft_id, future = self._finished.get_nowait()
+            except queue.Empty:
+                return
+            _, urgency, _, cadence = self._in_flight.pop(aircraft_id)
+            interval = refresh_interval(cadence)
+            error = future.exception()
+            session = None if error else future.result()
+
+            if isinstance(error, MaintenixLoginRequired):
+                self._paused_until = now + LOGIN_BACKOFF
+                self.log(f"Maintenix login required, pausing until {self._paused_until:%H:%M}: {error}")
+                next_at = self._paused_until
+            elif error or session.status != 'COMPLETED':
+                next_at = now + min(interval, RETRY_AFTER)
+                self._not_before[aircraft_id] = next_at
+                self.log(f"Scrape of aircraft {aircraft_id} failed: {error or session.error_message}")
+            else:
+                next_at = now + interval
+                self._not_before.pop(aircraft_id, None)
+                # The run's parent session stays open, so refresh per scrape
+                with self.pool.db_lock:
+                    send_session_completed(session, [aircraft_id])
+            heapq.heappush(self._heap, (next_at, urgency, aircraft_id, cadence))
+
+    def _sleep_seconds(self, now):
+        wake_at = [self._replan_at]
+        if self._paused_until and self._paused_until > now:
+            wake_at.append(self._paused_until)
+        elif self._heap and len(self._in_flight) < self.max_in_flight:
+            wake_at.append(self._heap[0][0])
+        return max(0, min((moment - now).total_seconds() for moment in wake_at))
+
+    def _scrape(self, aircraft):
+        """Scrape one aircraft on a worker thread, opening its fetcher on first use"""
+        try:
+            fetch = getattr(self._local, 'fetch', None)
+            if fetch is None:
+                fetch, close = self.pool.open_fetch()
+                self._local.fetch = fetch
+                if close is not None:
+                    with self._closers_lock:
+                        self._closers.append(close)
+            return self.pool.scrape_aircraft(fetch, aircraft)
+        finally:
+            connection.close()
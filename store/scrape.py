@@ -8,20 +8,25 @@ from webdriver_manager.chrome import ChromeDriverManager
 import pickle
 import time
 
-def get_driver():
+TODO_LIST_URL = 'http://etmxi.ethiopianairlines.com/maintenix/common/ToDoList.jsp'
+
+def get_driver(headless=False):
     """Setup Chrome driver"""
     service = Service(ChromeDriverManager().install())
     chrome_options = Options()
-    # Uncomment below to run without browser window
-    # chrome_options.add_argument('--headless')
+    # Pool workers run without a browser window
+    if headless:
+        chrome_options.add_argument('--headless=new')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
     driver = webdriver.Chrome(service=service, options=chrome_options)
     return driver
 
-def load_cookies(driver, url):
+def load_cookies(driver, url, cookie_file='cookies.pkl'):
     """Load cookies from file and add to driver"""
     try:
         # Load cookies from file
-        with open('cookies.pkl', 'rb') as file:
+        with open(cookie_file, 'rb') as file:
             cookies = pickle.load(file)
         
         # First go to the domain
@@ -49,12 +54,48 @@ def load_cookies(driver, url):
         print(f"❌ Error loading cookies: {e}")
         return False
 
+def add_cookies(driver, url, cookies):
+    """Put already validated cookies into the browser without reloading the page"""
+    # Selenium only accepts cookies for the domain currently open
+    driver.get(url)
+    driver.delete_all_cookies()
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            print(f"⚠️ Could not add cookie {cookie.get('name')}: {e}")
+
+def browser_login(cookie_file='cookies.pkl', url=TODO_LIST_URL, timeout=300):
+    """Open a browser window for a manual Maintenix login and save its cookies"""
+    driver = get_driver()
+    try:
+        driver.get(url)
+        print("Please log in to Maintenix in the browser window...")
+        WebDriverWait(driver, timeout, poll_frequency=2).until(is_logged_in)
+        with open(cookie_file, 'wb') as file:
+            pickle.dump(driver.get_cookies(), file)
+        print("✅ Saved new cookies")
+    finally:
+        driver.quit()
+
+def is_logged_in(driver):
+    """Check whether the current page is a Maintenix page rather than the login form"""
+    return not ("login" in driver.title.lower() or "sign in" in driver.page_source.lower())
+
+def fetch_page_source(driver, url, timeout=10):
+    """Open a Maintenix page and return its HTML once the tables are rendered"""
+    driver.get(url)
+    WebDriverWait(driver, timeout).until(
+        EC.presence_of_element_located((By.TAG_NAME, 'table'))
+    )
+    return driver.page_source
+
 def main():
     driver = get_driver()
     
     try:
         # URL to scrape
-        url = 'http://etmxi.ethiopianairlines.com/maintenix/common/ToDoList.jsp'
+        url = TODO_LIST_URL
         
         # Try to load cookies
         if load_cookies(driver, url):
@@ -63,7 +104,7 @@ def main():
             time.sleep(3)
             
             # Check if login was successful
-            if "login" in driver.title.lower() or "sign in" in driver.page_source.lower():
+            if not is_logged_in(driver):
                 print("❌ Login failed. Cookies may have expired.")
                 print("Please run the login script again.")
                 return
@@ -0,0 +1,332 @@
+"""
+Parallel fleet sweep over Maintenix.
+
+A pool of headless Chrome workers pulls aircraft off a shared queue, so a
+sweep of the whole fleet takes about as long as the slowest worker's share
+instead of the sum of every aircraft. Each aircraft gets its own child
+AircraftScrapingSession under one parent session for the sweep.
+
+With ``engine='http'`` the workers share one keep-alive HTTP client
+instead of starting a browser each (see maintenix_http). Every page is
+kept in the page cache and only parsed when it differs from the last one
+ingested for that aircraft (see page_cache), and each phase of every
+scrape is timed in the session's JSONL trace (see tracing).
+"""
+import queue
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from .ingest import ingest_aircraft, record_unchanged_aircraft
+from .maintenix_http import MaintenixHttpClient, MaintenixLoginRequired, shared_cookie_manager
+from .models import Aircraft, AircraftScrapingSession, ScrapedPage
+from .page_cache import PageCache, last_ingested_hash
+from .parsers import parse_aircraft_page
+from .signals import send_session_completed
+from .tracing import PhaseTimer, SessionTrace
+
+ENGINES = ('browser', 'http')
+
+# Child session counters summed into the parent session
+ROLLUP_FIELDS = [
+    'tasks_scraped', 'work_packages_scraped',
+    'rows_inserted', 'rows_updated', 'rows_unchanged', 'rows_closed',
+]
+
+
+def new_session_id(prefix):
+    return f"{prefix}-{timezone.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def fleet_queryset(model_group=None, tail_numbers=None):
+    """Active aircraft that have a Maintenix URL to scrape"""
+    aircraft = Aircraft.objects.filter(active=True).select_related('model_group')
+    if model_group:
+        aircraft = aircraft.filter(model_group__name=model_group)
+    if tail_numbers:
+        aircraft = aircraft.filter(tail_number__in=tail_numbers)
+    return aircraft.exclude(maintenix_inventory_id='').exclude(maintenix_url_template='')
+
+
+def finish_parent_session(parent):
+    """Roll child session results up into the parent and set its final status"""
+    children = parent.child_sessions.all()
+    totals = children.aggregate(**{field: Sum(field) for field in ROLLUP_FIELDS + ['errors_encountered']})
+    for field in ROLLUP_FIELDS:
+        setattr(parent, field, totals[field] or 0)
+    parent.errors_encountered = (totals['errors_encountered'] or 0) + parent.errors_encountered
+
+    completed = children.filter(status='COMPLETED').count()
+    # A scheduler run with nothing due has no children and nothing wrong
+    if completed == children.count() and not parent.errors_encountered:
+        parent.status = 'COMPLETED'
+    elif completed:
+        parent.status = 'PARTIAL'
+    else:
+        parent.status = 'FAILED'
+    parent.completed_at = timezone.now()
+    parent.save()
+
+    if completed:
+        send_session_completed(parent, list(
+            children.filter(status='COMPLETED').values_list('aircraft_id', flat=True).distinct()
+        ))
+    return parent
+
+
+class ScraperPool:
+    """Run a fleet sweep with ``workers`` scrapers at once"""
+
+    def __init__(self, user, workers=None, headless=True, cookie_file=None, engine='browser', page_cache=None,
+                 cookie_manager=None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown scraping engine {engine!r}, expected one of {ENGINES}")
+        self.user = user
+        self.workers = max(1, workers or settings.SCRAPER_POOL_SIZE)
+        self.headless = headless
+        self.cookie_file = cookie_file or settings.MAINTENIX_COOKIE_FILE
+        self.cookies = cookie_manager or shared_cookie_manager(self.cookie_file)
+        self.engine = engine
+        self.page_cache = page_cache or PageCache()
+        self._http = None
+        self._queue = queue.Queue()
+        # SQLite allows one writer at a time, so workers take turns saving
+        self.db_lock = threading.Lock()
+        self._parent = None
+        self._scrape_counts = {}
+        self._cookie_generation = None
+        self._cookie_lock = threading.Lock()
+        self.trace = None
+
+    def start(self, prefix='fleet', connections=None):
+        """Create the parent session, its trace and, for the http engine, the shared client"""
+        self._parent = AircraftScrapingSession.objects.create(
+            session_id=new_session_id(prefix),
+            user=self.user,
+            status='IN_PROGRESS',
+        )
+        self.trace = SessionTrace(self._parent)
+        self._parent.log_file_path = self.trace.path
+        self._parent.save(update_fields=['log_file_path'])
+        self.trace.write('start', engine=self.engine, workers=self.workers)
+
+        # One cheap probe up front instead of every worker finding out on its own
+        timer = PhaseTimer()
+        try:
+            with timer.phase('cookie_load'):
+                self._cookie_generation, cookies = self.cookies.validate()
+        except MaintenixLoginRequired as e:
+            self.trace.write('pool', phases=timer.result(), error=str(e))
+            self.trace.close()
+            self._parent.status = 'FAILED'
+            self._parent.error_message = str(e)
+            self._parent.completed_at = timezone.now()
+            self._parent.save(update_fields=['status', 'error_message', 'completed_at'])
+            raise
+        if self.engine == 'http':
+            self._http = MaintenixHttpClient(cookies, pool_size=connections or self.workers)
+        self.trace.write('pool', phases=timer.result(), probes=self.cookies.probes)
+        return self._parent
+
+    def close(self):
+        if self._http is not None:
+            self._http.close()
+            self._http = None
+        if self.trace is not None:
+            self.trace.write('end')
+            self.trace.close()
+
+    def run(self, aircraft):
+        """Scrape every aircraft in ``aircraft`` and return the parent session"""
+        aircraft = list(aircraft)
+        for item in aircraft:
+            self._queue.put(item)
+
+        workers = min(self.workers, len(aircraft)) or 1
+        self.start('fleet', connections=workers)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scraper') as executor:
+                for worker_no in range(workers):
+                    executor.submit(self._worker, worker_no)
+        finally:
+            self.close()
+
+        # Anything still queued means every worker gave up (e.g. expired cookies)
+        skipped = self._queue.qsize()
+        if skipped:
+            self._parent.errors_encountered += skipped
+            self.add_error(f"{skipped} aircraft were not scraped")
+        return finish_parent_session(self._parent)
+
+    def open_fetch(self):
+        """Return (fetch, close) for one worker thread; close may be None"""
+        if self.engine == 'http':
+            return self._fetch_http, None
+        return self._open_browser()
+
+    def _fetch_http(self, url):
+        generation = self._cookie_generation
+        try:
+            body = self._http.get_text(url)
+        except MaintenixLoginRequired:
+            self._renew_cookies(generation)
+            body = self._http.get_text(url)
+        self.cookies.mark_valid(generation)
+        return body
+
+    def _renew_cookies(self, generation):
+        """Renew the shared jar once, however many workers hit the login page"""
+        new_generation, cookies = self.cookies.renew(generation)
+        with self._cookie_lock:
+            if new_generation != self._cookie_generation:
+                self._http.replace_cookies(cookies)
+                self._cookie_generation = new_generation
+
+    def _open_browser(self):
+        """Start a browser with the shared cookies and return (fetch, close) for it"""
+        from .scrape import add_cookies, fetch_page_source, get_driver, is_logged_in
+
+        timer = PhaseTimer()
+        with timer.phase('driver_start'):
+            driver = get_driver(headless=self.headless)
+        try:
+            with timer.phase('cookie_load'):
+                generation, _ = self.cookies.validate()
+                add_cookies(driver, settings.MAINTENIX_TODO_LIST_URL, self.cookies.cookie_list())
+        except Exception:
+            driver.quit()
+            raise
+        finally:
+            self.trace.write('worker', phases=timer.result())
+        loaded = [generation]
+
+        def fetch(url):
+            try:
+                if loaded[0] != self.cookies.generation:
+                    add_cookies(driver, settings.MAINTENIX_TODO_LIST_URL, self.cookies.cookie_list())
+                    loaded[0] = self.cookies.generation
+                body = fetch_page_source(driver, url)
+            except Exception:
+                if is_logged_in(driver):
+                    raise
+                # Login page instead of the tables: renew once for every worker and retry
+                loaded[0], _ = self.cookies.renew(loaded[0])
+                add_cookies(driver, settings.MAINTENIX_TODO_LIST_URL, self.cookies.cookie_list())
+                body = fetch_page_source(driver, url)
+            self.cookies.mark_valid(loaded[0])
+            return body
+
+        return fetch, driver.quit
+
+    def _worker(self, worker_no):
+        close = None
+        try:
+            fetch, close = self.open_fetch()
+
+            while True:
+                try:
+                    aircraft = self._queue.get_nowait()
+                except queue.Empty:
+                    return
+                self.scrape_aircraft(fetch, aircraft)
+        except Exception as e:
+            self.add_error(f"worker {worker_no}: {e}")
+        finally:
+            if close is not None:
+                close()
+            connection.close()
+
+    @contextmanager
+    def _db(self, timer):
+        """Hold the SQLite write lock, timing the wait for it separately"""
+        with timer.phase('db_wait'):
+            self.db_lock.acquire()
+        try:
+            with timer.phase('db_write'):
+                yield
+        finally:
+            self.db_lock.release()
+
+    def scrape_aircraft(self, fetch, aircraft):
+        """Scrape one aircraft into a child session of the parent and return it"""
+        timer = PhaseTimer()
+        with self._db(timer):
+            # The scheduler scrapes the same aircraft repeatedly under one parent
+            scrape_no = self._scrape_counts[aircraft.pk] = self._scrape_counts.get(aircraft.pk, 0) + 1
+            suffix = f"-{scrape_no}" if scrape_no > 1 else ''
+            session = AircraftScrapingSession.objects.create(
+                session_id=f"{self._parent.session_id}-{aircraft.tail_number}{suffix}",
+                user=self.user,
+                aircraft=aircraft,
+                aircraft_model_group=aircraft.model_group,
+                parent_session=self._parent,
+                status='IN_PROGRESS',
+                log_file_path=self.trace.path,
+            )
+
+        error = None
+        counts = {}
+        unchanged = False
+        try:
+            url = aircraft.maintenix_url
+            with timer.phase('page_load'):
+                body = fetch(url)
+            with timer.phase('cache'):
+                encoded = body.encode('utf-8')
+                digest = self.page_cache.put(encoded)
+            with self._db(timer):
+                # A byte-identical page would parse to the rows we already hold
+                unchanged = digest == last_ingested_hash(aircraft)
+                page = ScrapedPage.objects.create(
+                    session=session, aircraft=aircraft, url=url,
+                    content_hash=digest, size=len(encoded), unchanged=unchanged,
+                )
+            if unchanged:
+                with self._db(timer):
+                    counts = record_unchanged_aircraft(aircraft, session)
+            else:
+                with timer.phase('parse'):
+                    rows = parse_aircraft_page(body)
+                with self._db(timer):
+                    counts = ingest_aircraft(aircraft, rows['tasks'], rows['work_packages'], session, mode='sync')
+                    page.ingested = True
+                    page.save(update_fields=['ingested'])
+        except Exception as e:
+            error = e
+            session.status = 'FAILED'
+            session.errors_encountered = 1
+            session.error_message = str(e)
+        else:
+            session.status = 'COMPLETED'
+
+        session.completed_at = timezone.now()
+        with self._db(timer):
+            session.save()
+
+        self.trace.write(
+            'aircraft',
+            child_session=session.session_id,
+            tail=aircraft.tail_number,
+            status=session.status,
+            unchanged=unchanged,
+            phases=timer.result(),
+            rows=counts,
+            retries=self._http.take_retries() if self._http is not None else 0,
+            error=session.error_message or None,
+        )
+
+        # The shared jar could not be renewed, so every following page fails too
+        if isinstance(error, MaintenixLoginRequired):
+            raise error
+        return session
+
+    def add_error(self, message):
+        with self.db_lock:
+            parent = self._parent
+            parent.error_message = '\n'.join(filter(None, [parent.error_message, message]))
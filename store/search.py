@@ -0,0 +1,89 @@
+"""
+Full-text search over task and work package names.
+
+Backed by the SQLite FTS5 tables created in migration 0010, which triggers
+keep in step with OpenTask and OpenWorkPackage as pages are ingested.
+Every word of the query is matched as a prefix ("eng oil" finds "ENGINE
+OIL SERVICING") and results are ranked by bm25.
+"""
+import re
+
+from django.db import connection
+
+from .ingest import TASK_FINISHED_STATUSES, WORK_PACKAGE_FINISHED_STATUSES
+from .models import OpenTask, OpenWorkPackage
+
+SEARCH_LIMIT = 50
+SEARCH_LIMIT_MAX = 200
+
+# kind -> (model, FTS table, source table, status column, finished statuses)
+SEARCH_KINDS = {
+    'task': (OpenTask, 'store_opentask_fts', 'store_opentask', 'task_status', TASK_FINISHED_STATUSES),
+    'work_package': (OpenWorkPackage, 'store_openworkpackage_fts', 'store_openworkpackage',
+                     'work_package_status', WORK_PACKAGE_FINISHED_STATUSES),
+}
+
+WORD = re.compile(r'\w+')
+
+
+def match_expression(text):
+    """FTS5 MATCH expression requiring every word of ``text`` as a prefix, or None"""
+    words = WORD.findall(text)
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _ranked_ids(kind, expression, aircraft, model_groups, open_only, limit):
+    _, fts_table, table, status_column, finished = SEARCH_KINDS[kind]
+    sql = [
+        f"SELECT item.id, bm25({fts_table}) AS rank FROM {fts_table}",
+        f"JOIN {table} item ON item.id = {fts_table}.rowid",
+        "JOIN store_aircraft aircraft ON aircraft.id = item.aircraft_id",
+        "JOIN store_aircraftmodelgroup model_group ON model_group.id = aircraft.model_group_id",
+        f"WHERE {fts_table} MATCH %s",
+    ]
+    params = [expression]
+    if aircraft:
+        sql.append(f"AND aircraft.tail_number IN ({', '.join(['%s'] * len(aircraft))})")
+        params.extend(aircraft)
+    if model_groups:
+        sql.append(f"AND model_group.name IN ({', '.join(['%s'] * len(model_groups))})")
+        params.extend(model_groups)
+    if open_only:
+        sql.append(f"AND item.{status_column} NOT IN ({', '.join(['%s'] * len(finished))})")
+        params.extend(finished)
+    sql.append("ORDER BY rank LIMIT %s")
+    params.append(limit)
+
+    with connection.cursor() as cursor:
+        cursor.execute(' '.join(sql), params)
+        return cursor.fetchall()
+
+
+def search(text, kinds=None, aircraft=None, model_groups=None, open_only=False, limit=SEARCH_LIMIT):
+    """
+    Best matches for ``text`` as (kind, row, rank) tuples, best first;
+    lower bm25 ranks are better. ``kinds`` limits the search to 'task'
+    and/or 'work_package'.
+    """
+    expression = match_expression(text)
+    if expression is None:
+        return []
+    limit = max(1, min(limit, SEARCH_LIMIT_MAX))
+
+    results = []
+    for kind in kinds or SEARCH_KINDS:
+        model = SEARCH_KINDS[kind][0]
+        ranked = _ranked_ids(kind, expression, aircraft, model_groups, open_only, limit)
+        rows = model.objects.select_related('aircraft__model_group').in_bulk([pk for pk, _ in ranked])
+        results.extend((kind, rows[pk], rank) for pk, rank in ranked if pk in rows)
+    results.sort(key=lambda result: result[2])
+    return results[:limit]
+
+
+def rebuild_search_index():
+    """Re-index every row, e.g. after restoring a database without the triggers"""
+    with connection.cursor() as cursor:
+        for _, fts_table, _, _, _ in SEARCH_KINDS.values():
+            cursor.execute(f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
@@ -0,0 +1,61 @@
+from django.dispatch import Signal, receiver
+
+# Sent once a scraping session has finished writing. ``aircraft_ids`` are the
+# aircraft whose rows it may have changed (None for the whole fleet).
+scraping_session_completed = Signal()
+
+# Sent once flight schedule rows have been imported or replaced for
+# ``flight_dates``; ``tails`` are the TAILs that received rows (None for all).
+schedule_changed = Signal()
+
+
+def send_session_completed(session, aircraft_ids=None):
+    scraping_session_completed.send(sender=session.__class__, session=session, aircraft_ids=aircraft_ids)
+
+
+def send_schedule_changed(flight_dates, tails=None):
+    schedule_changed.send(sender=None, flight_dates=set(flight_dates), tails=tails)
+
+
+# Connected before the stats receiver so active_alerts counts the new alerts
+@receiver(scraping_session_completed)
+def generate_alerts_for_session(sender, session, aircraft_ids=None, **kwargs):
+    """Raise and resolve alerts for every aircraft the session touched"""
+    from .alerts import generate_alerts
+    generate_alerts(aircraft_ids)
+
+
+@receiver(scraping_session_completed)
+def refresh_stats_for_session(sender, session, aircraft_ids=None, **kwargs):
+    """Refresh the dashboard stats of every aircraft the session touched in one pass"""
+    from .stats import refresh_dashboard_stats
+    refresh_dashboard_stats(aircraft_ids)
+
+
+# Connected last so the new version is only visible once alerts and stats are written
+@receiver(scraping_session_completed)
+def bump_data_version_for_session(sender, session, aircraft_ids=None, **kwargs):
+    """Invalidate every cached dashboard and planning payload"""
+    from .query_cache import bump_data_version
+    bump_data_version()
+
+
+@receiver(schedule_changed)
+def rebuild_ground_windows_for_dates(sender, flight_dates, tails=None, **kwargs):
+    """Re-derive the ground windows the changed schedule dates can affect"""
+    from .ground_windows import rebuild_ground_windows
+    rebuild_ground_windows(flight_dates)
+
+
+@receiver(schedule_changed)
+def rebuild_rotations_for_dates(sender, flight_dates, tails=None, **kwargs):
+    """Re-chain the rotations of the tails that received flights on the changed dates"""
+    from .rotations import rebuild_rotations
+    rebuild_rotations(flight_dates, tails)
+
+
+@receiver(schedule_changed)
+def bump_data_version_for_schedule(sender, flight_dates, tails=None, **kwargs):
+    """Ground windows and plans read the schedule, so cached payloads go too"""
+    from .query_cache import bump_data_version
+    bump_data_version()
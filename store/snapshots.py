@@ -0,0 +1,139 @@
+"""
+Daily columnar snapshots of the open task and work package state.
+
+Every scrape overwrites OpenTask and OpenWorkPackage, so their history is
+kept outside the database: once a day (the snapshot_state command, from
+cron) the open rows of both tables are written, through the same chunked
+reader as the exports, to zstd-compressed Parquet files partitioned by
+date:
+
+    SNAPSHOT_DIR/tasks/snapshot_date=2026-10-16/part-0.parquet
+
+Questions about the past ("how many tasks were open on ET-AVI on
+1 March", "open tasks per tail over the last month") are answered from
+these files alone. Only the partitions in the asked range are opened,
+only the columns needed are read, and the tail/status filters are pushed
+down into the Parquet reader.
+"""
+import os
+import tempfile
+from datetime import date
+
+from django.conf import settings
+from django.utils import timezone
+
+from .exports import export_rows, load_pyarrow, parquet_chunks
+from .ingest import TASK_FINISHED_STATUSES, WORK_PACKAGE_FINISHED_STATUSES
+
+SNAPSHOT_DATASETS = ('tasks', 'work_packages')
+# Status column of each dataset and the statuses that no longer count as open
+STATUS_COLUMNS = {
+    'tasks': ('task_status', TASK_FINISHED_STATUSES),
+    'work_packages': ('work_package_status', WORK_PACKAGE_FINISHED_STATUSES),
+}
+PARTITION_PREFIX = 'snapshot_date='
+
+
+def _root(root):
+    return root or settings.SNAPSHOT_DIR
+
+
+def partition_path(name, snapshot_date, root=None):
+    return os.path.join(_root(root), name, f"{PARTITION_PREFIX}{snapshot_date.isoformat()}", 'part-0.parquet')
+
+
+def write_snapshot(snapshot_date=None, names=SNAPSHOT_DATASETS, root=None):
+    """
+    Write today's (or ``snapshot_date``'s) partition of the open rows of
+    each dataset, replacing one written earlier that day. Returns
+    {name: row count}.
+    """
+    snapshot_date = snapshot_date or timezone.localdate()
+    load_pyarrow()
+    counts = {}
+    for name in names:
+        status, finished = STATUS_COLUMNS[name]
+        path = partition_path(name, snapshot_date, root)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        counts[name] = 0
+
+        def counted(chunks):
+            for chunk in chunks:
+                counts[name] += len(chunk)
+                yield chunk
+
+        # Write to a temporary file first so queries never read half a partition
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                rows = export_rows(name, exclude={f"{status}__in": finished})
+                for data in parquet_chunks(name, counted(rows), compression=settings.SNAPSHOT_COMPRESSION):
+                    file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    return counts
+
+
+def snapshot_dates(name='tasks', start=None, end=None, root=None):
+    """Sorted dates that have a ``name`` partition, optionally within start..end"""
+    directory = os.path.join(_root(root), name)
+    if not os.path.isdir(directory):
+        return []
+    dates = []
+    for entry in os.listdir(directory):
+        if not entry.startswith(PARTITION_PREFIX):
+            continue
+        try:
+            snapshot_date = date.fromisoformat(entry[len(PARTITION_PREFIX):])
+        except ValueError:
+            continue
+        if (start is None or snapshot_date >= start) and (end is None or snapshot_date <= end) \
+                and os.path.exists(partition_path(name, snapshot_date, root)):
+            dates.append(snapshot_date)
+    return sorted(dates)
+
+
+def read_partition(name, snapshot_date, columns=None, aircraft=None, open_only=True, root=None):
+    """pyarrow Table of one partition, with the tail and open-status filters pushed down"""
+    _, pq = load_pyarrow()
+    filters = []
+    if aircraft:
+        filters.append(('tail_number', 'in', list(aircraft)))
+    if open_only:
+        status, finished = STATUS_COLUMNS[name]
+        filters.append((status, 'not in', finished))
+    return pq.read_table(partition_path(name, snapshot_date, root), columns=columns, filters=filters or None)
+
+
+def snapshot_on(name, on_date, columns=None, aircraft=None, open_only=True, root=None):
+    """
+    (snapshot date, Table) of the latest snapshot taken on or before
+    ``on_date``, or (None, None) when there is none.
+    """
+    dates = snapshot_dates(name, end=on_date, root=root)
+    if not dates:
+        return None, None
+    return dates[-1], read_partition(name, dates[-1], columns, aircraft, open_only, root)
+
+
+def _counts(table, by):
+    counts = table.group_by(by).aggregate([('id', 'count')])
+    return dict(zip(counts.column(by).to_pylist(), counts.column('id_count').to_pylist()))
+
+
+def open_counts_on(on_date, name='tasks', aircraft=None, by='tail_number', root=None):
+    """(snapshot date, {tail (or ``by`` value): open rows}) as of ``on_date``"""
+    snapshot_date, table = snapshot_on(name, on_date, ['id', by], aircraft, root=root)
+    if table is None:
+        return None, {}
+    return snapshot_date, _counts(table, by)
+
+
+def open_trend(start, end, name='tasks', aircraft=None, by='tail_number', root=None):
+    """{snapshot date: {tail (or ``by`` value): open rows}} for every snapshot in start..end"""
+    return {
+        snapshot_date: _counts(read_partition(name, snapshot_date, ['id', by], aircraft, root=root), by)
+        for snapshot_date in snapshot_dates(name, start, end, root)
+    }
@@ -0,0 +1,81 @@
+"""
+Set-based refresh of AircraftDashboardStats.
+
+Instead of recounting one aircraft per saved row, the whole fleet (or the
+aircraft a scraping session touched) is refreshed with three GROUP BY
+queries and one bulk upsert once the session completes.
+"""
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from .ingest import TASK_FINISHED_STATUSES, WORK_PACKAGE_FINISHED_STATUSES
+from .models import Aircraft, AircraftAlert, AircraftDashboardStats, OpenTask, OpenWorkPackage
+
+STATS_FIELDS = [
+    'total_open_tasks', 'overdue_tasks', 'critical_tasks',
+    'total_open_work_packages', 'overdue_work_packages', 'active_alerts',
+    'next_task_due_date', 'next_work_package_start', 'calculated_at',
+]
+
+# Work packages counted as overdue once past their end date (see OpenWorkPackage.is_active)
+ACTIVE_WORK_PACKAGE_STATUSES = ['OPEN', 'IN_PROGRESS']
+
+
+def _grouped(queryset, aircraft_ids, **aggregates):
+    if aircraft_ids is not None:
+        queryset = queryset.filter(aircraft_id__in=aircraft_ids)
+    rows = queryset.order_by().values('aircraft_id').annotate(**aggregates)
+    return {row.pop('aircraft_id'): row for row in rows}
+
+
+def refresh_dashboard_stats(aircraft_ids=None, now=None):
+    """
+    Recalculate the dashboard statistics of ``aircraft_ids`` (default: the
+    whole fleet) and return how many rows were written.
+    """
+    now = now or timezone.now()
+    if aircraft_ids is None:
+        ids = list(Aircraft.objects.values_list('pk', flat=True))
+    else:
+        ids = list(aircraft_ids)
+        if not ids:
+            return 0
+
+    tasks = _grouped(
+        OpenTask.objects.exclude(task_status__in=TASK_FINISHED_STATUSES), aircraft_ids,
+        total=Count('pk'),
+        overdue=Count('pk', filter=Q(due_date__lt=now)),
+        critical=Count('pk', filter=Q(task_priority='CRITICAL')),
+        next_due=Min('due_date', filter=Q(due_date__gte=now)),
+    )
+    work_packages = _grouped(
+        OpenWorkPackage.objects.exclude(work_package_status__in=WORK_PACKAGE_FINISHED_STATUSES), aircraft_ids,
+        total=Count('pk'),
+        overdue=Count('pk', filter=Q(end_date__lt=now, work_package_status__in=ACTIVE_WORK_PACKAGE_STATUSES)),
+        next_start=Min('start_date', filter=Q(start_date__gte=now)),
+    )
+    alerts = _grouped(
+        AircraftAlert.objects.filter(is_active=True, acknowledged=False), aircraft_ids,
+        total=Count('pk'),
+    )
+
+    stats = []
+    for aircraft_id in ids:
+        task = tasks.get(aircraft_id, {})
+        work_package = work_packages.get(aircraft_id, {})
+        stats.append(AircraftDashboardStats(
+            aircraft_id=aircraft_id,
+            total_open_tasks=task.get('total', 0),
+            overdue_tasks=task.get('overdue', 0),
+            critical_tasks=task.get('critical', 0),
+            total_open_work_packages=work_package.get('total', 0),
+            overdue_work_packages=work_package.get('overdue', 0),
+            active_alerts=alerts.get(aircraft_id, {}).get('total', 0),
+            next_task_due_date=task.get('next_due'),
+            next_work_package_start=work_package.get('next_start'),
+            calculated_at=now,
+        ))
+    AircraftDashboardStats.objects.bulk_create(
+        stats, batch_size=500, update_conflicts=True, unique_fields=['aircraft'], update_fields=STATS_FIELDS,
+    )
+    return len(stats)
@@ -0,0 +1,80 @@
+"""
+Queries over StatusChangeLog, the deltas sync ingestion appends whenever
+a task or work package changes status or dates.
+
+Both lookups run on the log's indexes: the history of one object on
+(object_type, object_id, changed_at), and cycle times on (object_type,
+field, new_value, changed_at). Cycle times are one query over each
+object's first change into the start status, with a correlated subquery
+(on the per-object index) for when it next entered the end status after
+that. Only the per-object durations reach Python.
+"""
+from django.db.models import Exists, F, OuterRef, Q, Subquery
+
+from .ingest import TASKS, WORK_PACKAGES
+from .models import StatusChangeLog
+from .tracing import percentile
+
+KINDS = {TASKS.object_type: TASKS, WORK_PACKAGES.object_type: WORK_PACKAGES}
+# Accepted ?by= groupings of cycle times
+CYCLE_TIME_GROUPS = {
+    'model_group': 'aircraft__model_group__name',
+    'tail_number': 'aircraft__tail_number',
+}
+
+
+def status_history(object_type, object_id):
+    """Every logged change of one task or work package, oldest first"""
+    return StatusChangeLog.objects.filter(object_type=object_type, object_id=object_id).order_by('changed_at', 'id')
+
+
+def entered_status(object_type, object_id, status):
+    """When the object last went into ``status``, or None if it never did"""
+    return status_history(object_type, object_id).filter(
+        field=KINDS[object_type].status_field, new_value=status,
+    ).values_list('changed_at', flat=True).last()
+
+
+def cycle_times(from_status='OPEN', to_status='COMPLETED', object_type='TASK', by='model_group',
+                since=None, until=None):
+    """
+    {group: {'count', 'mean_days', 'median_days', 'p90_days'}} of the time
+    between each object first entering ``from_status`` and first entering
+    ``to_status`` after it, for objects reaching ``to_status`` between
+    ``since`` and ``until``.
+    """
+    if object_type not in KINDS:
+        raise ValueError(f"Unknown object type {object_type!r}")
+    if by not in CYCLE_TIME_GROUPS:
+        raise ValueError(f"Unknown grouping {by!r}, expected one of {', '.join(CYCLE_TIME_GROUPS)}")
+    changes = StatusChangeLog.objects.filter(object_type=object_type, field=KINDS[object_type].status_field)
+    same_object = changes.filter(object_id=OuterRef('object_id'))
+    earlier = Q(changed_at__lt=OuterRef('changed_at')) | Q(changed_at=OuterRef('changed_at'), pk__lt=OuterRef('pk'))
+    # An object that was in to_status before from_status only counts from its next arrival there
+    next_arrival = same_object.filter(
+        new_value=to_status, changed_at__gt=OuterRef('changed_at'),
+    ).order_by('changed_at').values('changed_at')[:1]
+    spans = changes.filter(new_value=from_status).exclude(
+        Exists(same_object.filter(earlier, new_value=from_status)),
+    ).annotate(
+        group=F(CYCLE_TIME_GROUPS[by]), started=F('changed_at'), finished=Subquery(next_arrival),
+    ).filter(finished__isnull=False)
+    if since is not None:
+        spans = spans.filter(finished__gte=since)
+    if until is not None:
+        spans = spans.filter(finished__lte=until)
+
+    durations = {}
+    for group, started, finished in spans.values_list('group', 'started', 'finished').iterator():
+        durations.setdefault(group, []).append((finished - started).total_seconds() / 86400)
+
+    stats = {}
+    for group, days in durations.items():
+        days.sort()
+        stats[group] = {
+            'count': len(days),
+            'mean_days': round(sum(days) / len(days), 2),
+            'median_days': round(percentile(days, 50), 2),
+            'p90_days': round(percentile(days, 90), 2),
+        }
+    return stats
@@ -0,0 +1,103 @@
+"""
+Task card index of a work package.
+
+Every task of the work package is numbered in task id order and written
+out as CSV or as a printable HTML page (print it to PDF from the
+browser). Heavy checks hold thousands of tasks, so rows are read with
+iterator(chunk_size=...) and yielded a chunk at a time to a
+StreamingHttpResponse: neither the server nor the browser holds the whole
+index and the first rows go out before the last are read.
+"""
+import csv
+
+from django.utils import timezone
+from django.utils.html import escape
+
+from .models import OpenTask
+
+INDEX_FORMATS = ('csv', 'html')
+CHUNK_SIZE = 500
+
+# (header, field) in the order the columns are printed
+INDEX_COLUMNS = [
+    ('Task ID', 'task_id'),
+    ('Task', 'task_name'),
+    ('Position', 'config_position'),
+    ('Work type', 'work_type'),
+    ('Priority', 'task_priority'),
+    ('Status', 'task_status'),
+    ('Due', 'due_date'),
+    ('ETOPS', 'etops_significant'),
+    ('Must be removed', 'must_be_removed'),
+]
+
+
+def work_package_tasks(work_package):
+    """The tasks of ``work_package`` in card order, served by the (aircraft, work_package_id, task_id) index"""
+    return OpenTask.objects.filter(
+        aircraft_id=work_package.aircraft_id, work_package_id=work_package.work_package_id,
+    ).order_by('task_id')
+
+
+def _cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'Yes' if value else ''
+    if hasattr(value, 'tzinfo'):
+        return timezone.localtime(value).strftime('%Y-%m-%d %H:%M')
+    return str(value)
+
+
+def index_rows(work_package, chunk_size=CHUNK_SIZE):
+    """[number, cell, ...] per task, streamed from the database ``chunk_size`` rows at a time"""
+    tasks = work_package_tasks(work_package).values_list(*(field for _, field in INDEX_COLUMNS))
+    for number, values in enumerate(tasks.iterator(chunk_size=chunk_size), 1):
+        yield [str(number)] + [_cell(value) for value in values]
+
+
+class _Line:
+    """File-like target that hands csv.writer's output straight back"""
+
+    def write(self, value):
+        return value
+
+
+def csv_index(work_package, chunk_size=CHUNK_SIZE):
+    """The index as CSV, one chunk of lines per yield"""
+    writer = csv.writer(_Line())
+    yield writer.writerow(['No.'] + [header for header, _ in INDEX_COLUMNS])
+    lines = []
+    for row in index_rows(work_package, chunk_size):
+        lines.append(writer.writerow(row))
+        if len(lines) == chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def html_index(work_package, chunk_size=CHUNK_SIZE):
+    """The index as a standalone printable HTML page, one chunk of table rows per yield"""
+    title = escape(f"{work_package.work_package_number} {work_package.work_package_name}")
+    tail = escape(work_package.aircraft.tail_number)
+    yield (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>Task card index - {title}</title><style>'
+        'body{font:11px sans-serif;margin:1cm}table{border-collapse:collapse;width:100%}'
+        'th,td{border:1px solid #999;padding:2px 4px;text-align:left;vertical-align:top}'
+        'thead{display:table-header-group}tr{page-break-inside:avoid}'
+        '@media print{body{margin:0}}'
+        f'</style></head><body><h1>{title}</h1>'
+        f'<p>{tail} - printed {timezone.localtime():%Y-%m-%d %H:%M}</p>'
+        '<table><thead><tr><th>No.</th>'
+        + ''.join(f'<th>{header}</th>' for header, _ in INDEX_COLUMNS)
+        + '</tr></thead><tbody>'
+    )
+    lines = []
+    for row in index_rows(work_package, chunk_size):
+        lines.append('<tr>' + ''.join(f'<td>{escape(cell)}</td>' for cell in row) + '</tr>')
+        if len(lines) == chunk_size:
+            yield ''.join(lines)
+            lines = []
+    yield ''.join(lines) + '</tbody></table></body></html>'
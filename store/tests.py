@@ -1,3 +1,1877 @@
-from django.test import TestCase
+import csv
+import importlib.util
+import io
+import json
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest
+import urllib.error
+import urllib.request
+from datetime import date, datetime, time as clock, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from .alerts import generate_alerts
+from .analytics import BUCKETS, clear_due_columns_cache, due_horizon
+from .exports import export, export_rows
+from .ground_windows import ground_windows_overlapping, rebuild_ground_windows
+from .ingest import batched, ingest_aircraft, ingest_stream
+from .maintenix_http import CookieManager, MaintenixHttpClient, MaintenixLoginRequired
+from .models import *
+from .parsers import iter_page_rows
+from .query_cache import bump_data_version, clear_query_cache, data_version
+from .queries import clear_task_index_cache, filter_tasks, fleet_overview, prefetch_associated_tasks, task_page
+from .planner import CAPACITY, NO_DUE_DATE, NO_GROUND_TIME, NO_WINDOW_BEFORE_DUE, plan_line_maintenance
+from .page_cache import PageCache, replay_session
+from .rotations import rebuild_rotations
+from .scheduler import ScrapeScheduler, plan_refreshes
+from .search import search
+from .signals import send_session_completed
+from .snapshots import open_counts_on, open_trend, snapshot_dates, snapshot_on, write_snapshot
+from .schedule_import import import_schedule, iter_csv_rows, iter_fixed_width_rows
+from .scraper_pool import ScraperPool, finish_parent_session
+from .stats import refresh_dashboard_stats
+from .status_log import cycle_times, entered_status, status_history
+from .task_card_index import csv_index, html_index
+from .tracing import read_trace, summarize_traces
+
+
+def setUpModule():
+    # Sessions, schedule imports and cached views all touch the query cache;
+    # keep it in a scratch dir instead of the developer's on-disk one
+    directory = tempfile.TemporaryDirectory()
+    unittest.addModuleCleanup(directory.cleanup)
+    queries = {**settings.CACHES[settings.QUERY_CACHE_ALIAS], 'LOCATION': directory.name}
+    scratch = override_settings(CACHES={**settings.CACHES, settings.QUERY_CACHE_ALIAS: queries})
+    scratch.enable()
+    unittest.addModuleCleanup(scratch.disable)
+
+
+# Trimmed copies of pages recorded from Maintenix
+TODO_LIST_PAGE = """
+<html><head><title>To Do List</title></head><body>
+<table class="layout"><tr><td>
+  <table id="idTableFleetList">
+    <tr><th>Aircraft</th><th>Inventory</th><th>Serial No</th></tr>
+    <tr><td><a href="/maintenix/web/inventory/InventoryDetails.jsp?aInvNo=4650%3A1001">ET-AVI</a></td>
+        <td>BOEING 737-8MAX - ET-AVI</td><td>60001</td></tr>
+    <tr><td><a href="/maintenix/web/inventory/InventoryDetails.jsp?aInvNo=4650%3A1002">ET-AVJ</a></td>
+        <td>BOEING 737-8MAX - ET-AVJ</td><td>60002</td></tr>
+  </table>
+</td></tr></table>
+</body></html>
+"""
+
+AIRCRAFT_PAGE = """
+<html><head><title>Inventory Details</title></head><body>
+<table id="idTableOpenTasks">
+  <tr><th>Task Name</th><th>ID</th><th>Due</th><th>Soft Deadline</th><th>Inventory</th><th>Status</th>
+      <th>Task Priority</th><th>ETOPS Significant</th><th>Work Package</th><th>WO #</th></tr>
+  <tr><td>ENGINE OIL SERVICING</td><td><a href="TaskDetails.jsp?aTaskId=1">TSFN0045DQE</a></td>
+      <td>16-OCT-2026 14:30</td><td>No</td><td>BOEING 737-8MAX - ET-AVI</td><td>ACTV</td>
+      <td>HIGH</td><td><input type="checkbox" checked></td><td>DAILY CHECK</td><td>WO - 26538344</td></tr>
+  <tr><td>CABIN LIGHT INOP</td><td>TSFN0045DQF</td><td></td><td>Yes</td><td>BOEING 737-8MAX - ET-AVI</td>
+      <td>IN WORK</td><td>NORMAL</td><td><input type="checkbox"></td><td></td><td></td></tr>
+</table>
+<table id="idTableWorkPackages">
+  <tr><th>Work Package Name</th><th>ID</th><th>WO #</th><th>Status</th><th>Location</th>
+      <th>Start Date</th><th>End Date</th></tr>
+  <tr><td>DAILY CHECK</td><td>WP0012345</td><td>WO - 26538344</td><td>COMMIT</td><td>ADD/LINE</td>
+      <td>15-OCT-2026 22:00</td><td>16-OCT-2026 04:00</td></tr>
+</table>
+</body></html>
+"""
+
+LOGIN_PAGE = """<html><body><form action="j_security_check"><input name="j_username"></form></body></html>"""
+
+
+class MaintenixStandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.client_address, self.headers.get('Cookie', '')))
+        if self.path.startswith('/expired') or 'JSESSIONID=expired' in self.headers.get('Cookie', ''):
+            self.send_response(302)
+            self.send_header('Location', '/maintenix/common/security/login.jsp')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if self.path.startswith('/maintenix/common/ToDoList.jsp'):
+            body = TODO_LIST_PAGE
+        elif self.path.startswith('/maintenix/web/inventory/InventoryDetails.jsp'):
+            body = server.aircraft_page
+        elif self.path.startswith('/loginpage'):
+            body = LOGIN_PAGE
+        else:
+            self.send_error(404)
+            return
+
+        body = body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Set-Cookie', 'cRefresh_ToDoList=rotated; Path=/')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MaintenixStandInMixin:
+    """Serve recorded Maintenix pages from a local HTTP server"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), MaintenixStandInHandler)
+        cls.server.requests = []
+        cls.server_thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.server_thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.requests.clear()
+        self.server.aircraft_page = AIRCRAFT_PAGE
+        self.client_http = MaintenixHttpClient({'JSESSIONID': 'abc123'}, pool_size=2)
+        self.addCleanup(self.client_http.close)
+
+    def aircraft(self, inventory_id='4650:1001'):
+        return Aircraft(
+            tail_number='ET-AVI',
+            maintenix_inventory_id=inventory_id,
+            maintenix_url_template=self.base_url + '/maintenix/web/inventory/InventoryDetails.jsp?aInvNo={inventory_id}',
+        )
+
+
+class MaintenixHttpClientTests(MaintenixStandInMixin, SimpleTestCase):
+
+    def test_parses_aircraft_page(self):
+        rows = self.client_http.fetch_aircraft(self.aircraft())
+
+        self.assertEqual([task['task_id'] for task in rows['tasks']], ['TSFN0045DQE', 'TSFN0045DQF'])
+        oil, cabin = rows['tasks']
+        self.assertEqual(oil['task_status'], 'OPEN')
+        self.assertEqual(oil['task_priority'], 'HIGH')
+        self.assertTrue(oil['etops_significant'])
+        self.assertEqual(oil['due_date'].isoformat(), '2026-10-16T14:30:00+00:00')
+        self.assertEqual(cabin['task_status'], 'IN_PROGRESS')
+        self.assertTrue(cabin['soft_deadline'])
+        self.assertIsNone(cabin['due_date'])
+
+        work_package, = rows['work_packages']
+        self.assertEqual(work_package['work_package_id'], 'WP0012345')
+        self.assertEqual(work_package['work_package_status'], 'OPEN')
+        self.assertEqual(work_package['work_location'], 'ADD/LINE')
+
+    def test_parses_fleet_list(self):
+        fleet = self.client_http.fetch_fleet_list(self.base_url + '/maintenix/common/ToDoList.jsp')
+
+        self.assertEqual([row['tail_number'] for row in fleet], ['ET-AVI', 'ET-AVJ'])
+        self.assertEqual(fleet[0]['maintenix_inventory_id'], '4650:1001')
+        self.assertEqual(fleet[1]['inventory'], 'BOEING 737-8MAX - ET-AVJ')
+
+    def test_sends_and_updates_cookies(self):
+        self.client_http.fetch_aircraft(self.aircraft())
+        self.client_http.fetch_aircraft(self.aircraft())
+
+        first, second = [cookie for _, cookie in self.server.requests]
+        self.assertEqual(first, 'JSESSIONID=abc123')
+        self.assertIn('cRefresh_ToDoList=rotated', second)
+
+    def test_reuses_keep_alive_connection(self):
+        for _ in range(20):
+            self.client_http.fetch_aircraft(self.aircraft())
+
+        connections = {address for address, _ in self.server.requests}
+        self.assertEqual(len(self.server.requests), 20)
+        self.assertEqual(len(connections), 1)
+
+    def test_fetch_latency(self):
+        self.client_http.fetch_aircraft(self.aircraft())
+        started = time.perf_counter()
+        for _ in range(20):
+            self.client_http.fetch_aircraft(self.aircraft())
+        per_fetch = (time.perf_counter() - started) / 20
+
+        self.assertLess(per_fetch, 0.05)
+
+    def test_streams_listing_rows(self):
+        rows = list(self.client_http.iter_listing_rows(self.aircraft().maintenix_url))
+
+        self.assertEqual([kind for kind, _ in rows], ['tasks', 'tasks', 'work_packages'])
+        # The connection was fully read, so it goes back to the pool
+        self.client_http.fetch_aircraft(self.aircraft())
+        self.assertEqual(len({address for address, _ in self.server.requests}), 1)
+
+    def test_login_redirect_raises(self):
+        with self.assertRaises(MaintenixLoginRequired):
+            self.client_http.get(self.base_url + '/expired')
+
+    def test_login_page_raises(self):
+        with self.assertRaises(MaintenixLoginRequired):
+            self.client_http.get(self.base_url + '/loginpage')
+
+
+def create_fleet(tails=('ET-AVI', 'ET-AVJ')):
+    """A user, a B737_MAX model group and one aircraft per tail"""
+    user = CustomUser.objects.create_user(
+        email='planner@example.com', password='secret123', first_name='Line', last_name='Planner', company_id='E1'
+    )
+    manufacturer = AircraftManufacturer.objects.create(name='Boeing', country='USA')
+    model_group = AircraftModelGroup.objects.create(
+        name='B737_MAX', full_name='Boeing 737-8MAX', manufacturer=manufacturer, category='PASSENGER'
+    )
+    aircraft = [
+        Aircraft.objects.create(
+            model_group=model_group,
+            tail_number=tail,
+            registration=tail,
+            maintenix_inventory_id=f"4650:{number}",
+            maintenix_url_template='http://maintenix.test/InventoryDetails.jsp?aInvNo={inventory_id}',
+        )
+        for number, tail in enumerate(tails, start=1001)
+    ]
+    return user, model_group, aircraft
+
+
+def task_row(task_id, **values):
+    row = {'task_id': task_id, 'task_name': f"TASK {task_id}", 'task_status': 'OPEN',
+           'task_priority': 'MEDIUM', 'due_date': timezone.now()}
+    row.update(values)
+    return row
+
+
+def work_package_row(work_package_id, **values):
+    row = {'work_package_id': work_package_id, 'work_package_name': f"WP {work_package_id}",
+           'work_package_number': f"WO - {work_package_id}", 'work_package_status': 'OPEN'}
+    row.update(values)
+    return row
+
+
+class IngestTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        self.session = AircraftScrapingSession.objects.create(session_id='s1', user=self.user)
+
+    def test_bulk_upsert_inserts_and_updates(self):
+        ingest_aircraft(self.aircraft, [task_row('T1'), task_row('T2')], [work_package_row('WP1')], self.session)
+        with self.assertNumQueries(6):
+            result = ingest_aircraft(
+                self.aircraft,
+                [task_row('T1', task_status='ON_HOLD'), task_row('T3')],
+                [work_package_row('WP1', work_location='ADD')],
+                self.session,
+            )
+
+        self.assertEqual(result, {'tasks': 2, 'work_packages': 1})
+        self.assertEqual(OpenTask.objects.filter(aircraft=self.aircraft).count(), 3)
+        self.assertEqual(OpenTask.objects.get(task_id='T1').task_status, 'ON_HOLD')
+        self.assertEqual(OpenWorkPackage.objects.get(work_package_id='WP1').work_location, 'ADD')
+        self.assertEqual(OpenTask.objects.get(task_id='T3').inventory, 'BOEING 737-8MAX - ET-AVI')
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.tasks_scraped, 4)
+        self.assertEqual(self.session.work_packages_scraped, 2)
+
+    def test_same_task_id_on_two_aircraft(self):
+        ingest_aircraft(self.aircraft, [task_row('T1')])
+        ingest_aircraft(self.other, [task_row('T1'), task_row('T1', task_name='DUPLICATE')])
+
+        self.assertEqual(OpenTask.objects.filter(task_id='T1').count(), 2)
+        self.assertEqual(OpenTask.objects.get(aircraft=self.other).task_name, 'DUPLICATE')
+
+    def test_sync_skips_unchanged_and_closes_vanished(self):
+        due = timezone.now()
+        tasks = [task_row('T1', due_date=due), task_row('T2', due_date=due), task_row('T3', due_date=due)]
+        first = ingest_aircraft(self.aircraft, tasks, [work_package_row('WP1')], self.session, mode='sync')
+        self.assertEqual(first['inserted'], 4)
+
+        with self.assertNumQueries(6):
+            unchanged = ingest_aircraft(self.aircraft, tasks, [work_package_row('WP1')], mode='sync')
+        self.assertEqual((unchanged['unchanged'], unchanged['updated'], unchanged['closed']), (4, 0, 0))
+
+        session = AircraftScrapingSession.objects.create(session_id='s2', user=self.user)
+        result = ingest_aircraft(
+            self.aircraft,
+            [task_row('T1', due_date=due, task_status='ON_HOLD'), task_row('T2', due_date=due), task_row('T4')],
+            [],
+            session,
+            mode='sync',
+        )
+
+        self.assertEqual(
+            {count: result[count] for count in ('inserted', 'updated', 'unchanged', 'closed')},
+            {'inserted': 1, 'updated': 1, 'unchanged': 1, 'closed': 2},
+        )
+        self.assertEqual(OpenTask.objects.get(task_id='T1').task_status, 'ON_HOLD')
+        self.assertEqual(OpenTask.objects.get(task_id='T3').task_status, 'COMPLETED')
+        self.assertEqual(OpenWorkPackage.objects.get(work_package_id='WP1').work_package_status, 'CLOSED')
+        session.refresh_from_db()
+        self.assertEqual(
+            (session.rows_inserted, session.rows_updated, session.rows_unchanged, session.rows_closed),
+            (1, 1, 1, 2),
+        )
+
+        # A closed task that shows up again is reopened
+        ingest_aircraft(self.aircraft, tasks, mode='sync')
+        self.assertEqual(OpenTask.objects.get(task_id='T3').task_status, 'OPEN')
+
+
+def synthetic_listing(rows, rows_per_chunk=200, tails=('ET-AVI', 'ET-AVJ'), pulls=None):
+    """A fleet-level open task listing of ``rows`` rows, served in chunks"""
+    yield ('<html><body><table><tr><td><table id="idTableOpenTasks"><tr><th>Task Name</th><th>ID</th>'
+           '<th>Due</th><th>Inventory</th><th>Status</th><th>Task Priority</th></tr>')
+    chunk = []
+    for number in range(rows):
+        tail = tails[number % len(tails)]
+        chunk.append(
+            f"<tr><td>TASK {number}</td><td>T{number:07d}</td><td>{number % 28 + 1:02d}-OCT-2026 14:30</td>"
+            f"<td>BOEING 737-8MAX - {tail}</td><td>ACTV</td><td>NORMAL</td></tr>"
+        )
+        if len(chunk) == rows_per_chunk:
+            if pulls is not None:
+                pulls.append(number + 1 - len(chunk))
+            yield ''.join(chunk)
+            chunk = []
+    yield ''.join(chunk) + '</table></td></tr></table></body></html>'
+
+
+class StreamingParserTests(SimpleTestCase):
+
+    def test_100k_row_page_streams_in_bounded_batches(self):
+        rows_per_chunk = 200
+        pulls = []
+        received = 0
+        lag = 0
+
+        def chunks():
+            # Rows the parser has been given vs. rows it has handed back so far
+            nonlocal lag
+            for chunk in synthetic_listing(100_000, rows_per_chunk, pulls=pulls):
+                if pulls:
+                    lag = max(lag, pulls[-1] - received)
+                yield chunk
+
+        for batch in batched(iter_page_rows(chunks()), 500):
+            self.assertLessEqual(len(batch), 500)
+            received += len(batch)
+
+        self.assertEqual(received, 100_000)
+        # Rows come out at most one batch plus one chunk behind the input,
+        # so nothing accumulates with the size of the table
+        self.assertLessEqual(lag, 500 + rows_per_chunk)
+
+    def test_rows_split_across_chunks(self):
+        page = ''.join(synthetic_listing(3))
+        chunks = [page[start:start + 7] for start in range(0, len(page), 7)]
+
+        rows = [row for _, row in iter_page_rows(chunks)]
+        self.assertEqual([row['task_id'] for row in rows], ['T0000000', 'T0000001', 'T0000002'])
+        self.assertEqual(rows[0]['task_priority'], 'MEDIUM')
+
+    def test_bytes_chunks_with_split_characters(self):
+        page = '<table><tr><th>Task Name</th><th>ID</th></tr><tr><td>VÉRIFICATION</td><td>T1</td></tr></table>'
+        data = page.encode('utf-8')
+        split = data.index('É'.encode('utf-8')) + 1
+
+        rows = [row for _, row in iter_page_rows([data[:split], data[split:]])]
+        self.assertEqual(rows[0]['task_name'], 'VÉRIFICATION')
+
+
+class StreamingIngestTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, self.aircraft = create_fleet()
+        self.session = AircraftScrapingSession.objects.create(session_id='stream', user=self.user)
+
+    def test_ingest_stream_writes_in_batches(self):
+        with CaptureQueriesContext(connection) as queries:
+            totals = ingest_stream(iter_page_rows(synthetic_listing(3000)), self.session, batch_size=500, mode='sync')
+
+        self.assertEqual(totals['tasks'], 3000)
+        self.assertEqual(totals['inserted'], 3000)
+        self.assertEqual(totals['skipped'], 0)
+        self.assertEqual(OpenTask.objects.filter(aircraft=self.aircraft[0]).count(), 1500)
+        # Query count grows with batches, not rows (SQLite still splits each
+        # INSERT at 999 parameters, i.e. ~39 rows per statement, ~124 for the
+        # change log entries that record each new row's first status)
+        self.assertLess(len(queries), 3000 // 15)
+        self.assertEqual(StatusChangeLog.objects.filter(old_value='').count(), 3000)
+
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.tasks_scraped, 3000)
+
+        totals = ingest_stream(
+            iter_page_rows(synthetic_listing(2000, tails=('ET-AVI', 'ET-AVJ', 'ET-XXX'))), batch_size=500, mode='sync'
+        )
+        self.assertEqual(totals['skipped'], 666)
+        # Rows only match when they land on the same tail in both listings
+        self.assertEqual(totals['unchanged'], 668)
+        self.assertEqual(totals['inserted'], 666)
+        self.assertEqual(totals['closed'], 3000 - 668)
+
+    def test_task_listing_leaves_work_packages_open(self):
+        plane = self.aircraft[0]
+        ingest_aircraft(plane, [task_row('T0000000'), task_row('OLD')], [work_package_row('WP1')], mode='sync')
+
+        totals = ingest_stream(iter_page_rows(synthetic_listing(1, tails=('ET-AVI',))), mode='sync')
+
+        self.assertEqual(totals['closed'], 1)
+        self.assertEqual(OpenTask.objects.get(task_id='OLD').task_status, 'COMPLETED')
+        self.assertEqual(OpenWorkPackage.objects.get(work_package_id='WP1').work_package_status, 'OPEN')
+
+
+class StatusChangeLogTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        self.session = AircraftScrapingSession.objects.create(session_id='s1', user=self.user)
+        self.due = timezone.make_aware(datetime(2026, 10, 20, 12))
+
+    def changes(self, **filters):
+        return list(StatusChangeLog.objects.filter(**filters).values_list('field', 'old_value', 'new_value'))
+
+    def test_sync_logs_only_real_changes(self):
+        ingest_aircraft(self.aircraft, [task_row('T1', due_date=self.due), task_row('T2', due_date=self.due)],
+                        [work_package_row('WP1')], self.session, mode='sync')
+        self.assertEqual(self.changes(object_type='TASK'), [('task_status', '', 'OPEN')] * 2)
+        task = OpenTask.objects.get(task_id='T1')
+
+        # A renamed task is rewritten but has no status or date change to log
+        ingest_aircraft(self.aircraft, [
+            task_row('T1', due_date=self.due + timedelta(days=2), task_status='ON_HOLD'),
+            task_row('T2', due_date=self.due.astimezone(timezone.get_fixed_timezone(180)), task_name='RENAMED'),
+        ], [work_package_row('WP1', start_date=self.due)], self.session, mode='sync')
+        self.assertEqual(self.changes(object_id=task.pk, session=self.session, old_value='OPEN'),
+                         [('task_status', 'OPEN', 'ON_HOLD')])
+        self.assertEqual(self.changes(field='due_date'),
+                         [('due_date', '2026-10-20T12:00:00+00:00', '2026-10-22T12:00:00+00:00')])
+        self.assertEqual(self.changes(object_type='WORK_PACKAGE', field='start_date'),
+                         [('start_date', '', '2026-10-20T12:00:00+00:00')])
+        self.assertIsNotNone(entered_status('TASK', task.pk, 'ON_HOLD'))
+        self.assertIsNone(entered_status('TASK', task.pk, 'COMPLETED'))
+
+        # Tasks that vanish from Maintenix are logged as closed
+        ingest_aircraft(self.aircraft, [task_row('T2', due_date=self.due)], [work_package_row('WP1')], mode='sync')
+        self.assertEqual([change.new_value for change in status_history('TASK', task.pk)],
+                         ['OPEN', 'ON_HOLD', '2026-10-22T12:00:00+00:00', 'COMPLETED'])
+        self.assertEqual(StatusChangeLog.objects.filter(object_type='TASK', field='task_status').count(), 4)
+
+    def test_cycle_times_per_model_group(self):
+        manufacturer = AircraftManufacturer.objects.get()
+        a350 = AircraftModelGroup.objects.create(name='A350', full_name='Airbus A350', manufacturer=manufacturer,
+                                                 category='PASSENGER')
+        self.other.model_group = a350
+        self.other.save()
+        start = timezone.make_aware(datetime(2026, 10, 1))
+        changes = []
+        for object_id, aircraft, days in ((1, self.aircraft, 2), (2, self.aircraft, 4), (3, self.aircraft, 9),
+                                          (4, self.other, 1), (5, self.other, None)):
+            changes.append(StatusChangeLog(object_type='TASK', object_id=object_id, aircraft=aircraft,
+                                           field='task_status', new_value='OPEN', changed_at=start))
+            if days is not None:
+                changes.append(StatusChangeLog(object_type='TASK', object_id=object_id, aircraft=aircraft,
+                                               field='task_status', old_value='OPEN', new_value='COMPLETED',
+                                               changed_at=start + timedelta(days=days)))
+        # Work packages and other fields don't count
+        changes.append(StatusChangeLog(object_type='WORK_PACKAGE', object_id=1, aircraft=self.aircraft,
+                                       field='work_package_status', new_value='COMPLETED', changed_at=start))
+        StatusChangeLog.objects.bulk_create(changes)
+
+        with self.assertNumQueries(1):
+            stats = cycle_times()
+        self.assertEqual(stats, {
+            'B737_MAX': {'count': 3, 'mean_days': 5.0, 'median_days': 4.0, 'p90_days': 9.0},
+            'A350': {'count': 1, 'mean_days': 1.0, 'median_days': 1.0, 'p90_days': 1.0},
+        })
+        self.assertEqual(cycle_times(by='tail_number', since=start + timedelta(days=3))['ET-AVI']['count'], 2)
+        with self.assertRaises(ValueError):
+            cycle_times(by='station')
+
+        self.client.force_login(self.user)
+        data = self.client.get('/api/cycle-times/', {'by': 'model_group', 'until': '2026-10-03'}).json()
+        self.assertEqual(data['cycle_times'], {
+            'B737_MAX': {'count': 1, 'mean_days': 2.0, 'median_days': 2.0, 'p90_days': 2.0},
+            'A350': {'count': 1, 'mean_days': 1.0, 'median_days': 1.0, 'p90_days': 1.0},
+        })
+        self.assertEqual(self.client.get('/api/cycle-times/', {'kind': 'aircraft'}).status_code, 400)
+
+    def test_cycle_time_ends_at_the_next_arrival_after_start(self):
+        start = timezone.make_aware(datetime(2026, 10, 1))
+        StatusChangeLog.objects.bulk_create([
+            # Completed, reopened two days later, completed again three days after that
+            StatusChangeLog(object_type='TASK', object_id=1, aircraft=self.aircraft, field='task_status',
+                            new_value='COMPLETED', changed_at=start),
+            StatusChangeLog(object_type='TASK', object_id=1, aircraft=self.aircraft, field='task_status',
+                            old_value='COMPLETED', new_value='OPEN', changed_at=start + timedelta(days=2)),
+            StatusChangeLog(object_type='TASK', object_id=1, aircraft=self.aircraft, field='task_status',
+                            old_value='OPEN', new_value='COMPLETED', changed_at=start + timedelta(days=5)),
+            # Completed before it was ever opened, and never since
+            StatusChangeLog(object_type='TASK', object_id=2, aircraft=self.aircraft, field='task_status',
+                            new_value='COMPLETED', changed_at=start),
+            StatusChangeLog(object_type='TASK', object_id=2, aircraft=self.aircraft, field='task_status',
+                            old_value='COMPLETED', new_value='OPEN', changed_at=start + timedelta(days=1)),
+        ])
+
+        self.assertEqual(cycle_times(), {
+            'B737_MAX': {'count': 1, 'mean_days': 3.0, 'median_days': 3.0, 'p90_days': 3.0},
+        })
+        self.assertEqual(cycle_times(until=start + timedelta(days=4)), {})
+
+
+# Layout of the daily ops schedule report
+FIXED_WIDTH_SCHEDULE = """\
+PFLT    FROM STA   EQPT  PTAIL   TAIL    FLT     DEST STD
+------- ---- ----- ----- ------- ------- ------- ---- -----
+ET302   NBO  0610  7M8   ET-AVI  ET-AVI  ET308   JIB  0735
+                   7M8           ET-AVJ  ET500   JFK  2245
+ET611   FRA  0530  359   ET-ATQ  ET-ATQ  ET700   LHR  0900
+"""
+
+
+class ScheduleImportTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+
+    def test_fixed_width_columns_follow_heading(self):
+        rows = list(iter_fixed_width_rows(FIXED_WIDTH_SCHEDULE.splitlines()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['PFLT'], 'ET302')
+        self.assertEqual(rows[0]['STD'], '0735')
+        self.assertEqual(rows[1]['PFLT'], '')
+        self.assertEqual(rows[1]['TAIL'], 'ET-AVJ')
+
+    def test_import_links_tails_without_per_row_lookups(self):
+        # Four for the import, six to re-derive the day's ground windows and five to chain its rotations
+        with self.assertNumQueries(15):
+            totals = import_schedule(iter_fixed_width_rows(FIXED_WIDTH_SCHEDULE.splitlines()), '2026-10-16')
+
+        self.assertEqual(totals['flights'], 3)
+        self.assertEqual(totals['linked'], 2)
+        self.assertEqual(totals['unknown_tails'], ['ET-ATQ'])
+        flight = AircraftFlightSchedule.objects.get(current_flight_number='ET308')
+        self.assertEqual(flight.aircraft, self.aircraft)
+        self.assertEqual(str(flight.scheduled_arrival_time), '06:10:00')
+        self.assertEqual(str(flight.flight_date), '2026-10-16')
+
+    def csv_day(self, flights=5000):
+        lines = ['DATE,PFLT,FROM,STA,EQPT,PTAIL,TAIL,FLT,DEST,STD']
+        lines += [
+            f"16-OCT-2026,ET{number},ADD,06:00,7M8,AVI,AVJ,ET{number + 5000},NBO,{number % 24:02d}:15"
+            for number in range(flights)
+        ]
+        return lines
+
+    def test_csv_day_imports_in_batches(self):
+        lines = self.csv_day()
+        # The whole import, including the ground window and rotation rebuilds it triggers
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            totals = import_schedule(iter_csv_rows(lines), batch_size=1000, replace=True)
+        elapsed = time.perf_counter() - started
+
+        # One fleet lookup each for the import, the ground windows and the rotations;
+        # SQLite splits each INSERT at 999 parameters
+        self.assertEqual(sum('store_aircraft"' in query['sql'] for query in queries), 3)
+        self.assertLess(len(queries), 5000 // 25)
+        self.assertLess(elapsed, 1.0)
+
+        self.assertEqual(totals['flights'], 5000)
+        # Bare suffixes resolve to the ET- registered tail
+        self.assertEqual(totals['linked'], 5000)
+        self.assertEqual(self.other.flight_schedules.count(), 5000)
+        self.assertEqual(AircraftFlightSchedule.objects.filter(rotation_sequence__isnull=False).count(), 5000)
+        self.assertTrue(GroundWindow.objects.filter(aircraft=self.aircraft).exists())
+
+        import_schedule(iter_csv_rows(lines), batch_size=1000, replace=True)
+        self.assertEqual(AircraftFlightSchedule.objects.count(), 5000)
+
+
+class SchedulerPlanTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.hot, self.normal, self.stored, self.new) = create_fleet(
+            ('ET-AVI', 'ET-AVJ', 'ET-AVK', 'ET-AVL')
+        )
+        self.stored.current_status = 'STORED'
+        self.stored.save()
+        self.now = timezone.now()
+        for plane in (self.hot, self.normal, self.stored):
+            AircraftScrapingSession.objects.create(
+                session_id=f"s-{plane.tail_number}", user=self.user, aircraft=plane,
+                status='COMPLETED', completed_at=self.now - timedelta(minutes=30),
+            )
+        OpenTask.objects.create(aircraft=self.hot, task_id='T1', task_name='OIL', inventory='x',
+                                due_date=self.now + timedelta(hours=2))
+        OpenTask.objects.create(aircraft=self.normal, task_id='T2', task_name='DONE', inventory='x',
+                                task_status='COMPLETED', due_date=self.now + timedelta(hours=1))
+
+    def test_cadence_follows_urgency_and_status(self):
+        plan = {aircraft_id: (due_at, cadence) for due_at, _, aircraft_id, cadence
+                in plan_refreshes(Aircraft.objects.all(), self.now)}
+
+        self.assertEqual(plan[self.hot.pk][1], 'hot')
+        self.assertEqual(plan[self.normal.pk][1], 'normal')
+        self.assertEqual(plan[self.stored.pk][1], 'parked')
+        # Hot aircraft are overdue after 30 minutes, parked ones are not
+        self.assertLess(plan[self.hot.pk][0], self.now)
+        self.assertGreater(plan[self.stored.pk][0], self.now)
+
+    def test_departures_make_aircraft_hot_and_never_scraped_go_first(self):
+        departs = timezone.localtime(self.now + timedelta(hours=1))
+        AircraftFlightSchedule.objects.create(
+            flight_date=departs.date(), scheduled_departure_time=departs.time(),
+            current_tail_scheduled='ET-AVJ', current_flight_number='ET308', flight_destination='JIB',
+        )
+        plan = plan_refreshes(Aircraft.objects.all(), self.now)
+
+        self.assertEqual(plan[0][2], self.new.pk)
+        self.assertEqual({entry[2]: entry[3] for entry in plan}[self.normal.pk], 'hot')
+
+    def test_overdue_task_does_not_keep_aircraft_hot(self):
+        OpenTask.objects.create(aircraft=self.normal, task_id='T3', task_name='LATE', inventory='x',
+                                due_date=self.now - timedelta(days=3))
+        plan = {aircraft_id: (urgency, cadence) for _, urgency, aircraft_id, cadence
+                in plan_refreshes(Aircraft.objects.all(), self.now)}
+
+        self.assertEqual(plan[self.normal.pk], (float('inf'), 'normal'))
+        # The overdue task doesn't hide a task that is about to fall due
+        OpenTask.objects.create(aircraft=self.normal, task_id='T4', task_name='SOON', inventory='x',
+                                due_date=self.now + timedelta(hours=1))
+        plan = {entry[2]: entry[3] for entry in plan_refreshes(Aircraft.objects.all(), self.now)}
+        self.assertEqual(plan[self.normal.pk], 'hot')
+
+
+class StandInFleetMixin(MaintenixStandInMixin):
+    """Three aircraft and the cookie probe pointing at the stand-in server, with scratch cache/trace dirs"""
+
+    def setUp(self):
+        super().setUp()
+        self.user, self.model_group, self.fleet = create_fleet(('ET-AVI', 'ET-AVJ', 'ET-AVK'))
+        Aircraft.objects.update(
+            maintenix_url_template=self.base_url + '/maintenix/web/inventory/InventoryDetails.jsp?aInvNo={inventory_id}'
+        )
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.cookie_file = os.path.join(scratch.name, 'cookies.pkl')
+        with open(self.cookie_file, 'wb') as file:
+            pickle.dump([{'name': 'JSESSIONID', 'value': 'abc123', 'domain': 'ethiopianairlines.com'}], file)
+
+        self.cache_dir = os.path.join(scratch.name, 'page_cache')
+        self.trace_dir = os.path.join(scratch.name, 'traces')
+        cache_settings = override_settings(
+            SCRAPE_PAGE_CACHE_DIR=self.cache_dir,
+            SCRAPE_TRACE_DIR=self.trace_dir,
+            MAINTENIX_TODO_LIST_URL=self.base_url + '/maintenix/common/ToDoList.jsp',
+        )
+        cache_settings.enable()
+        self.addCleanup(cache_settings.disable)
+
+
+class SchedulerRunTests(StandInFleetMixin, TransactionTestCase):
+
+    def scheduler(self):
+        return ScrapeScheduler(self.user, max_in_flight=2, cookie_file=self.cookie_file)
+
+    def test_once_scrapes_due_aircraft_then_leaves_fresh_ones(self):
+        parent = self.scheduler().run(once=True)
+
+        self.assertEqual(parent.status, 'COMPLETED')
+        self.assertEqual(parent.child_sessions.filter(status='COMPLETED').count(), 3)
+        self.assertEqual(parent.tasks_scraped, 6)
+        self.assertEqual(OpenTask.objects.count(), 6)
+
+        # Everything was just refreshed, so nothing is due yet
+        second = self.scheduler().run(once=True)
+        self.assertEqual(second.child_sessions.count(), 0)
+        self.assertEqual(second.status, 'COMPLETED')
+
+
+class PageCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.cache = PageCache(scratch.name, max_bytes=50_000, max_age_days=30)
+
+    def test_pages_are_stored_once_by_hash(self):
+        digest = self.cache.put(AIRCRAFT_PAGE.encode('utf-8'))
+        self.assertEqual(self.cache.put(AIRCRAFT_PAGE.encode('utf-8')), digest)
+        self.assertEqual(self.cache.get(digest).decode('utf-8'), AIRCRAFT_PAGE)
+        self.assertLess(os.path.getsize(self.cache.path(digest)), len(AIRCRAFT_PAGE))
+        self.assertIsNone(self.cache.get('0' * 64))
+
+    def test_evicts_least_recently_used_then_old_pages(self):
+        now = time.time()
+        digests = [self.cache.put(os.urandom(4000)) for _ in range(3)]
+        for age, digest in zip((300, 100, 200), digests):
+            os.utime(self.cache.path(digest), (now - age, now - age))
+
+        # 12kB against a 10kB budget: only the least recently used page goes
+        self.cache.max_bytes = 10_000
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertEqual([digest in self.cache for digest in digests], [False, True, True])
+
+        os.utime(self.cache.path(digests[2]), (now - 40 * 86400, now - 40 * 86400))
+        self.assertEqual(self.cache.evict(), 1)
+        self.assertNotIn(digests[2], self.cache)
+
+
+class UnchangedPageTests(StandInFleetMixin, TransactionTestCase):
+
+    def test_identical_page_skips_parse_and_replay_reingests(self):
+        first = ScraperPool(self.user, workers=2, cookie_file=self.cookie_file, engine='http').run(Aircraft.objects.all())
+        self.assertEqual(first.tasks_scraped, 6)
+        self.assertEqual(ScrapedPage.objects.filter(session__parent_session=first, ingested=True).count(), 3)
+
+        second = ScraperPool(self.user, workers=2, cookie_file=self.cookie_file, engine='http').run(Aircraft.objects.all())
+        self.assertEqual(second.status, 'COMPLETED')
+        # The skipped pages still list their rows, all of them unchanged
+        self.assertEqual((second.tasks_scraped, second.work_packages_scraped), (6, 3))
+        self.assertEqual((second.rows_unchanged, second.rows_inserted, second.rows_updated), (9, 0, 0))
+        self.assertEqual(ScrapedPage.objects.filter(session__parent_session=second, unchanged=True).count(), 3)
+        # Every aircraft served the same page, so the cache holds one file
+        self.assertEqual(sum(len(files) for _, _, files in os.walk(self.cache_dir)), 1)
+
+        OpenTask.objects.all().delete()
+        replay = AircraftScrapingSession.objects.create(session_id='replay', user=self.user)
+        totals = replay_session(first, replay)
+        self.assertEqual(totals['pages'], 3)
+        self.assertEqual(totals['missing'], 0)
+        self.assertEqual(OpenTask.objects.count(), 6)
+
+    def sweep(self):
+        return ScraperPool(self.user, workers=2, cookie_file=self.cookie_file, engine='http').run(Aircraft.objects.all())
+
+    def test_newer_page_is_ingested_again_after_replaying_an_older_session(self):
+        first = self.sweep()
+        # Maintenix stops listing the cabin light task
+        start = AIRCRAFT_PAGE.index('  <tr><td>CABIN LIGHT INOP')
+        self.server.aircraft_page = AIRCRAFT_PAGE[:start] + AIRCRAFT_PAGE[AIRCRAFT_PAGE.index('</table>'):]
+        self.sweep()
+        self.assertEqual(OpenTask.objects.filter(task_id='TSFN0045DQF', task_status='COMPLETED').count(), 3)
+
+        replay = AircraftScrapingSession.objects.create(session_id='replay', user=self.user)
+        replay_session(first, replay)
+        self.assertEqual(OpenTask.objects.filter(task_id='TSFN0045DQF', task_status='IN_PROGRESS').count(), 3)
+        self.assertEqual(ScrapedPage.objects.filter(session=replay, ingested=True).count(), 3)
+
+        # The newer page no longer matches the rows the replay wrote, so it is parsed again
+        third = self.sweep()
+        self.assertEqual(ScrapedPage.objects.filter(session__parent_session=third, ingested=True).count(), 3)
+        self.assertEqual(third.rows_closed, 3)
+        self.assertEqual(OpenTask.objects.filter(task_id='TSFN0045DQF', task_status='COMPLETED').count(), 3)
+
+        fourth = self.sweep()
+        self.assertEqual(ScrapedPage.objects.filter(session__parent_session=fourth, unchanged=True).count(), 3)
+        self.assertEqual((fourth.tasks_scraped, fourth.rows_unchanged), (3, 6))
+
+
+class TracingTests(StandInFleetMixin, TransactionTestCase):
+
+    def test_sweep_writes_per_aircraft_phase_trace(self):
+        session = ScraperPool(self.user, workers=2, cookie_file=self.cookie_file, engine='http').run(Aircraft.objects.all())
+
+        self.assertTrue(session.log_file_path.startswith(self.trace_dir))
+        events = list(read_trace(session.log_file_path))
+        self.assertEqual([event['event'] for event in events][:2], ['start', 'pool'])
+        scrapes = [event for event in events if event['event'] == 'aircraft']
+        self.assertEqual(sorted(event['tail'] for event in scrapes), ['ET-AVI', 'ET-AVJ', 'ET-AVK'])
+        for event in scrapes:
+            self.assertEqual(event['status'], 'COMPLETED')
+            self.assertEqual(event['rows']['tasks'], 2)
+            self.assertLessEqual(
+                {'page_load', 'cache', 'parse', 'db_wait', 'db_write', 'total'}, set(event['phases'])
+            )
+
+        summary = summarize_traces([session.log_file_path])
+        scrape = summary['aircraft']
+        self.assertEqual(scrape['parse']['count'], 3)
+        self.assertLessEqual(scrape['parse']['p50'], scrape['parse']['p95'])
+        # A whole sweep's total is kept apart from the per-aircraft totals
+        self.assertEqual(scrape['total']['count'], 3)
+        self.assertEqual(summary['pool']['total']['count'], 1)
+        self.assertEqual(summary['_aircraft']['scrapes'], 3)
+        # Scraped tasks and work packages only, not the insert/update counts
+        self.assertEqual(summary['_aircraft']['rows'], 3 * (2 + 1))
+
+        out = io.StringIO()
+        call_command('scrape_trace_summary', session_ids=[session.session_id], stdout=out)
+        self.assertIn('9 rows', out.getvalue())
+        self.assertRegex(out.getvalue(), r'\npool +total +1 ')
+
+
+def write_cookie_file(path, session_id):
+    with open(path, 'wb') as file:
+        pickle.dump([{'name': 'JSESSIONID', 'value': session_id, 'domain': 'ethiopianairlines.com'}], file)
+
+
+class CookieManagerTests(MaintenixStandInMixin, SimpleTestCase):
+
+    def setUp(self):
+        super().setUp()
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        self.cookie_file = os.path.join(scratch.name, 'cookies.pkl')
+        self.probe_url = self.base_url + '/maintenix/common/ToDoList.jsp'
+        self.logins = 0
+
+    def relogin(self, cookie_file):
+        self.logins += 1
+        time.sleep(0.05)
+        write_cookie_file(cookie_file, 'fresh')
+
+    def test_validity_is_probed_once_per_ttl(self):
+        write_cookie_file(self.cookie_file, 'abc123')
+        manager = CookieManager(self.cookie_file, self.probe_url, ttl=0.2)
+
+        generation, jar = manager.validate()
+        manager.validate()
+        self.assertEqual(jar, {'JSESSIONID': 'abc123'})
+        self.assertEqual(manager.probes, 1)
+        # The probe stops after the first chunk of one page
+        self.assertEqual(len(self.server.requests), 1)
+
+        time.sleep(0.25)
+        manager.validate()
+        self.assertEqual(manager.probes, 2)
+
+    def test_expired_jar_is_renewed_once_for_all_workers(self):
+        write_cookie_file(self.cookie_file, 'abc123')
+        manager = CookieManager(self.cookie_file, self.probe_url, ttl=60, relogin=self.relogin)
+        generation, _ = manager.validate()
+        write_cookie_file(self.cookie_file, 'expired')
+        manager._load()
+        stale = manager.generation
+
+        results = []
+        workers = [threading.Thread(target=lambda: results.append(manager.renew(stale))) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        self.assertEqual(self.logins, 1)
+        self.assertEqual({jar['JSESSIONID'] for _, jar in results}, {'fresh'})
+        self.assertEqual(len({generation for generation, _ in results}), 1)
+
+    def test_failed_renewal_is_not_retried_until_the_file_changes(self):
+        write_cookie_file(self.cookie_file, 'expired')
+        manager = CookieManager(self.cookie_file, self.probe_url, ttl=60)
+
+        with self.assertRaises(MaintenixLoginRequired):
+            manager.validate()
+        with self.assertRaises(MaintenixLoginRequired):
+            manager.renew(manager.generation)
+        self.assertEqual(manager.probes, 1)
+
+        # Running the login script rewrites the file, which is picked up
+        write_cookie_file(self.cookie_file, 'abc123')
+        generation, jar = manager.validate()
+        self.assertEqual(jar, {'JSESSIONID': 'abc123'})
+
+
+class SweepCookieTests(StandInFleetMixin, TransactionTestCase):
+
+    def test_sweep_logs_in_again_once_when_cookies_expired(self):
+        write_cookie_file(self.cookie_file, 'expired')
+        logins = []
+        manager = CookieManager(self.cookie_file, relogin=lambda path: (logins.append(path), write_cookie_file(path, 'fresh')))
+
+        session = ScraperPool(self.user, workers=3, cookie_file=self.cookie_file, engine='http',
+                              cookie_manager=manager).run(Aircraft.objects.all())
+
+        self.assertEqual(session.status, 'COMPLETED')
+        self.assertEqual(len(logins), 1)
+        self.assertTrue(all('JSESSIONID=fresh' in cookie for _, cookie in self.server.requests[-3:]))
+
+    def test_sweep_fails_fast_without_a_login(self):
+        write_cookie_file(self.cookie_file, 'expired')
+
+        with self.assertRaises(MaintenixLoginRequired):
+            ScraperPool(self.user, cookie_file=self.cookie_file, engine='http').run(Aircraft.objects.all())
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(AircraftScrapingSession.objects.get().status, 'FAILED')
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+
+    def redirect_request(self, *args):
+        return None
+
+
+class FakeBrowser:
+    """Selenium driver stand-in: plain GETs carrying the cookies added to it, the login page on a redirect"""
+    # Sessions the server has dropped since the cookie probe
+    revoked = ()
+
+    def __init__(self):
+        self.cookies = {}
+        self.title = ''
+        self.page_source = ''
+        self.opener = urllib.request.build_opener(_NoRedirect)
+
+    def get(self, url):
+        cookies = {name: 'expired' if value in self.revoked else value for name, value in self.cookies.items()}
+        request = urllib.request.Request(url, headers={'Cookie': '; '.join(f"{k}={v}" for k, v in cookies.items())})
+        try:
+            with self.opener.open(request) as response:
+                self.title, self.page_source = 'Maintenix', response.read().decode('utf-8')
+        except urllib.error.HTTPError as e:
+            if e.code != 302:
+                raise
+            self.title, self.page_source = 'Login', LOGIN_PAGE
+
+    def delete_all_cookies(self):
+        self.cookies = {}
+
+    def add_cookie(self, cookie):
+        self.cookies[cookie['name']] = cookie['value']
+
+    def quit(self):
+        pass
+
+
+def fake_fetch_page_source(driver, url, timeout=10):
+    driver.get(url)
+    if '<table' not in driver.page_source:
+        raise TimeoutError("No tables rendered")
+    return driver.page_source
+
+
+class BrowserEngineTests(StandInFleetMixin, TransactionTestCase):
+    """The browser workers with Selenium stubbed out, against the same stand-in pages as the http engine"""
+
+    def sweep(self, engine, manager=None):
+        manager = manager or CookieManager(self.cookie_file)
+        with mock.patch('store.scrape.get_driver', lambda headless: FakeBrowser()), \
+                mock.patch('store.scrape.fetch_page_source', fake_fetch_page_source):
+            return ScraperPool(self.user, workers=3, cookie_file=self.cookie_file, engine=engine,
+                               cookie_manager=manager).run(Aircraft.objects.all())
+
+    def ingested(self):
+        skip = {'id', 'scraped_by', 'scraped_session', 'scraped_at'}
+        rows = {}
+        for model in (OpenTask, OpenWorkPackage):
+            fields = [field.attname for field in model._meta.concrete_fields if field.name not in skip]
+            rows[model.__name__] = sorted(model.objects.values_list(*fields))
+        return rows
+
+    def forget(self):
+        OpenTask.objects.all().delete()
+        OpenWorkPackage.objects.all().delete()
+        ScrapedPage.objects.all().delete()
+
+    def test_browser_and_http_ingest_identical_rows(self):
+        self.assertEqual(self.sweep('http').status, 'COMPLETED')
+        over_http = self.ingested()
+        self.forget()
+
+        session = self.sweep('browser')
+
+        self.assertEqual(session.status, 'COMPLETED')
+        self.assertEqual(len(over_http['OpenTask']), 6)
+        self.assertEqual(len(over_http['OpenWorkPackage']), 3)
+        self.assertEqual(self.ingested(), over_http)
+
+    def test_browser_renews_cookies_once_on_login_page(self):
+        logins = []
+        manager = CookieManager(self.cookie_file,
+                                relogin=lambda path: (logins.append(path), write_cookie_file(path, 'fresh')))
+
+        with mock.patch.object(FakeBrowser, 'revoked', ('abc123',)):
+            session = self.sweep('browser', manager)
+
+        self.assertEqual(session.status, 'COMPLETED')
+        self.assertEqual(len(logins), 1)
+        self.assertEqual(OpenTask.objects.count(), 6)
+        # Every aircraft page was loaded again with the renewed session
+        self.assertGreaterEqual(sum('JSESSIONID=fresh' in cookie for _, cookie in self.server.requests), 3)
+
+
+class DashboardStatsTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        now = timezone.now()
+        for task_id, status, priority, due in [
+            ('T1', 'OPEN', 'CRITICAL', now - timedelta(hours=1)),
+            ('T2', 'IN_PROGRESS', 'MEDIUM', now + timedelta(hours=3)),
+            ('T3', 'DEFERRED', 'LOW', now + timedelta(days=2)),
+            ('T4', 'COMPLETED', 'CRITICAL', now - timedelta(days=1)),
+        ]:
+            OpenTask.objects.create(aircraft=self.aircraft, task_id=task_id, task_name=task_id, inventory='x',
+                                    task_status=status, task_priority=priority, due_date=due)
+        OpenWorkPackage.objects.create(aircraft=self.aircraft, work_package_id='WP1', work_package_name='DAILY',
+                                       work_package_number='WO - 1', inventory='x', end_date=now - timedelta(hours=2))
+        OpenWorkPackage.objects.create(aircraft=self.aircraft, work_package_id='WP2', work_package_name='WEEKLY',
+                                       work_package_number='WO - 2', inventory='x', work_package_status='CLOSED')
+        AircraftAlert.objects.create(aircraft=self.aircraft, alert_type='SYSTEM', title='a', message='a')
+        AircraftAlert.objects.create(aircraft=self.aircraft, alert_type='SYSTEM', title='b', message='b',
+                                     acknowledged=True)
+        self.now = now
+
+    def test_refresh_is_set_based(self):
+        # Fleet ids, three GROUP BY aggregates and one upsert, whatever the fleet size
+        with self.assertNumQueries(5):
+            self.assertEqual(refresh_dashboard_stats(now=self.now), 2)
+
+        stats = AircraftDashboardStats.objects.get(aircraft=self.aircraft)
+        self.assertEqual((stats.total_open_tasks, stats.overdue_tasks, stats.critical_tasks), (3, 1, 1))
+        self.assertEqual((stats.total_open_work_packages, stats.overdue_work_packages), (1, 1))
+        self.assertEqual(stats.active_alerts, 1)
+        self.assertEqual(stats.next_task_due_date, self.now + timedelta(hours=3))
+        self.assertEqual(AircraftDashboardStats.objects.get(aircraft=self.other).total_open_tasks, 0)
+
+        OpenTask.objects.filter(task_id='T1').update(task_status='COMPLETED')
+        refresh_dashboard_stats([self.aircraft.pk], now=self.now)
+        stats.refresh_from_db()
+        self.assertEqual((stats.total_open_tasks, stats.overdue_tasks), (2, 0))
+
+    def test_completed_session_refreshes_stats_for_fleet_lists(self):
+        parent = AircraftScrapingSession.objects.create(session_id='p', user=self.user, status='IN_PROGRESS')
+        AircraftScrapingSession.objects.create(session_id='c', user=self.user, aircraft=self.aircraft,
+                                               parent_session=parent, status='COMPLETED')
+        finish_parent_session(parent)
+
+        with self.assertNumQueries(1):
+            plane = Aircraft.objects.select_related('dashboard_stats').get(pk=self.aircraft.pk)
+            self.assertEqual((plane.open_task_count, plane.open_work_package_count), (3, 1))
+        # Only the scraped aircraft was refreshed; the other falls back to counting
+        self.assertFalse(AircraftDashboardStats.objects.filter(aircraft=self.other).exists())
+        self.assertEqual(self.other.open_task_count, 0)
+
+
+class FleetOverviewTests(TestCase):
+
+    def setUp(self):
+        clear_query_cache()
+        self.addCleanup(clear_query_cache)
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        now = timezone.now()
+        for task_id, status, priority, due in [
+            ('T1', 'OPEN', 'CRITICAL', now - timedelta(hours=1)),
+            ('T2', 'IN_PROGRESS', 'MEDIUM', now + timedelta(hours=3)),
+            ('T3', 'COMPLETED', 'CRITICAL', now - timedelta(days=1)),
+        ]:
+            OpenTask.objects.create(aircraft=self.aircraft, task_id=task_id, task_name=task_id, inventory='x',
+                                    task_status=status, task_priority=priority, due_date=due)
+        OpenWorkPackage.objects.create(aircraft=self.aircraft, work_package_id='WP1', work_package_name='DAILY',
+                                       work_package_number='WO - 1', inventory='x', end_date=now - timedelta(hours=2))
+        self.other.current_status = 'MAINTENANCE'
+        self.other.save()
+
+    def test_counts_in_one_query(self):
+        with self.assertNumQueries(1):
+            fleet = {plane.tail_number: plane for plane in fleet_overview()}
+            self.assertEqual(fleet['ET-AVI'].model_group.name, 'B737_MAX')
+        plane = fleet['ET-AVI']
+        self.assertEqual((plane.open_task_total, plane.overdue_task_total, plane.critical_task_total), (2, 1, 1))
+        self.assertEqual((plane.open_work_package_total, plane.overdue_work_package_total), (1, 1))
+        self.assertEqual(fleet['ET-AVJ'].open_task_total, 0)
+
+    def test_query_count_is_flat_as_the_fleet_grows(self):
+        for number in range(20):
+            plane = Aircraft.objects.create(model_group=self.model_group, tail_number=f"ET-X{number:02}",
+                                            registration=f"ET-X{number:02}", maintenix_inventory_id=f"4650:{number}")
+            OpenTask.objects.create(aircraft=plane, task_id='T', task_name='T', inventory='x')
+        with self.assertNumQueries(1):
+            self.assertEqual(len(list(fleet_overview())), 22)
+
+    def test_api_filters(self):
+        self.client.force_login(self.user)
+        data = self.client.get('/api/fleet-overview/', {'status': 'maintenance'}).json()
+        self.assertEqual([plane['tail_number'] for plane in data['aircraft']], ['ET-AVJ'])
+        data = self.client.get('/api/fleet-overview/', {'model_group': 'A350,B737_MAX'}).json()
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(data['aircraft'][0]['overdue_tasks'], 1)
+        self.assertEqual(self.client.get('/api/fleet-overview/', {'model_group': 'A350'}).json()['count'], 0)
+
+
+class TaskPageTests(TestCase):
+
+    def setUp(self):
+        clear_query_cache()
+        self.addCleanup(clear_query_cache)
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        now = timezone.now()
+        # Pairs of tasks share a due date so the id breaks ties; every fifth task is undated
+        for number in range(25):
+            OpenTask.objects.create(
+                aircraft=self.aircraft if number % 2 else self.other, task_id=f"T{number}", task_name='x',
+                inventory='x', due_date=None if number % 5 == 4 else now + timedelta(hours=number // 2),
+                task_priority='HIGH' if number % 3 else 'LOW', etops_significant=number % 4 == 0,
+            )
+
+    def walk(self, tasks, limit):
+        seen, cursor = [], None
+        while True:
+            page, cursor = task_page(tasks, cursor, limit)
+            seen.extend(page)
+            if cursor is None:
+                return seen
+
+    def test_pages_follow_due_date_then_id_with_undated_last(self):
+        expected = sorted(OpenTask.objects.filter(due_date__isnull=False), key=lambda t: (t.due_date, t.pk))
+        expected += list(OpenTask.objects.filter(due_date__isnull=True).order_by('pk'))
+        for limit in (1, 4, 7, 100):
+            self.assertEqual(self.walk(filter_tasks(), limit), expected)
+
+        high = self.walk(filter_tasks(aircraft=['ET-AVI'], priorities=['HIGH']), 3)
+        self.assertEqual({(t.aircraft_id, t.task_priority) for t in high}, {(self.aircraft.pk, 'HIGH')})
+
+    def test_deep_pages_cost_the_same(self):
+        _, cursor = task_page(filter_tasks(), None, 18)
+        # Dated range, undated range, then the page's aircraft
+        with self.assertNumQueries(3):
+            page, _ = task_page(filter_tasks(), cursor, 5)
+        # The last two dated tasks, then the first undated ones
+        self.assertEqual([t.due_date is None for t in page], [False, False, True, True, True])
+
+    def dated_plan(self, filters, cursor):
+        """EXPLAIN QUERY PLAN of the dated-range query task_page() runs for ``filters``"""
+        with CaptureQueriesContext(connection) as queries:
+            task_page(filter_tasks(**filters), cursor, 3)
+        with connection.cursor() as db:
+            db.execute('EXPLAIN QUERY PLAN ' + queries[0]['sql'])
+            return '\n'.join(row[-1] for row in db.fetchall())
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite's")
+    def test_every_filter_is_an_index_range_scan(self):
+        _, cursor = task_page(filter_tasks(), None, 6)
+        now = timezone.now()
+        for filters, values in [
+            ({}, 1),
+            ({'aircraft': ['ET-AVI']}, 1),
+            ({'due_from': now, 'due_to': now + timedelta(days=1)}, 1),
+            ({'priorities': ['HIGH']}, 1),
+            ({'work_types': ['LINE']}, 1),
+            ({'etops_significant': True}, 1),
+            ({'soft_deadline': False}, 1),
+            ({'aircraft': ['ET-AVI', 'ET-AVJ']}, 2),
+            ({'priorities': ['HIGH', 'LOW']}, 2),
+            ({'work_types': ['LINE', 'BASE']}, 2),
+        ]:
+            for page_cursor in (None, cursor):
+                plan = self.dated_plan(filters, page_cursor)
+                self.assertIn('SEARCH store_opentask USING', plan, filters)
+                self.assertNotIn('SCAN store_opentask', plan, filters)
+                self.assertNotIn('MULTI-INDEX OR', plan, filters)
+                if 'aircraft' not in filters:
+                    # A join stops SQLite from ending each value's range early
+                    self.assertNotIn('store_aircraft', plan, filters)
+                if values == 1:
+                    self.assertNotIn('TEMP B-TREE', plan, filters)
+
+    def test_api(self):
+        self.client.force_login(self.user)
+        data = self.client.get('/api/tasks/', {'aircraft': 'ET-AVI', 'etops_significant': 'false', 'limit': 5}).json()
+        self.assertEqual(len(data['tasks']), 5)
+        rest = self.client.get('/api/tasks/', {'aircraft': 'ET-AVI', 'etops_significant': 'false',
+                                               'cursor': data['next_cursor']}).json()
+        self.assertEqual(len(data['tasks']) + len(rest['tasks']), 12)
+        self.assertIsNone(rest['next_cursor'])
+        self.assertEqual(self.client.get('/api/tasks/', {'cursor': 'nonsense'}).status_code, 400)
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        for aircraft, task_id, name, driving in [
+            (self.aircraft, 'T1', 'ENGINE OIL SERVICING', ''),
+            (self.aircraft, 'T2', 'CABIN LIGHTING CHECK', 'ENGINE RUN'),
+            (self.other, 'T3', 'ENGINE OIL SERVICING', ''),
+        ]:
+            OpenTask.objects.create(aircraft=aircraft, task_id=task_id, task_name=name, driving_task_name=driving,
+                                    inventory='x')
+        OpenWorkPackage.objects.create(aircraft=self.aircraft, work_package_id='WP1', work_package_name='ENGINE CHANGE',
+                                       work_package_number='WO - 26538344', inventory='x')
+
+    def test_prefix_matching_ranking_and_scoping(self):
+        results = search('eng oil')
+        self.assertEqual({row.task_id for _, row, _ in results}, {'T1', 'T3'})
+
+        # Every kind is searched; the driving task name is indexed too
+        self.assertEqual(len(search('engine')), 4)
+        self.assertEqual([kind for kind, _, _ in search('engine', kinds=['work_package'])], ['work_package'])
+        self.assertEqual(search('26538344')[0][1].work_package_id, 'WP1')
+        scoped = search('engine', aircraft=['ET-AVJ'])
+        self.assertEqual([row.task_id for _, row, _ in scoped], ['T3'])
+        self.assertEqual(search('engine', model_groups=['A350']), [])
+        self.assertEqual(search('"*:'), [])
+
+        # A task named after the words ranks above one that only mentions them in its driving task
+        ranked = [row.task_id for kind, row, _ in search('engine', kinds=['task'], aircraft=['ET-AVI'])]
+        self.assertEqual(ranked, ['T1', 'T2'])
+
+    def test_index_follows_ingestion(self):
+        ingest_aircraft(self.aircraft, [
+            task_row('T1', task_name='HYDRAULIC FILTER REPLACEMENT'), task_row('T9', task_name='WHEEL CHANGE'),
+        ], [work_package_row('WP1', work_package_name='ENGINE CHANGE')], mode='sync')
+        self.assertEqual([row.task_id for _, row, _ in search('hydraul')], ['T1'])
+        self.assertEqual([row.task_id for _, row, _ in search('wheel')], ['T9'])
+        self.assertEqual([row.task_id for _, row, _ in search('oil servicing')], ['T3'])
+        # Closed by the sync, so only found when closed rows are included
+        self.assertEqual(search('cabin', open_only=True), [])
+        self.assertEqual(len(search('cabin')), 1)
+
+        OpenTask.objects.filter(task_id='T9').delete()
+        self.assertEqual(search('wheel'), [])
+
+    def test_api(self):
+        self.client.force_login(self.user)
+        data = self.client.get('/api/search/', {'q': 'engi', 'model_group': 'B737_MAX', 'kind': 'task'}).json()
+        self.assertEqual(len(data['results']), 3)
+        self.assertEqual(data['results'][0]['model_group'], 'B737_MAX')
+        self.assertEqual(self.client.get('/api/search/', {'q': ''}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'x', 'kind': 'alert'}).status_code, 400)
+
+
+class WorkPackageTaskIndexTests(TestCase):
+
+    def setUp(self):
+        clear_task_index_cache()
+        self.addCleanup(clear_task_index_cache)
+        self.user, self.model_group, fleet = create_fleet()
+        for aircraft in fleet:
+            for number in range(30):
+                OpenWorkPackage.objects.create(aircraft=aircraft, work_package_id=f"WP{number}",
+                                               work_package_name='x', work_package_number='x', inventory='x')
+                for task in range(number % 3):
+                    OpenTask.objects.create(aircraft=aircraft, task_id=f"T{number}-{task}", task_name='x',
+                                            inventory='x', work_package_id=f"WP{number}")
+        OpenTask.objects.create(aircraft=fleet[0], task_id='LOOSE', task_name='x', inventory='x')
+        self.aircraft = fleet[0]
+
+    def test_listing_costs_the_same_whatever_the_number_of_work_packages(self):
+        expected = {wp.pk: list(wp.associated_tasks) for wp in OpenWorkPackage.objects.all()}
+        # Work packages, the session version and the one task index query
+        with self.assertNumQueries(3):
+            work_packages = prefetch_associated_tasks(OpenWorkPackage.objects.all())
+            self.assertEqual({wp.pk: wp.associated_tasks for wp in work_packages}, expected)
+        self.assertEqual(sum(len(tasks) for tasks in expected.values()), 60)
+
+        # Cached until a scraping session completes
+        with self.assertNumQueries(2):
+            prefetch_associated_tasks(OpenWorkPackage.objects.all())
+
+        OpenTask.objects.create(aircraft=self.aircraft, task_id='NEW', task_name='x', inventory='x',
+                                work_package_id='WP0')
+        AircraftScrapingSession.objects.create(session_id='s', user=self.user, status='COMPLETED',
+                                               completed_at=timezone.now())
+        work_packages = prefetch_associated_tasks(OpenWorkPackage.objects.filter(aircraft=self.aircraft,
+                                                                                 work_package_id='WP0'))
+        self.assertEqual([task.task_id for task in work_packages[0].associated_tasks], ['NEW'])
+
+
+class TaskCardIndexTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        self.work_package = OpenWorkPackage.objects.create(
+            aircraft=self.aircraft, work_package_id='WP1', work_package_name='A-CHECK <heavy>',
+            work_package_number='WO - 26538344', inventory='x')
+        for number in range(1200, 0, -1):
+            OpenTask.objects.create(aircraft=self.aircraft, task_id=f"T{number:04}", task_name=f"TASK {number}",
+                                    inventory='x', work_package_id='WP1', etops_significant=number == 1)
+        # Same work package id on another aircraft, and a task of no work package
+        OpenTask.objects.create(aircraft=self.other, task_id='T0001', task_name='x', inventory='x',
+                                work_package_id='WP1')
+        OpenTask.objects.create(aircraft=self.aircraft, task_id='LOOSE', task_name='x', inventory='x')
+
+    def test_csv_is_numbered_in_task_order_and_read_in_chunks(self):
+        # One query, whose rows are fetched and yielded 500 at a time
+        with self.assertNumQueries(1):
+            chunks = list(csv_index(self.work_package, chunk_size=500))
+        self.assertEqual(len(chunks), 4)
+        lines = ''.join(chunks).splitlines()
+        self.assertEqual(len(lines), 1201)
+        self.assertTrue(lines[0].startswith('No.,Task ID,Task,'))
+        self.assertTrue(lines[1].startswith('1,T0001,TASK 1,'))
+        self.assertIn(',Yes,', lines[1])
+        self.assertTrue(lines[-1].startswith('1200,T1200,'))
+
+    def test_html_is_escaped(self):
+        page = ''.join(html_index(self.work_package))
+        self.assertIn('A-CHECK &lt;heavy&gt;', page)
+        self.assertEqual(page.count('<tr>'), 1201)
+        self.assertTrue(page.endswith('</table></body></html>'))
+
+    def test_views_stream(self):
+        self.client.force_login(self.user)
+        response = self.client.get(f'/indexGen/{self.work_package.pk}/csv/')
+        self.assertTrue(response.streaming)
+        self.assertIn('ET-AVI-WP1-index.csv', response['Content-Disposition'])
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 1201)
+        self.assertTrue(self.client.get(f'/indexGen/{self.work_package.pk}/html/').streaming)
+        self.assertEqual(self.client.get(f'/indexGen/{self.work_package.pk}/pdf/').status_code, 404)
+        self.assertContains(self.client.get('/indexGen/'), 'WO - 26538344')
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        due = timezone.make_aware(datetime(2026, 10, 16, 8))
+        OpenTask.objects.bulk_create(
+            OpenTask(aircraft=self.aircraft if number % 2 else self.other, task_id=f"T{number}", task_name='x, "y"',
+                     inventory='x', due_date=due + timedelta(days=number) if number < 50 else None,
+                     etops_significant=number == 1)
+            for number in range(100)
+        )
+        OpenWorkPackage.objects.create(aircraft=self.aircraft, work_package_id='WP1', work_package_name='x',
+                                       work_package_number='x', inventory='x', start_date=due)
+        AircraftFlightSchedule.objects.create(flight_date=due.date(), current_tail_scheduled='ATQ',
+                                              current_flight_number='ET1', flight_destination='NBO',
+                                              scheduled_departure_time=clock(9, 30))
+
+    def test_rows_are_read_in_chunks_and_filtered(self):
+        # One query, fetched 30 rows at a time
+        with self.assertNumQueries(1):
+            chunks = list(export_rows('tasks', chunk_size=30))
+        self.assertEqual([len(chunk) for chunk in chunks], [30, 30, 30, 10])
+
+        rows = [row for chunk in export_rows('tasks', aircraft=['ET-AVI']) for row in chunk]
+        self.assertEqual(len(rows), 50)
+        self.assertEqual(rows[0][1:3], ('ET-AVI', 'B737_MAX'))
+        moment = timezone.make_aware(datetime(2026, 10, 20))
+        self.assertEqual(sum(map(len, export_rows('tasks', date_from=moment, date_to=moment + timedelta(days=2)))), 2)
+        self.assertEqual(list(export_rows('tasks', model_groups=['A350'])), [])
+        # Flights of tails outside the fleet have no aircraft
+        self.assertEqual(list(export_rows('flights', date_from=moment)), [])
+
+    def test_date_only_to_includes_the_whole_day(self):
+        # T2 is due at 08:00 on 18 October, T3 on the 19th
+        last_day = [row for chunk in export_rows('tasks', date_from=date(2026, 10, 17), date_to=date(2026, 10, 18))
+                    for row in chunk]
+        self.assertEqual(sorted(row[3] for row in last_day), ['T1', 'T2'])
+        # A date-time bound is still exact
+        moment = timezone.make_aware(datetime(2026, 10, 18))
+        self.assertEqual(sum(map(len, export_rows('tasks', date_to=moment))), 2)
+        self.assertEqual(sum(map(len, export_rows('flights', date_to=date(2026, 10, 16)))), 1)
+
+        scratch = tempfile.TemporaryDirectory()
+        self.addCleanup(scratch.cleanup)
+        path = os.path.join(scratch.name, 'tasks.csv')
+        call_command('export_data', 'tasks', '--from', '2026-10-18', '--to', '2026-10-18', '--output', path,
+                     stdout=io.StringIO())
+        with open(path, newline='') as file:
+            self.assertEqual([row['task_id'] for row in csv.DictReader(file)], ['T2'])
+        self.assertIsNone(next(export_rows('flights'))[0][1])
+        with self.assertRaises(ValueError):
+            export('aircraft', 'csv')
+        with self.assertRaises(ValueError):
+            export('tasks', 'xlsx')
+
+    def test_csv_and_jsonl(self):
+        rows = list(csv.DictReader(io.StringIO(b''.join(export('tasks', 'csv', chunk_size=30)).decode())))
+        self.assertEqual(len(rows), 100)
+        self.assertEqual(rows[1]['task_name'], 'x, "y"')
+        self.assertEqual(rows[1]['due_date'], '2026-10-17T08:00:00+00:00')
+        self.assertEqual(rows[60]['due_date'], '')
+
+        lines = b''.join(export('flights', 'jsonl')).decode().splitlines()
+        self.assertEqual(json.loads(lines[0])['scheduled_departure_time'], '09:30:00')
+        self.assertEqual(b''.join(export('tasks', 'csv', aircraft=['ET-XXX'])).decode().count('\n'), 1)
+
+    @unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow is not installed")
+    def test_parquet_row_groups(self):
+        import pyarrow.parquet as pq
+
+        table = pq.ParquetFile(io.BytesIO(b''.join(export('tasks', 'parquet', chunk_size=30))))
+        self.assertEqual(table.metadata.num_row_groups, 4)
+        tasks = table.read()
+        self.assertEqual(tasks.num_rows, 100)
+        self.assertEqual(str(tasks.schema.field('due_date').type), 'timestamp[us, tz=UTC]')
+        self.assertEqual(tasks.column('etops_significant').to_pylist().count(True), 1)
+        flights = pq.read_table(io.BytesIO(b''.join(export('flights', 'parquet'))))
+        self.assertEqual(str(flights.column('flight_date')[0]), '2026-10-16')
+
+    def test_memory_does_not_grow_with_the_row_count(self):
+        def peak(tail):
+            tracemalloc.start()
+            for _ in export('tasks', 'csv', aircraft=[tail], chunk_size=10):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            return peak
+
+        OpenTask.objects.bulk_create(
+            OpenTask(aircraft=self.aircraft, task_id=f"BULK{number}", task_name='x' * 200, inventory='x')
+            for number in range(2000)
+        )
+        # 50 rows against 2050: the peak is set by the chunk size, not the row count
+        self.assertLess(peak('ET-AVI'), 2 * peak('ET-AVJ'))
+
+    def test_api_and_command(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/api/export/tasks/', {'format': 'jsonl', 'aircraft': 'ET-AVJ'})
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 50)
+        self.assertEqual(self.client.get('/api/export/aircraft/').status_code, 400)
+        self.assertEqual(self.client.get('/api/export/tasks/', {'from': 'soon'}).status_code, 400)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'work_packages.csv')
+            call_command('export_data', 'work_packages', '--output', path, '--tail', 'ET-AVI', stdout=io.StringIO())
+            with open(path) as file:
+                self.assertEqual(len(file.read().splitlines()), 2)
+
+
+@unittest.skipIf(importlib.util.find_spec('pyarrow') is None, "pyarrow is not installed")
+class SnapshotTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.enterContext(override_settings(SNAPSHOT_DIR=directory.name))
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        for aircraft, count in ((self.aircraft, 5), (self.other, 2)):
+            for number in range(count):
+                OpenTask.objects.create(aircraft=aircraft, task_id=f"T{number}", task_name='x', inventory='x')
+        OpenWorkPackage.objects.create(aircraft=self.aircraft, work_package_id='WP1', work_package_name='x',
+                                       work_package_number='x', inventory='x')
+        self.march = [date(2026, 3, day) for day in (1, 2, 3)]
+
+        # Day two: two tasks on ET-AVI are completed and ET-AVJ gets three more
+        self.assertEqual(write_snapshot(self.march[0]), {'tasks': 7, 'work_packages': 1})
+        OpenTask.objects.filter(aircraft=self.aircraft, task_id__in=['T0', 'T1']).update(task_status='COMPLETED')
+        for number in range(2, 5):
+            OpenTask.objects.create(aircraft=self.other, task_id=f"T{number}", task_name='x', inventory='x')
+        # Finished rows aren't archived again
+        self.assertEqual(write_snapshot(self.march[1]), {'tasks': 8, 'work_packages': 1})
+
+    def test_point_in_time(self):
+        self.assertEqual(open_counts_on(self.march[0]), (self.march[0], {'ET-AVI': 5, 'ET-AVJ': 2}))
+        # No snapshot on the 3rd, so the latest one before it answers
+        self.assertEqual(open_counts_on(self.march[2], aircraft=['ET-AVI']), (self.march[1], {'ET-AVI': 3}))
+        self.assertEqual(open_counts_on(date(2026, 2, 28)), (None, {}))
+        self.assertEqual(open_counts_on(self.march[1], by='model_group')[1], {'B737_MAX': 8})
+        self.assertEqual(open_counts_on(self.march[1], name='work_packages')[1], {'ET-AVI': 1})
+
+        snapshot_date, table = snapshot_on('tasks', self.march[1], open_only=False)
+        self.assertEqual(table.num_rows, 8)
+        # Past answers come from the files alone
+        OpenTask.objects.all().delete()
+        with self.assertNumQueries(0):
+            self.assertEqual(open_counts_on(self.march[0])[1], {'ET-AVI': 5, 'ET-AVJ': 2})
+
+    def test_trend_reads_only_the_partitions_in_range(self):
+        self.assertEqual(open_trend(*self.march[:2]), {
+            self.march[0]: {'ET-AVI': 5, 'ET-AVJ': 2},
+            self.march[1]: {'ET-AVI': 3, 'ET-AVJ': 5},
+        })
+        self.assertEqual(list(open_trend(self.march[1], self.march[2])), [self.march[1]])
+        # Rewriting a day replaces its partition
+        OpenTask.objects.filter(aircraft=self.other).delete()
+        write_snapshot(self.march[1])
+        self.assertEqual(snapshot_dates('tasks'), self.march[:2])
+        self.assertEqual(open_trend(self.march[1], self.march[1]), {self.march[1]: {'ET-AVI': 3}})
+
+    def test_api(self):
+        self.client.force_login(self.user)
+        data = self.client.get('/api/snapshots/', {'date': '2026-03-02', 'aircraft': 'ET-AVJ'}).json()
+        self.assertEqual(data['counts'], {'ET-AVJ': 5})
+        data = self.client.get('/api/snapshots/', {'from': '2026-03-01', 'to': '2026-03-31'}).json()
+        self.assertEqual([day['snapshot_date'] for day in data['trend']], ['2026-03-01', '2026-03-02'])
+        self.assertEqual(self.client.get('/api/snapshots/', {'from': '2026-03-01'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/snapshots/', {'date': '2026-03-01', 'by': 'x'}).status_code, 400)
+
+
+# Bumps the data version of the cache configured in argv[1]
+BUMP_IN_ANOTHER_PROCESS = """
+import json, sys
+import django
+django.setup()
+from django.test.utils import override_settings
+from store.query_cache import bump_data_version
+with override_settings(CACHES=json.loads(sys.argv[1])):
+    print(bump_data_version())
+"""
+
+
+class QueryCacheTests(TestCase):
+
+    def setUp(self):
+        clear_query_cache()
+        self.addCleanup(clear_query_cache)
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        OpenTask.objects.create(aircraft=self.aircraft, task_id='T1', task_name='x', inventory='x',
+                                due_date=timezone.now() - timedelta(hours=1))
+        self.client.force_login(self.user)
+
+    def overview(self):
+        return {plane['tail_number']: plane['open_tasks']
+                for plane in self.client.get('/api/fleet-overview/').json()['aircraft']}
+
+    def test_reads_are_served_until_a_session_completes(self):
+        with CaptureQueriesContext(connection) as cold:
+            self.assertEqual(self.overview(), {'ET-AVI': 1, 'ET-AVJ': 0})
+        # Only the session and user lookups of the login are left
+        with CaptureQueriesContext(connection) as warm:
+            self.assertEqual(self.overview(), {'ET-AVI': 1, 'ET-AVJ': 0})
+        self.assertLess(len(warm), len(cold))
+        self.assertFalse(any('store_opentask' in query['sql'] for query in warm))
+
+        # Until then the data can't have changed, so a write behind the scrapers' back isn't seen
+        OpenTask.objects.create(aircraft=self.other, task_id='T2', task_name='x', inventory='x')
+        self.assertEqual(self.overview(), {'ET-AVI': 1, 'ET-AVJ': 0})
+        version = data_version()
+        session = AircraftScrapingSession.objects.create(session_id='s', user=self.user, status='COMPLETED',
+                                                         completed_at=timezone.now())
+        send_session_completed(session)
+        self.assertGreater(data_version(), version)
+        self.assertEqual(self.overview(), {'ET-AVI': 1, 'ET-AVJ': 1})
+
+        stats = self.client.get('/api/cache-stats/').json()
+        self.assertEqual(stats['by_name'], {'fleet_overview': {'hits': 2, 'misses': 2}})
+        self.assertEqual(stats['hit_rate'], 0.5)
+
+    def test_query_strings_and_errors(self):
+        self.client.get('/api/fleet-overview/', {'status': 'ACTIVE'})
+        self.client.get('/api/fleet-overview/', {'status': 'STORED'})
+        # A bad request is answered again rather than cached
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/ground-windows/', {'start': 'x', 'end': 'y'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/cache-stats/').json()['by_name'], {
+            'fleet_overview': {'hits': 0, 'misses': 2},
+            'ground_windows': {'hits': 0, 'misses': 2},
+        })
+
+    def test_schedule_imports_and_lost_versions_start_a_new_namespace(self):
+        version = data_version()
+        import_schedule(iter_csv_rows(['DATE,FROM,STA,PTAIL,TAIL,FLT,DEST,STD',
+                                       '16-OCT-2026,NBO,06:10,AVI,AVI,ET308,JIB,07:35']))
+        self.assertGreater(data_version(), version)
+        version = bump_data_version()
+        # An evicted version restarts from the clock instead of an older number
+        clear_query_cache()
+        self.assertGreater(data_version(), version)
+
+    def test_a_bump_in_another_process_is_seen_here(self):
+        version = data_version()
+        # As a scraper or schedule import running beside the web server would
+        bumped = subprocess.run(
+            [sys.executable, '-c', BUMP_IN_ANOTHER_PROCESS, json.dumps(settings.CACHES)],
+            capture_output=True, text=True, check=True,
+        )
+        self.assertEqual(data_version(), int(bumped.stdout))
+        self.assertGreater(data_version(), version)
+
+
+class DueHorizonTests(TestCase):
+
+    def setUp(self):
+        clear_query_cache()
+        self.addCleanup(clear_query_cache)
+        clear_due_columns_cache()
+        self.addCleanup(clear_due_columns_cache)
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        self.now = timezone.now()
+        for number, hours in enumerate([-30, -1, 2, 30, 50, 100, 24 * 20, 24 * 40, None, 5]):
+            OpenTask.objects.create(
+                aircraft=self.aircraft if number % 2 else self.other, task_id=f"T{number}", task_name='x',
+                inventory='x', task_priority='CRITICAL' if number < 3 else 'LOW',
+                due_date=self.now + timedelta(hours=hours) if hours is not None else None,
+                task_status='COMPLETED' if number == 9 else 'OPEN',
+            )
+
+    def test_buckets_match_the_per_task_properties(self):
+        report = due_horizon(now=self.now)
+        self.assertEqual(report['buckets'], BUCKETS)
+        self.assertEqual(dict(zip(BUCKETS, report['totals'])),
+                         {'overdue': 2, '0-1d': 1, '1-3d': 2, '3-7d': 1, '7-30d': 1, '30d+': 1, 'undated': 1})
+        open_tasks = OpenTask.objects.exclude(task_status='COMPLETED')
+        self.assertEqual(report['overdue'], sum(task.is_overdue for task in open_tasks))
+        self.assertEqual(report['due_within'], {'1': 1, '3': 3, '7': 4, '30': 5})
+        self.assertEqual(report['by_priority']['CRITICAL'], [2, 1, 0, 0, 0, 0, 0])
+        self.assertEqual(sum(report['by_aircraft']['ET-AVI']), 4)
+        self.assertEqual(report['by_model_group']['B737_MAX'], report['totals'])
+
+    def test_columns_are_cached_until_the_next_session(self):
+        due_horizon(now=self.now)
+        # The session version, then only the tail and model group lookup
+        with self.assertNumQueries(2):
+            self.assertEqual(due_horizon([self.aircraft.pk], now=self.now)['total'], 4)
+
+        OpenTask.objects.create(aircraft=self.aircraft, task_id='NEW', task_name='x', inventory='x')
+        self.assertEqual(due_horizon(now=self.now)['total'], 9)
+        AircraftScrapingSession.objects.create(session_id='s', user=self.user, status='COMPLETED',
+                                               completed_at=timezone.now())
+        self.assertEqual(due_horizon(now=self.now)['total'], 10)
+
+    def test_api(self):
+        self.client.force_login(self.user)
+        data = self.client.get('/api/due-horizon/', {'aircraft': 'ET-AVJ'}).json()
+        self.assertEqual(data['total'], 5)
+        self.assertEqual(list(data['by_aircraft']), ['ET-AVJ'])
+        self.assertEqual(self.client.get('/api/due-horizon/', {'model_group': 'A350'}).json()['total'], 0)
+
+
+class AlertEngineTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.aircraft, self.other) = create_fleet()
+        self.now = timezone.now()
+        for aircraft, task_id, priority, hours in [
+            (self.aircraft, 'T1', 'CRITICAL', -1),   # overdue and critical
+            (self.aircraft, 'T2', 'HIGH', -5),       # overdue
+            (self.aircraft, 'T3', 'CRITICAL', 24),   # critical
+            (self.aircraft, 'T4', 'LOW', 24),
+            (self.other, 'T5', 'MEDIUM', -2),        # overdue
+        ]:
+            OpenTask.objects.create(aircraft=aircraft, task_id=task_id, task_name=task_id, inventory='x',
+                                    task_priority=priority, due_date=self.now + timedelta(hours=hours))
+        OpenWorkPackage.objects.create(aircraft=self.aircraft, work_package_id='WP1', work_package_name='DAILY',
+                                       work_package_number='WO - 1', inventory='x',
+                                       end_date=self.now - timedelta(hours=1))
+
+    def active(self):
+        return sorted(AircraftAlert.objects.filter(is_active=True).values_list(
+            'alert_type', 'related_task__task_id', 'related_work_package__work_package_id'), key=str)
+
+    def test_rules_and_idempotence(self):
+        self.assertEqual(generate_alerts(now=self.now), {'created': 6, 'resolved': 0})
+        self.assertEqual(self.active(), sorted([
+            ('CRITICAL_TASK', 'T1', None), ('CRITICAL_TASK', 'T3', None),
+            ('OVERDUE_TASK', 'T1', None), ('OVERDUE_TASK', 'T2', None), ('OVERDUE_TASK', 'T5', None),
+            ('OVERDUE_WORK_PACKAGE', None, 'WP1'),
+        ], key=str))
+        self.assertEqual(AircraftAlert.objects.get(alert_type='OVERDUE_TASK', related_task__task_id='T5').priority,
+                         'MEDIUM')
+
+        # Active alerts plus one query per rule, and nothing written
+        with self.assertNumQueries(4):
+            self.assertEqual(generate_alerts(now=self.now), {'created': 0, 'resolved': 0})
+        self.assertEqual(AircraftAlert.objects.count(), 6)
+
+    def test_cleared_conditions_and_duplicates_are_resolved(self):
+        generate_alerts(now=self.now)
+        OpenTask.objects.filter(task_id='T1').update(task_status='COMPLETED')
+        OpenWorkPackage.objects.filter(work_package_id='WP1').update(end_date=self.now + timedelta(days=1))
+        duplicate = AircraftAlert.objects.create(aircraft=self.aircraft, alert_type='OVERDUE_TASK', title='x',
+                                                 message='x', related_task=OpenTask.objects.get(task_id='T2'))
+
+        later = self.now + timedelta(minutes=5)
+        self.assertEqual(generate_alerts(now=later), {'created': 0, 'resolved': 4})
+        duplicate.refresh_from_db()
+        self.assertEqual((duplicate.is_active, duplicate.resolved_at), (False, later))
+        self.assertEqual(self.active(), sorted([
+            ('CRITICAL_TASK', 'T3', None), ('OVERDUE_TASK', 'T2', None), ('OVERDUE_TASK', 'T5', None),
+        ], key=str))
+
+        # Only the given aircraft are looked at
+        OpenTask.objects.filter(task_id='T5').update(task_status='COMPLETED')
+        self.assertEqual(generate_alerts([self.aircraft.pk], now=later), {'created': 0, 'resolved': 0})
+        self.assertEqual(generate_alerts([self.other.pk], now=later), {'created': 0, 'resolved': 1})
+
+    def test_completed_session_raises_alerts(self):
+        parent = AircraftScrapingSession.objects.create(session_id='p', user=self.user, status='IN_PROGRESS')
+        AircraftScrapingSession.objects.create(session_id='c', user=self.user, aircraft=self.other,
+                                               parent_session=parent, status='COMPLETED')
+        finish_parent_session(parent)
+        self.assertEqual(self.active(), [('OVERDUE_TASK', 'T5', None)])
+        self.assertEqual(AircraftDashboardStats.objects.get(aircraft=self.other).active_alerts, 1)
+
+
+class PlannerTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.avi, self.avj, self.avk) = create_fleet(('ET-AVI', 'ET-AVJ', 'ET-AVK'))
+        self.day = timezone.localdate()
+        for previous_tail, arrival, tail, departure in [
+            ('ET-AVI', clock(6), 'ET-AVI', clock(8)),
+            ('ET-AVI', clock(14), 'ET-AVJ', clock(15)),   # tail swap
+            ('ET-AVJ', clock(22), 'ET-AVI', clock(5)),    # overnight, leaves the next morning
+        ]:
+            AircraftFlightSchedule.objects.create(
+                flight_date=self.day, previous_tail_scheduled=previous_tail, scheduled_arrival_time=arrival,
+                current_tail_scheduled=tail, scheduled_departure_time=departure,
+                current_flight_number='ET1', flight_destination='NBO',
+            )
+        rebuild_ground_windows([self.day])
+
+    def at(self, hour, days=0):
+        return timezone.make_aware(datetime.combine(self.day + timedelta(days=days), clock(hour)))
+
+    def task(self, aircraft, task_id, due, priority='MEDIUM'):
+        return OpenTask.objects.create(aircraft=aircraft, task_id=task_id, task_name=task_id, inventory='x',
+                                       due_date=due, task_priority=priority).pk
+
+    def test_ground_windows_pair_arrivals_with_the_next_departure(self):
+        windows = plan_line_maintenance(self.day, self.day)['windows']
+        self.assertEqual([(w.start, w.end) for w in windows[self.avi.pk]],
+                         [(self.at(6), self.at(8)), (self.at(14), self.at(5, days=1))])
+        # A departure with no arrival before it opens no window, as in the
+        # GroundWindow index; the 22:00 arrival stays until the schedule ends
+        self.assertEqual([(w.start, w.end) for w in windows[self.avj.pk]], [(self.at(22), self.at(0, days=1))])
+        self.assertEqual(windows[self.avi.pk][0].station, 'ADD')
+        self.assertEqual(
+            {(w.aircraft_id, w.start, w.end) for planned in windows.values() for w in planned},
+            {(w.aircraft_id, w.start_at, w.end_at) for w in GroundWindow.objects.all()},
+        )
+
+    def test_tasks_go_to_the_latest_window_before_they_are_due(self):
+        morning = self.task(self.avi, 'T1', self.at(12))
+        later = self.task(self.avi, 'T2', self.at(0, days=3))
+        too_early = self.task(self.avi, 'T3', self.at(5))
+        undated = self.task(self.avi, 'T4', None)
+        grounded = self.task(self.avk, 'T5', self.at(12))
+        swapped = self.task(self.avj, 'T6', self.at(0, days=2))
+
+        plan = plan_line_maintenance(self.day, self.day)
+        self.assertEqual(plan['assignments'][morning].start, self.at(6))
+        self.assertEqual(plan['assignments'][later].start, self.at(14))
+        self.assertEqual(plan['assignments'][swapped].start, self.at(22))
+        self.assertEqual(plan['unplaceable'], {too_early: NO_WINDOW_BEFORE_DUE, undated: NO_DUE_DATE,
+                                               grounded: NO_GROUND_TIME})
+
+    def test_capacity_gives_later_windows_to_higher_priorities(self):
+        routine = self.task(self.avi, 'T1', self.at(0, days=3), 'LOW')
+        critical = self.task(self.avi, 'T2', self.at(0, days=3), 'CRITICAL')
+        third = self.task(self.avi, 'T3', self.at(0, days=3), 'LOW')
+
+        plan = plan_line_maintenance(self.day, self.day, aircraft_ids=[self.avi.pk], window_capacity=1)
+        self.assertEqual(plan['assignments'][critical].start, self.at(14))
+        self.assertEqual(plan['assignments'][routine].start, self.at(6))
+        self.assertEqual(plan['unplaceable'], {third: CAPACITY})
+
+        plan = plan_line_maintenance(self.day, self.day, aircraft_ids=[self.avi.pk], station_capacity={'ADD': 2})
+        self.assertEqual(len(plan['assignments']), 2)
+        self.assertEqual(plan['unplaceable'], {third: CAPACITY})
+
+
+class GroundWindowTests(TestCase):
+
+    def setUp(self):
+        clear_query_cache()
+        self.addCleanup(clear_query_cache)
+        self.user, self.model_group, (self.avi, self.avj) = create_fleet()
+        self.day = timezone.localdate()
+
+    def at(self, hour, minute=0, days=0):
+        return timezone.make_aware(datetime.combine(self.day + timedelta(days=days), clock(hour, minute)))
+
+    def import_day(self, day, rows):
+        header = ['PFLT', 'STA', 'PTAIL', 'TAIL', 'FLT', 'DEST', 'STD']
+        import_schedule([dict(zip(header, row)) for row in rows], self.day + timedelta(days=day), replace=True)
+
+    def windows(self):
+        return [(w.tail_number, w.start_at, w.end_at, w.arrival_flight, w.departure_flight, w.open_ended)
+                for w in GroundWindow.objects.order_by('tail_number', 'start_at')]
+
+    def test_windows_follow_rotations_and_rebuild_per_date(self):
+        self.import_day(0, [
+            ('ET300', '06:00', 'ET-AVI', 'ET-AVI', 'ET301', 'NBO', '08:00'),
+            ('ET302', '14:00', 'ET-AVI', 'ET-AVJ', 'ET303', 'JIB', '15:00'),   # tail swap
+            ('ET304', '22:00', 'ET-AVJ', 'ET-AVI', 'ET305', 'DXB', '05:30'),   # leaves next morning
+        ])
+        self.assertEqual(self.windows(), [
+            ('ET-AVI', self.at(6), self.at(8), 'ET300', 'ET301', False),
+            ('ET-AVI', self.at(14), self.at(5, 30, days=1), 'ET302', 'ET305', False),
+            ('ET-AVJ', self.at(22), self.at(0, days=1), 'ET304', '', True),
+        ])
+
+        # The next day closes the open window; windows of the first day are re-derived, not duplicated
+        self.import_day(1, [('ET306', '09:00', 'ET-AVI', 'ET-AVJ', 'ET307', 'NBO', '10:00')])
+        self.assertEqual(self.windows()[2:], [
+            ('ET-AVI', self.at(9, days=1), self.at(0, days=2), 'ET306', '', True),
+            ('ET-AVJ', self.at(22), self.at(10, days=1), 'ET304', 'ET307', False),
+        ])
+        self.assertEqual(GroundWindow.objects.count(), 4)
+        self.assertEqual(GroundWindow.objects.get(arrival_flight='ET300').aircraft, self.avi)
+
+    def test_overlap_lookup(self):
+        self.import_day(0, [
+            ('ET300', '06:00', 'ET-AVI', 'ET-AVI', 'ET301', 'NBO', '08:00'),
+            ('ET304', '21:00', 'ET-AVJ', 'ET-AVJ', 'ET305', 'DXB', '04:00'),
+            ('ET306', '23:30', 'ET-AVI', 'ET-AVI', 'ET307', 'DXB', '06:00'),
+        ])
+        night = ground_windows_overlapping(self.at(22), self.at(5, days=1))
+        self.assertEqual([w.arrival_flight for w in night], ['ET304', 'ET306'])
+        self.assertEqual(list(ground_windows_overlapping(self.at(9), self.at(20))), [])
+        self.assertEqual(list(ground_windows_overlapping(self.at(22), self.at(23), station='NBO')), [])
+
+        if connection.vendor == 'sqlite':
+            plan = ground_windows_overlapping(self.at(22), self.at(5, days=1)).explain()
+            self.assertIn('USING INDEX', plan)
+            self.assertNotIn('SCAN store_groundwindow', plan)
+
+        self.client.force_login(self.user)
+        data = self.client.get('/api/ground-windows/', {'start': self.at(22).isoformat(),
+                                                        'end': self.at(5, days=1).isoformat()}).json()
+        self.assertEqual([w['tail_number'] for w in data['windows']], ['ET-AVJ', 'ET-AVI'])
+        self.assertEqual(self.client.get('/api/ground-windows/', {'start': 'soon'}).status_code, 400)
+
+
+class RotationTests(TestCase):
+
+    def setUp(self):
+        self.user, self.model_group, (self.avi, self.avj) = create_fleet()
+        self.day = timezone.localdate()
+
+    def import_rows(self, rows, replace=False):
+        header = ['PFLT', 'STA', 'PTAIL', 'TAIL', 'FLT', 'STD']
+        import_schedule([dict(zip(header, row)) for row in rows], self.day, replace=replace)
+
+    def chain(self, tail):
+        flights = AircraftFlightSchedule.objects.filter(current_tail_scheduled=tail).order_by('rotation_sequence')
+        return [(flight.current_flight_number, flight.rotation_sequence,
+                 flight.previous_rotation and flight.previous_rotation.current_flight_number, flight.is_tail_swap)
+                for flight in flights]
+
+    def test_flights_are_chained_per_tail_with_swaps_flagged(self):
+        self.import_rows([
+            ('ET304', '22:00', 'ET-AVJ', 'ET-AVI', 'ET305', '05:30'),   # leaves next morning, so last
+            ('ET300', '06:00', 'ET-AVI', 'ET-AVI', 'ET301', '08:00'),
+            ('ET302', '12:00', 'AVI', 'ET-AVI', 'ET303', '13:00'),      # same aircraft, bare suffix
+            ('', None, '', 'ET-AVJ', 'ET401', '07:00'),
+        ], replace=True)
+        self.assertEqual(self.chain('ET-AVI'), [
+            ('ET301', 1, None, False), ('ET303', 2, 'ET301', False), ('ET305', 3, 'ET303', True),
+        ])
+        self.assertEqual(self.chain('ET-AVJ'), [('ET401', 1, None, False)])
+        # Nothing to change the second time round
+        self.assertEqual(rebuild_rotations({self.day}), 0)
+
+    def test_only_the_tails_that_received_flights_are_recomputed(self):
+        self.import_rows([
+            ('ET300', '06:00', 'ET-AVI', 'ET-AVI', 'ET301', '08:00'),
+            ('', None, '', 'ET-AVJ', 'ET401', '09:00'),
+        ])
+        with CaptureQueriesContext(connection) as queries:
+            self.import_rows([('', None, '', 'ET-AVJ', 'ET400', '07:00')])
+        rotation_reads = [query['sql'] for query in queries if 'rotation_sequence' in query['sql']
+                          and query['sql'].startswith('SELECT')]
+        self.assertEqual(len(rotation_reads), 1)
+        self.assertIn("'ET-AVJ'", rotation_reads[0])
+        self.assertNotIn("'ET-AVI'", rotation_reads[0])
+
+        self.assertEqual(self.chain('ET-AVJ'), [('ET400', 1, None, False), ('ET401', 2, 'ET400', False)])
+        self.assertEqual(self.chain('ET-AVI'), [('ET301', 1, None, False)])
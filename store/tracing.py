@@ -0,0 +1,133 @@
+"""
+Structured timing traces for scraping sessions.
+
+Each fleet sweep or scheduler run writes one JSONL file (its path is
+saved in AircraftScrapingSession.log_file_path). Every line is an event:
+``pool``/``worker`` lines time driver start-up and cookie loading, and one
+``aircraft`` line per scrape holds the per-phase durations (page_load,
+cache, parse, db_wait, db_write), row counts and retries.
+
+summarize_traces() turns a set of trace files into p50/p95 per phase of
+each span level, so a pool's total is never mixed with an aircraft's.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils import timezone
+
+# Phases in the order a scrape goes through them, for reports
+PHASES = ['driver_start', 'cookie_load', 'page_load', 'cache', 'parse', 'db_wait', 'db_write', 'total']
+# Trace events that carry phase timings, outermost first
+SPAN_LEVELS = ['pool', 'worker', 'aircraft']
+
+
+class PhaseTimer:
+    """Accumulates wall-clock seconds per phase"""
+
+    def __init__(self):
+        self.phases = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.phases[name] = self.phases.get(name, 0) + seconds
+
+    def result(self):
+        phases = dict(self.phases, total=time.perf_counter() - self._started)
+        return {name: round(seconds, 6) for name, seconds in phases.items()}
+
+
+class SessionTrace:
+    """Thread-safe JSONL trace file for one session"""
+
+    def __init__(self, session, directory=None):
+        directory = directory or settings.SCRAPE_TRACE_DIR
+        os.makedirs(directory, exist_ok=True)
+        self.session_id = session.session_id
+        self.path = os.path.join(directory, f"{session.session_id}.jsonl")
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, event, **fields):
+        record = {'ts': timezone.now().isoformat(), 'session': self.session_id, 'event': event}
+        record.update(fields)
+        line = json.dumps(record, default=str)
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + '\n')
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def read_trace(path):
+    """Events of one trace file; unreadable lines (e.g. a run killed mid-write) are skipped"""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a sorted list"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(percent / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize_traces(paths):
+    """
+    {level: {phase: {'count', 'p50', 'p95', 'max', 'total'}}} per span
+    level (pool, worker, aircraft) over the trace files, plus the scrape
+    totals under '_aircraft' ({'scrapes', 'failed', 'retries', 'rows'},
+    rows being the tasks and work packages scraped).
+    """
+    samples = {}
+    aircraft = {'scrapes': 0, 'failed': 0, 'retries': 0, 'rows': 0}
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        for record in read_trace(path):
+            level = record.get('event')
+            if level not in SPAN_LEVELS:
+                continue
+            if level == 'aircraft':
+                rows = record.get('rows') or {}
+                aircraft['scrapes'] += 1
+                aircraft['failed'] += record.get('status') != 'COMPLETED'
+                aircraft['retries'] += record.get('retries', 0)
+                aircraft['rows'] += rows.get('tasks', 0) + rows.get('work_packages', 0)
+            for phase, seconds in (record.get('phases') or {}).items():
+                samples.setdefault(level, {}).setdefault(phase, []).append(seconds)
+
+    summary = {}
+    for level, phases in samples.items():
+        summary[level] = {}
+        for phase, values in phases.items():
+            values.sort()
+            summary[level][phase] = {
+                'count': len(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'max': values[-1],
+                'total': sum(values),
+            }
+    summary['_aircraft'] = aircraft
+    return summary
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('', views.home, name="home"),
     path('indexGen/', views.indexGen, name="indexGen"),
+    path('indexGen/<int:pk>/<str:output>/', views.task_card_index, name="task_card_index"),
     path('maintX/', views.maintX, name="maintX"),
     path('mycourse/', views.mycourse, name="mycourse"),
     path('login/', views.login_view, name="login"),
@@ -14,6 +15,15 @@ urlpatterns = [
     # API endpoints for AJAX requests
     path('api/register/', views.register_api, name="register_api"),
     path('api/login/', views.login_api, name="login_api"),
+    path('api/fleet-overview/', views.fleet_overview_api, name="fleet_overview_api"),
+    path('api/tasks/', views.open_tasks_api, name="open_tasks_api"),
+    path('api/due-horizon/', views.due_horizon_api, name="due_horizon_api"),
+    path('api/ground-windows/', views.ground_windows_api, name="ground_windows_api"),
+    path('api/search/', views.search_api, name="search_api"),
+    path('api/export/<str:name>/', views.export_api, name="export_api"),
+    path('api/snapshots/', views.snapshot_api, name="snapshot_api"),
+    path('api/cycle-times/', views.cycle_times_api, name="cycle_times_api"),
+    path('api/cache-stats/', views.cache_stats_api, name="cache_stats_api"),
     
 
 
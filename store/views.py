@@ -1,5 +1,5 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -10,19 +10,267 @@ from datetime import datetime
 from .models import *
 from .forms import UserRegistrationForm, UserLoginForm
 from .utils import cookieCart, cartData, guestOrder
+from .analytics import due_horizon
+from .exports import CONTENT_TYPES, export, parse_bound
+from .ground_windows import ground_windows_overlapping
+from .queries import (
+    TASK_PAGE_SIZE, filter_tasks, fleet_overview, open_work_packages, parse_flag, parse_moment, task_page,
+)
+from .query_cache import cache_stats, cached_json_view
+from .search import SEARCH_KINDS, SEARCH_LIMIT, search
+from .snapshots import SNAPSHOT_DATASETS, open_counts_on, open_trend
+from .status_log import cycle_times
+from .task_card_index import INDEX_FORMATS, csv_index, html_index
 
 def home(request):
     if request.user.is_authenticated:
         return redirect('mycourse')
     return render(request, 'store/home.html')
 
+@login_required
 def indexGen(request):
-    context = {}
+    work_packages = open_work_packages().select_related('aircraft').order_by(
+        'aircraft__tail_number', 'work_package_number')
+    context = {'work_packages': work_packages}
     return render(request, 'store/indexGen.html', context)
 
+@login_required
+def task_card_index(request, pk, output):
+    """Stream the numbered task card index of one work package as CSV or printable HTML"""
+    if output not in INDEX_FORMATS:
+        raise Http404(f"Unknown format {output!r}")
+    work_package = OpenWorkPackage.objects.select_related('aircraft').filter(pk=pk).first()
+    if work_package is None:
+        raise Http404("No such work package")
+
+    if output == 'csv':
+        response = StreamingHttpResponse(csv_index(work_package), content_type='text/csv')
+        name = f"{work_package.aircraft.tail_number}-{work_package.work_package_id}-index.csv"
+        response['Content-Disposition'] = f'attachment; filename="{name}"'
+    else:
+        response = StreamingHttpResponse(html_index(work_package), content_type='text/html; charset=utf-8')
+    return response
+
 def maintX(request):
     context = {}
-    return render(request, 'store/maintX.html', context)
+    return render(request, 'store/maintx.html', context)
+
+def _csv_param(request, name):
+    """?name=a,b&name=c -> ['a', 'b', 'c']"""
+    values = []
+    for value in request.GET.getlist(name):
+        values.extend(part.strip() for part in value.split(',') if part.strip())
+    return values
+
+@login_required
+@cached_json_view('fleet_overview')
+def fleet_overview_api(request):
+    """Every active aircraft with its task and work package counts, filterable by model_group and status"""
+    aircraft = fleet_overview(
+        model_groups=_csv_param(request, 'model_group'),
+        statuses=[status.upper() for status in _csv_param(request, 'status')],
+    )
+    fleet = [{
+        'tail_number': plane.tail_number,
+        'registration': plane.registration,
+        'model_group': plane.model_group.name,
+        'model_group_name': plane.model_group.full_name,
+        'status': plane.current_status,
+        'open_tasks': plane.open_task_total,
+        'overdue_tasks': plane.overdue_task_total,
+        'critical_tasks': plane.critical_task_total,
+        'next_task_due': plane.next_task_due,
+        'open_work_packages': plane.open_work_package_total,
+        'overdue_work_packages': plane.overdue_work_package_total,
+    } for plane in aircraft]
+    return JsonResponse({'success': True, 'count': len(fleet), 'aircraft': fleet})
+
+@login_required
+@cached_json_view('open_tasks')
+def open_tasks_api(request):
+    """Open tasks filtered by aircraft, due window, priority, work type and flags, paged by ?cursor="""
+    try:
+        flag = lambda name: parse_flag(request.GET[name], name) if request.GET.get(name) else None
+        moment = lambda name: parse_moment(request.GET[name], name) if request.GET.get(name) else None
+        tasks = filter_tasks(
+            aircraft=_csv_param(request, 'aircraft'),
+            due_from=moment('due_from'),
+            due_to=moment('due_to'),
+            priorities=[value.upper() for value in _csv_param(request, 'priority')],
+            work_types=[value.upper() for value in _csv_param(request, 'work_type')],
+            etops_significant=flag('etops_significant'),
+            soft_deadline=flag('soft_deadline'),
+            statuses=[value.upper() for value in _csv_param(request, 'status')],
+        )
+        page, next_cursor = task_page(tasks, request.GET.get('cursor'), int(request.GET.get('limit', TASK_PAGE_SIZE)))
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'tasks': [{
+            'id': task.pk,
+            'task_id': task.task_id,
+            'task_name': task.task_name,
+            'tail_number': task.aircraft.tail_number,
+            'due_date': task.due_date,
+            'soft_deadline': task.soft_deadline,
+            'task_status': task.task_status,
+            'task_priority': task.task_priority,
+            'work_type': task.work_type,
+            'etops_significant': task.etops_significant,
+            'work_package_number': task.work_package_number,
+        } for task in page],
+        'next_cursor': next_cursor,
+    })
+
+@login_required
+@cached_json_view('due_horizon')
+def due_horizon_api(request):
+    """How many open tasks are overdue or due within 1/3/7/30 days, per priority, aircraft and model group"""
+    aircraft = _csv_param(request, 'aircraft')
+    model_groups = _csv_param(request, 'model_group')
+    aircraft_ids = None
+    if aircraft or model_groups:
+        planes = Aircraft.objects.all()
+        if aircraft:
+            planes = planes.filter(tail_number__in=aircraft)
+        if model_groups:
+            planes = planes.filter(model_group__name__in=model_groups)
+        aircraft_ids = list(planes.values_list('pk', flat=True))
+    return JsonResponse(dict(due_horizon(aircraft_ids), success=True))
+
+@login_required
+@cached_json_view('ground_windows')
+def ground_windows_api(request):
+    """Tails on the ground at ?station= (default the line station) at any time between ?start= and ?end="""
+    try:
+        start = parse_moment(request.GET.get('start', ''), 'start')
+        end = parse_moment(request.GET.get('end', ''), 'end')
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    windows = ground_windows_overlapping(start, end, request.GET.get('station', '').upper() or None)
+    return JsonResponse({
+        'success': True,
+        'windows': [{
+            'tail_number': window.tail_number,
+            'station': window.station,
+            'start_at': window.start_at,
+            'end_at': window.end_at,
+            'duration_minutes': window.duration_minutes,
+            'arrival_flight': window.arrival_flight,
+            'departure_flight': window.departure_flight,
+            'open_ended': window.open_ended,
+        } for window in windows],
+    })
+
+@login_required
+def export_api(request, name):
+    """Stream dataset ``name`` as ?format=csv|jsonl|parquet, filtered by aircraft, model_group and from/to dates"""
+    output = request.GET.get('format', 'csv')
+    try:
+        moment = lambda key: parse_bound(request.GET[key], key) if request.GET.get(key) else None
+        chunks = export(
+            name, output,
+            aircraft=_csv_param(request, 'aircraft'),
+            model_groups=_csv_param(request, 'model_group'),
+            date_from=moment('from'),
+            date_to=moment('to'),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    response = StreamingHttpResponse(chunks, content_type=CONTENT_TYPES[output])
+    response['Content-Disposition'] = f'attachment; filename="{name}.{output}"'
+    return response
+
+@login_required
+def snapshot_api(request):
+    """
+    Open rows per tail (or ?by=model_group) from the daily snapshots: as of
+    ?date=, or for every snapshot between ?from= and ?to=
+    """
+    try:
+        name = request.GET.get('dataset', 'tasks')
+        if name not in SNAPSHOT_DATASETS:
+            raise ValueError(f"Unknown dataset {name!r}")
+        by = request.GET.get('by', 'tail_number')
+        if by not in ('tail_number', 'model_group'):
+            raise ValueError("by must be tail_number or model_group")
+        day = lambda key: timezone.localdate(parse_moment(request.GET[key], key))
+        aircraft = _csv_param(request, 'aircraft')
+        if request.GET.get('date'):
+            snapshot_date, counts = open_counts_on(day('date'), name, aircraft, by)
+            return JsonResponse({'success': True, 'snapshot_date': snapshot_date, 'counts': counts})
+        trend = open_trend(day('from'), day('to'), name, aircraft, by)
+    except KeyError as e:
+        return JsonResponse({'success': False, 'message': f"Missing ?{e.args[0]}="}, status=400)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'trend': [{'snapshot_date': snapshot_date, 'counts': counts} for snapshot_date, counts in trend.items()],
+    })
+
+@login_required
+def cycle_times_api(request):
+    """Days from ?from_status= (OPEN) to ?to_status= (COMPLETED) per ?by=model_group|tail_number"""
+    try:
+        moment = lambda key: parse_moment(request.GET[key], key) if request.GET.get(key) else None
+        stats = cycle_times(
+            from_status=request.GET.get('from_status', 'OPEN').upper(),
+            to_status=request.GET.get('to_status', 'COMPLETED').upper(),
+            object_type=request.GET.get('kind', 'task').upper(),
+            by=request.GET.get('by', 'model_group'),
+            since=moment('since'),
+            until=moment('until'),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    return JsonResponse({'success': True, 'cycle_times': stats})
+
+@login_required
+def cache_stats_api(request):
+    """Data version and hit/miss counters of the query cache in this process"""
+    return JsonResponse(dict(cache_stats(), success=True))
+
+@login_required
+def search_api(request):
+    """Ranked prefix search over task and work package names, scoped by aircraft/model_group"""
+    try:
+        text = request.GET.get('q', '').strip()
+        if not text:
+            raise ValueError("Missing search text ?q=")
+        kinds = _csv_param(request, 'kind') or list(SEARCH_KINDS)
+        for kind in kinds:
+            if kind not in SEARCH_KINDS:
+                raise ValueError(f"Unknown kind {kind!r}")
+        results = search(
+            text,
+            kinds=kinds,
+            aircraft=_csv_param(request, 'aircraft'),
+            model_groups=_csv_param(request, 'model_group'),
+            open_only=parse_flag(request.GET.get('open', 'false'), 'open'),
+            limit=int(request.GET.get('limit', SEARCH_LIMIT)),
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'results': [{
+            'kind': kind,
+            'id': row.pk,
+            'name': row.task_name if kind == 'task' else row.work_package_name,
+            'number': row.task_id if kind == 'task' else row.work_package_number,
+            'status': row.task_status if kind == 'task' else row.work_package_status,
+            'tail_number': row.aircraft.tail_number,
+            'model_group': row.aircraft.model_group.name,
+            'rank': rank,
+        } for kind, row, rank in results],
+    })
 def create_course(request):
     context = {}
     return render(request, 'store/create_course.html', context)